@@ -6,9 +6,12 @@ from app.routers import (
     customer_routes,
     order_routes,
     inventory_routes,
+    job_routes,
+    location_routes,
     purchase_order_routes,
     suppliers_routes,
-    reports_routes
+    reports_routes,
+    metrics_routes
 )
 
 router = APIRouter()
@@ -19,6 +22,9 @@ router.include_router(product_routes.router)
 router.include_router(customer_routes.router)
 router.include_router(order_routes.router)
 router.include_router(inventory_routes.router)
+router.include_router(location_routes.router)
 router.include_router(suppliers_routes.router)
 router.include_router(purchase_order_routes.router)
-router.include_router(reports_routes.router)
\ No newline at end of file
+router.include_router(reports_routes.router)
+router.include_router(job_routes.router)
+router.include_router(metrics_routes.router)
\ No newline at end of file
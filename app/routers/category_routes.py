@@ -4,20 +4,21 @@ from typing import List
 from schemas import product_schema as schemas
 from services import categories_service as categories_crud
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 @router.post("/", response_model=schemas.Category, status_code=status.HTTP_201_CREATED)
-def create_category(category_in: schemas.CategoryCreate, db: Session = Depends(staff_required)):
-    return categories_crud.create_category(db, category_in.name)
+async def create_category(category_in: schemas.CategoryCreate, db: Session = Depends(staff_required)):
+    return await run_service(db, categories_crud.create_category, category_in.name, response_model=schemas.Category)
 
 @router.get("/", response_model=List[schemas.Category])
-def list_categories(db: Session = Depends(staff_required)):
-    return categories_crud.list_categories(db)
+async def list_categories(db: Session = Depends(staff_required)):
+    return await run_service(db, categories_crud.list_categories, response_model=List[schemas.Category])
 
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(category_id: int, db: Session = Depends(staff_required)):
-    category = categories_crud.get_category(db, category_id)
+async def get_category(category_id: int, db: Session = Depends(staff_required)):
+    category = await run_service(db, categories_crud.get_category, category_id, response_model=schemas.Category)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from schemas.customer_schema import CustomerCreate, CustomerResponse
-from typing import List
-from services.customer_service import create_customer_service
-from models.models import Customer
+from typing import Optional
+from services.customer_service import create_customer_service, list_customers
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from schemas.pagination_schema import Page
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
 @router.post("/", response_model=CustomerResponse | dict)
-def create_customer(customer: CustomerCreate, db: Session = Depends(staff_required)):
-    return create_customer_service(customer, db)
+async def create_customer(customer: CustomerCreate, db: Session = Depends(staff_required)):
+    return await run_service(db, lambda session: create_customer_service(customer, session), response_model=CustomerResponse | dict)
 
-@router.get("/", response_model=List[CustomerResponse])
-def get_customers(db: Session = Depends(staff_required)):
-    return db.query(Customer).all()
+@router.get("/", response_model=Page[CustomerResponse])
+async def get_customers(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    name: Optional[str] = None,
+    phone: Optional[str] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(db, list_customers, cursor, limit, name, phone, response_model=Page[CustomerResponse])
@@ -1,11 +1,51 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from services import supplier_service
+from typing import List, Optional
+from schemas.supplier_schema import InventoryLevel, StockLevelAsOf, StockMovementOut
+from schemas.pagination_schema import Page
+from services import supplier_service, stock_ledger_service
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
-@router.get("/", response_model=list[dict])
-def get_inventory(db: Session = Depends(staff_required)):
-    inventory = supplier_service.get_inventory(db)
-    return [{"product_id": i.product_id, "quantity": i.quantity} for i in inventory]
\ No newline at end of file
+@router.get("/", response_model=Page[InventoryLevel])
+async def get_inventory(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    product_id: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    location_id: Optional[int] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(
+        db, supplier_service.get_inventory, cursor, limit, product_id, max_quantity, location_id,
+        response_model=Page[InventoryLevel]
+    )
+
+
+@router.get("/stock-as-of", response_model=List[StockLevelAsOf])
+async def get_stock_as_of(
+    at: datetime = Query(..., description="Point in time (ISO 8601; UTC if no offset)"),
+    product_id: Optional[List[int]] = Query(None),
+    db: Session = Depends(staff_required),
+):
+    return await run_service(
+        db, stock_ledger_service.stock_as_of, at, product_id, response_model=List[StockLevelAsOf]
+    )
+
+@router.get("/{product_id}/movements", response_model=Page[StockMovementOut])
+async def get_stock_movements(
+    product_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(
+        db, stock_ledger_service.list_movements, product_id, cursor, limit, since, until,
+        response_model=Page[StockMovementOut]
+    )
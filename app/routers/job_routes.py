@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from models.models import UserRole
+from schemas import job_schema as schemas
+from schemas.pagination_schema import Page
+from services import job_service
+from utils.auth_helper import get_current_user_and_db, staff_required
+from utils.db_helper import run_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+@router.post("/", response_model=schemas.JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(job_in: schemas.JobCreate, data=Depends(get_current_user_and_db)):
+    user, db = data
+    if job_service.JOBS[job_in.kind].manager_only and user.role not in [UserRole.admin, UserRole.manager]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Manager or Admin access required")
+    return await run_service(db, job_service.submit_job, job_in, user.id, response_model=schemas.JobOut)
+
+@router.get("/", response_model=Page[schemas.JobOut])
+async def list_jobs(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    kind: Optional[schemas.JobKind] = None,
+    status: Optional[schemas.JobStatus] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(db, job_service.list_jobs, cursor, limit, kind, status, response_model=Page[schemas.JobOut])
+
+@router.get("/{id}", response_model=schemas.JobOut)
+async def get_job(id: int, db: Session = Depends(staff_required)):
+    return await run_service(db, job_service.get_job, id, response_model=schemas.JobOut)
+
+@router.get("/{id}/result", response_class=FileResponse)
+async def download_job_result(id: int, db: Session = Depends(staff_required)):
+    path, filename, media_type = await run_service(db, job_service.result_file, id)
+    return FileResponse(path, media_type=media_type, filename=filename)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from typing import List
+from schemas import location_schema as schemas
+from services import location_service
+from utils.auth_helper import manager_required, staff_required
+from utils.db_helper import run_service
+
+router = APIRouter(prefix="/locations", tags=["Locations"])
+
+@router.post("/", response_model=schemas.LocationOut, status_code=status.HTTP_201_CREATED)
+async def create_location(location_in: schemas.LocationCreate, db: Session = Depends(manager_required)):
+    return await run_service(db, location_service.create_location, location_in, response_model=schemas.LocationOut)
+
+@router.get("/", response_model=List[schemas.LocationOut])
+async def list_locations(db: Session = Depends(staff_required)):
+    return await run_service(db, location_service.list_locations, response_model=List[schemas.LocationOut])
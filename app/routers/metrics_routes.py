@@ -0,0 +1,31 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from utils.auth_helper import manager_required
+from utils.cache import caches
+from utils.request_metrics import CONTENT_TYPE, metrics
+from db import pool_status
+
+# Prometheus scrapes /metrics without a user session; set METRICS_TOKEN to
+# require `Authorization: Bearer <METRICS_TOKEN>` on it.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+def scrape_allowed(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+@router.get("", response_class=Response, dependencies=[Depends(scrape_allowed)])
+async def get_prometheus_metrics():
+    return Response(metrics.render(pool_status()), media_type=CONTENT_TYPE)
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(db: Session = Depends(manager_required)):
+    return pool_status()
+
+@router.get("/cache")
+async def get_cache_metrics(db: Session = Depends(manager_required)):
+    return caches.stats()
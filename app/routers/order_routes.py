@@ -1,39 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-from schemas.order_schema import OrderCreate, OrderResponse, UpdateOrderStatus
+from datetime import datetime
+from typing import List, Optional
+from schemas.order_schema import OrderAllocationOut, OrderCreate, OrderResponse, UpdateOrderStatus
 from services.order_service import create_order, list_orders, update_order_status,list_shipped_orders
+from services.order_service import list_order_allocations
 from services.order_service import trigger_shipment
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from schemas.pagination_schema import Page
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 @router.post("/", response_model=OrderResponse)
-def create_new_order(order_data: OrderCreate, db: Session = Depends(staff_required)):
-    order = create_order(db, order_data)
+async def create_new_order(order_data: OrderCreate, db: Session = Depends(staff_required)):
+    order = await run_service(db, create_order, order_data, response_model=OrderResponse)
     return order
 
-@router.get("/", response_model=List[OrderResponse])
-def get_all_orders(db: Session = Depends(staff_required)):
-    return list_orders(db)
+@router.get("/", response_model=Page[OrderResponse])
+async def get_all_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(
+        db, list_orders, cursor, limit, status, customer_id, created_from, created_to,
+        response_model=Page[OrderResponse]
+    )
 
 @router.put("/{id}/status", response_model=OrderResponse)
-def change_order_status(id: int, status_data: UpdateOrderStatus, db: Session = Depends(staff_required)):
-    order = update_order_status(db, id, status_data.status)
+async def change_order_status(id: int, status_data: UpdateOrderStatus, db: Session = Depends(staff_required)):
+    order = await run_service(db, update_order_status, id, status_data.status, response_model=OrderResponse)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 @router.post("/{id}/ship", response_model=OrderResponse)
-def ship_order(id: int, db: Session = Depends(staff_required)):
-    order = trigger_shipment(db, id)
+async def ship_order(id: int, db: Session = Depends(staff_required)):
+    order = await run_service(db, trigger_shipment, id, response_model=OrderResponse)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
-@router.get("/shipped", response_model=List[OrderResponse])
-def get_shipped_orders(db: Session = Depends(staff_required)):
-    orders = list_shipped_orders(db)
-    if not orders:
+@router.get("/{id}/allocations", response_model=List[OrderAllocationOut])
+async def get_order_allocations(id: int, db: Session = Depends(staff_required)):
+    return await run_service(db, list_order_allocations, id, response_model=List[OrderAllocationOut])
+
+@router.get("/shipped", response_model=Page[OrderResponse])
+async def get_shipped_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(staff_required),
+):
+    orders = await run_service(
+        db, list_shipped_orders, cursor, limit, customer_id, created_from, created_to,
+        response_model=Page[OrderResponse]
+    )
+    if not orders.items and cursor is None:
         raise HTTPException(status_code=404, detail="No shipped orders found")
-    return orders
\ No newline at end of file
+    return orders
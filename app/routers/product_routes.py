@@ -1,31 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 from schemas import product_schema as schemas
 from services import product_service as product_crud
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
+from utils.pagination import MAX_PAGE_SIZE
+from schemas.pagination_schema import Page
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 @router.post("/", response_model=schemas.Product, status_code=status.HTTP_201_CREATED)
-def create_product(product_in: schemas.ProductCreate, db: Session = Depends(staff_required)):
-    return product_crud.create_product(db, product_in)
+async def create_product(product_in: schemas.ProductCreate, db: Session = Depends(staff_required)):
+    return await run_service(db, product_crud.create_product, product_in, response_model=schemas.Product)
 
-@router.get("/", response_model=List[schemas.Product])
-def list_products(skip: int = 0, limit: int = 100, db: Session = Depends(staff_required)):
-    return product_crud.list_products(db, skip, limit)
+@router.post("/import", response_model=schemas.ProductImportResult)
+async def import_products(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one product per line)"),
+    format: Optional[str] = Query(None, enum=["csv", "ndjson"], description="Defaults to the file extension"),
+    db: Session = Depends(staff_required),
+):
+    fmt = format or ("ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv")
+    return await run_service(db, product_crud.import_products, file.file, fmt)
+
+@router.get("/", response_model=Page[schemas.Product])
+async def list_products(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(
+        db, product_crud.list_products, skip, limit, cursor, category_id,
+        response_model=Page[schemas.Product]
+    )
+
+@router.get("/sku/{sku}", response_model=schemas.Product)
+async def get_product_by_sku(sku: str, db: Session = Depends(staff_required)):
+    product = await run_service(db, product_crud.get_product_by_sku, sku, response_model=schemas.Product)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(staff_required)):
-    product = product_crud.get_product(db, product_id)
+async def get_product(product_id: int, db: Session = Depends(staff_required)):
+    product = await run_service(db, product_crud.get_product, product_id, response_model=schemas.Product)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 @router.put("/{product_id}", response_model=schemas.Product)
-def update_product(product_id: int, product_update: schemas.ProductUpdate, db: Session = Depends(staff_required)):
-    return product_crud.update_product(db, product_id, product_update)
+async def update_product(product_id: int, product_update: schemas.ProductUpdate, db: Session = Depends(staff_required)):
+    return await run_service(db, product_crud.update_product, product_id, product_update, response_model=schemas.Product)
 
 @router.patch("/{product_id}/stock", response_model=schemas.Product)
-def adjust_stock(product_id: int, adj: schemas.StockAdjustment, db: Session = Depends(staff_required)):
-    return product_crud.adjust_stock(db, product_id, adj.adjustment)
+async def adjust_stock(product_id: int, adj: schemas.StockAdjustment, db: Session = Depends(staff_required)):
+    return await run_service(
+        db, product_crud.adjust_stock, product_id, adj.adjustment, adj.reason, adj.location_id,
+        response_model=schemas.Product
+    )
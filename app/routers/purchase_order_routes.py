@@ -1,70 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
 from schemas import supplier_schema as schemas
 from services import supplier_service
-from models import models as supplier_models
 
 router = APIRouter(prefix="/purchase-orders", tags=["Purchase Orders"])
 
 @router.post("/", response_model=schemas.PurchaseOrderOut)
-def create_po(po: schemas.PurchaseOrderCreate, db: Session = Depends(staff_required)):
-    return supplier_service.create_purchase_order(db, po)
+async def create_po(po: schemas.PurchaseOrderCreate, db: Session = Depends(staff_required)):
+    return await run_service(db, supplier_service.create_purchase_order, po, response_model=schemas.PurchaseOrderOut)
+
+@router.put(
+    "/receive",
+    response_model=schemas.BatchReceiveResult,
+    summary="Batch Receiving",
+    description="Mark received quantities for many purchase orders at once (all or nothing)."
+)
+async def receive_purchase_orders(data: schemas.BatchReceiveOrders, db: Session = Depends(staff_required)):
+    if not data.receipts or not any(r.received_items for r in data.receipts):
+        raise HTTPException(status_code=400, detail="No items provided to mark as received.")
+    results = await run_service(
+        db, supplier_service.receive_purchase_orders,
+        [(r.order_id, r.received_items) for r in data.receipts]
+    )
+    return {"orders": results, "updated_items": sum(r["updated_items"] for r in results)}
 
 @router.put(
     "/{order_id}/tracking",
     summary="Purchase Tracking",
     description="Track and update received quantities for a purchase order."
 )
-def purchase_tracking(order_id: int, data: schemas.ReceiveOrder, db: Session = Depends(staff_required)):
+async def purchase_tracking(order_id: int, data: schemas.ReceiveOrder, db: Session = Depends(staff_required)):
     if not data.received_items:
         raise HTTPException(status_code=400, detail="No items provided to mark as received.")
-    return supplier_service.mark_order_received(db, order_id, data.received_items)
+    return await run_service(db, supplier_service.mark_order_received, order_id, data.received_items)
 
 @router.get("/{order_id}/items")
-def get_items_by_status(
+async def get_items_by_status(
     order_id: int,
     status: str = Query(..., enum=["pending", "partial", "received"]),
     db: Session = Depends(staff_required),
 ):
-    po = (
-        db.query(supplier_models.PurchaseOrder)
-        .filter(supplier_models.PurchaseOrder.id == order_id)
-        .first()
-    )
-
-    if not po:
-        raise HTTPException(status_code=404, detail="Purchase order not found")
-
-    filtered_items = []
-    for item in po.items:
-        if item.received_quantity == item.quantity:
-            item_status = "received"
-        elif item.received_quantity > 0:
-            item_status = "partial"
-        else:
-            item_status = "pending"
-
-        if item_status == status:
-            filtered_items.append({
-                "product_id": item.product_id,
-                "ordered_quantity": item.quantity,
-                "received_quantity": item.received_quantity,
-                "unit_cost": item.unit_cost,
-                "status": item_status,
-            })
-
-    if not filtered_items:
-        return {
-            "order_id": order_id,
-            "selected_status": status,
-            "total_items": 0,
-            "message": f"No items found for status '{status}'."
-        }
-
-    return {
-        "order_id": order_id,
-        "selected_status": status,
-        "total_items": len(filtered_items),
-        "items": filtered_items,
-    }
\ No newline at end of file
+    return await run_service(db, supplier_service.get_order_items_by_status, order_id, status)
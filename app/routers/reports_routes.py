@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
 from services.analysis_service import inventory_summary, low_stock, sales_summary, purchase_summary, total_stock_value
+from services.analysis_service import stream_inventory_summary, stream_sales_summary
+from utils.export import ExportFormat, export_response
 from schemas import analysis_schema
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/reports", tags=["Analytics & Reports"])
@@ -13,23 +17,47 @@ class TotalStockValue(analysis_schema.BaseModel):
     total_stock_value: float
 
 @router.get("/inventory-summary", response_model=analysis_schema.InventorySummaryOut)
-def get_inventory_summary(db: Session = Depends(staff_required)):
-    return inventory_summary(db)
+async def get_inventory_summary(db: Session = Depends(staff_required)):
+    return await run_service(db, inventory_summary)
+
+
+@router.get("/inventory-summary/export", response_class=StreamingResponse)
+async def export_inventory_summary(format: ExportFormat = Query(ExportFormat.csv), db: Session = Depends(staff_required)):
+    return export_response(
+        stream_inventory_summary,
+        list(analysis_schema.InventorySummaryItem.model_fields),
+        format,
+        "inventory-summary",
+    )
 
 
 @router.get("/low-stock", response_model=List[analysis_schema.LowStockItem])
-def get_low_stock(threshold: int = Query(10, gt=0, description="Stock threshold"), db: Session = Depends(staff_required)):
-    return low_stock(db, threshold=threshold)
+async def get_low_stock(threshold: int = Query(10, gt=0, description="Stock threshold"), db: Session = Depends(staff_required)):
+    return await run_service(db, low_stock, threshold=threshold)
 
 
 @router.get("/sales-summary", response_model=List[analysis_schema.SalesSummaryItem])
-def get_sales_summary(limit: int = Query(50, gt=0, description="Limit number of records"), db: Session = Depends(staff_required)):
-    return sales_summary(db, limit=limit)
+async def get_sales_summary(limit: int = Query(50, gt=0, description="Limit number of records"), db: Session = Depends(staff_required)):
+    return await run_service(db, sales_summary, limit=limit)
+
+@router.get("/sales-summary/export", response_class=StreamingResponse)
+async def export_sales_summary(
+    format: ExportFormat = Query(ExportFormat.csv),
+    limit: Optional[int] = Query(None, gt=0, description="Limit number of records"),
+    db: Session = Depends(staff_required),
+):
+    return export_response(
+        stream_sales_summary,
+        list(analysis_schema.SalesSummaryItem.model_fields),
+        format,
+        "sales-summary",
+        limit=limit,
+    )
 
 @router.get("/purchase-summary", response_model=List[analysis_schema.PurchaseSummaryItem])
-def get_purchase_summary(only_received: bool = Query(True, description="Include only received orders"), limit: int = Query(50, gt=0), db: Session = Depends(staff_required)):
-    return purchase_summary(db, only_received=only_received, limit=limit)
+async def get_purchase_summary(only_received: bool = Query(True, description="Include only received orders"), limit: int = Query(50, gt=0), db: Session = Depends(staff_required)):
+    return await run_service(db, purchase_summary, only_received=only_received, limit=limit)
 
 @router.get("/total-stock-value", response_model=TotalStockValue)
-def get_total_stock_value(db: Session = Depends(staff_required)):
-    return total_stock_value(db)
\ No newline at end of file
+async def get_total_stock_value(db: Session = Depends(staff_required)):
+    return await run_service(db, total_stock_value)
@@ -1,22 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import Optional
 from utils.auth_helper import staff_required
+from utils.db_helper import run_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from schemas.pagination_schema import Page
 from schemas import supplier_schema as schemas
 from services import supplier_service
 
 router = APIRouter(prefix="/suppliers", tags=["Suppliers"])
 
 @router.post("/", response_model=schemas.SupplierOut)
-def create_supplier(supplier: schemas.SupplierCreate, db: Session = Depends(staff_required)):
-    return supplier_service.create_supplier(db, supplier)
+async def create_supplier(supplier: schemas.SupplierCreate, db: Session = Depends(staff_required)):
+    return await run_service(db, supplier_service.create_supplier, supplier, response_model=schemas.SupplierOut)
 
-@router.get("/", response_model=list[schemas.SupplierOut])
-def get_suppliers(db: Session = Depends(staff_required)):
-    return supplier_service.get_suppliers(db)
+@router.get("/", response_model=Page[schemas.SupplierOut])
+async def get_suppliers(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    name: Optional[str] = None,
+    db: Session = Depends(staff_required),
+):
+    return await run_service(db, supplier_service.get_suppliers, cursor, limit, name, response_model=Page[schemas.SupplierOut])
 
 @router.get("/{supplier_id}/summary")
-def get_supplier_order_summary(supplier_id: int, db: Session = Depends(staff_required)):
+async def get_supplier_order_summary(supplier_id: int, db: Session = Depends(staff_required)):
     try:
-        return supplier_service.get_supplier_order_summary(db, supplier_id)
+        return await run_service(db, supplier_service.get_supplier_order_summary, supplier_id)
     except HTTPException as e:
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,139 @@
+"""Order allocation throughput across many warehouse locations.
+
+    python -m benchmarks.allocation --locations 300 --products 2000 --lines 50 --orders 200
+
+Stocks each product at a random share of the locations, then measures
+  * plan: allocation_service.plan_allocation() alone, on in-memory stock;
+  * orders (index): order_service.create_order() end to end, with the stock index;
+  * orders (no index): the same with the index disabled, so every order reads
+    all location rows of its products.
+and how many locations and pieces the orders were split into.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import QueryCounter, make_session_factory, seed_catalog
+from models import models
+from schemas.order_schema import OrderCreate
+from services import allocation_service, order_service
+
+
+def seed(SessionLocal, args, rng):
+    with SessionLocal() as db:
+        seed_catalog(db, products=args.products)
+        db.query(models.Inventory).delete()
+        db.bulk_insert_mappings(models.Location, [
+            {"code": f"L{n:04d}", "name": f"Location {n}",
+             "latitude": rng.uniform(8, 32), "longitude": rng.uniform(68, 92)}
+            for n in range(2, args.locations + 1)
+        ])
+        location_ids = [loc for (loc,) in db.query(models.Location.id)]
+        per_product = max(1, int(len(location_ids) * args.stocked))
+        rows = []
+        for pid in range(1, args.products + 1):
+            for loc in rng.sample(location_ids, per_product):
+                rows.append({"product_id": pid, "location_id": loc, "quantity": rng.randint(0, 40)})
+            if len(rows) >= 50_000:
+                db.bulk_insert_mappings(models.Inventory, rows)
+                rows = []
+        db.bulk_insert_mappings(models.Inventory, rows)
+        customer = models.Customer(name="Allocation", phone="9000000005", address="Dock 5")
+        db.add(customer)
+        db.commit()
+        return customer.id, location_ids
+
+
+def make_orders(args, rng, customer_id, location_ids):
+    return [
+        OrderCreate(
+            customer_id=customer_id,
+            preferred_location_id=rng.choice(location_ids),
+            items=[
+                {"product_id": pid, "quantity": rng.randint(1, 30)}
+                for pid in rng.sample(range(1, args.products + 1), args.lines)
+            ],
+        )
+        for _ in range(args.orders)
+    ]
+
+
+def bench_plan(SessionLocal, orders):
+    with SessionLocal() as db:
+        points = allocation_service.location_points(db)
+        stock = allocation_service.available_stock(
+            db, {item.product_id for order in orders for item in order.items}, refresh=True
+        )
+    plans = []
+    start = time.perf_counter()
+    for order in orders:
+        requested = {}
+        for item in order.items:
+            requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
+        distances = allocation_service.distances_from(points, order.preferred_location_id)
+        plans.append(allocation_service.plan_allocation(requested, stock, distances)[0])
+    elapsed = time.perf_counter() - start
+    return elapsed, plans
+
+
+def bench_orders(engine, SessionLocal, orders):
+    accepted = rejected = 0
+    with QueryCounter(engine) as counter:
+        start = time.perf_counter()
+        for order in orders:
+            with SessionLocal() as db:
+                try:
+                    order_service.create_order(db, order)
+                    accepted += 1
+                except Exception:
+                    rejected += 1
+        elapsed = time.perf_counter() - start
+    return elapsed, accepted, rejected, counter.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_allocation.db",
+                        help="database to benchmark against (dropped and recreated)")
+    parser.add_argument("--locations", type=int, default=300)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--stocked", type=float, default=0.3, help="share of locations stocking each product")
+    parser.add_argument("--lines", type=int, default=50, help="lines per order")
+    parser.add_argument("--orders", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.locations} locations, {args.products} products, {args.lines} lines/order, {args.orders} orders")
+    print(f"{'run':<20} {'orders/s':>9} {'lines/s':>10} {'stmts/order':>12} {'rejected':>9}")
+
+    rng = random.Random(19)
+    engine, SessionLocal = make_session_factory(args.url)
+    customer_id, location_ids = seed(SessionLocal, args, rng)
+    orders = make_orders(args, rng, customer_id, location_ids)
+
+    elapsed, plans = bench_plan(SessionLocal, orders)
+    rate = len(orders) / elapsed
+    print(f"{'plan':<20} {rate:>9.0f} {rate * args.lines:>10.0f} {'-':>12} {'-':>9}")
+    shipments = [len({loc for pieces in plan.values() for loc, _ in pieces}) for plan in plans]
+    pieces = [sum(len(p) for p in plan.values()) / max(len(plan), 1) for plan in plans]
+    engine.dispose()
+
+    ttl = allocation_service.stock_index.ttl
+    for label, index_ttl in (("orders (index)", ttl), ("orders (no index)", 0)):
+        engine, SessionLocal = make_session_factory(args.url)
+        seed(SessionLocal, args, random.Random(19))
+        allocation_service.stock_index.clear()
+        allocation_service.location_cache.clear()
+        allocation_service.stock_index.ttl = index_ttl
+        elapsed, accepted, rejected, statements = bench_orders(engine, SessionLocal, orders)
+        engine.dispose()
+        rate = len(orders) / elapsed
+        print(f"{label:<20} {rate:>9.0f} {rate * args.lines:>10.0f} {statements / len(orders):>12.1f} {rejected:>9}")
+    allocation_service.stock_index.ttl = ttl
+
+    print(f"locations per order: mean {statistics.mean(shipments):.1f}, max {max(shipments)}; "
+          f"pieces per line: mean {statistics.mean(pieces):.2f}")
+
+
+if __name__ == "__main__":
+    main()
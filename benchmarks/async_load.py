@@ -0,0 +1,102 @@
+"""Requests/sec of the API in sync (threadpool) and async (AsyncSession) DB modes.
+
+Boots `uvicorn main:app` once per mode against the same seeded database and
+drives it with concurrent HTTP clients (needs `httpx`).
+
+    python -m benchmarks.async_load --url sqlite:////tmp/wms_load.db --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import make_session_factory, seed_catalog
+from utils.auth_helper import hash_password
+from models import models
+
+PATHS = ["/products/{id}", "/categories/", "/reports/total-stock-value", "/reports/sales-summary"]
+
+
+def seed(url: str, products: int):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=products, orders=products // 2)
+        db.add(models.User(name="bench", email="bench@example.com",
+                           password_hash=hash_password("bench"), role=models.UserRole.admin))
+        db.commit()
+    engine.dispose()
+
+
+def wait_until_up(base: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(base + "/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not start")
+
+
+async def drive(base: str, concurrency: int, duration: float, products: int):
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        login = await client.post("/auth/login", json={"username_or_email": "bench", "password": "bench"})
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        done = 0
+        errors = 0
+        stop_at = time.perf_counter() + duration
+
+        async def user(n):
+            nonlocal done, errors
+            i = n
+            while time.perf_counter() < stop_at:
+                path = PATHS[i % len(PATHS)].format(id=i % products + 1)
+                response = await client.get(path)
+                done += 1
+                errors += response.status_code >= 400
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        return done / (time.perf_counter() - start), errors
+
+
+def run_mode(mode: str, args) -> tuple:
+    # the schema comes from create_all, so the server must not try to migrate it
+    env = dict(os.environ, DB_URL=args.url, DB_AUTO_MIGRATE="false", DB_ASYNC="true" if mode == "async" else "false")
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_until_up(base)
+        return asyncio.run(drive(base, args.concurrency, args.duration, args.products))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="sqlite:////tmp/wms_load.db")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per mode")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    seed(args.url, args.products)
+    print(f"{'mode':<6} {'req/s':>10} {'errors':>8}")
+    for mode in ("sync", "async"):
+        rps, errors = run_mode(mode, args)
+        print(f"{mode:<6} {rps:>10.0f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cache coherence check: two simulated worker processes share one Redis-protocol
+server (fakeredis by default) and must never serve an entry the other invalidated.
+
+    python -m benchmarks.cache_coherence [--redis-url redis://localhost:6379/0]
+
+Runs the in-memory backend with pub/sub invalidation and the shared Redis
+backend, and exits with status 1 if a worker still sees a stale entry. It also
+races a cache fill against a commit on the other worker: worker B starts
+loading a product, worker A commits and invalidates it, and B's stale result
+must be refused by the catalog fill guards rather than cached.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks import common  # noqa: F401  (env defaults for db.py)
+from services import catalog_cache
+from utils.cache import CacheRegistry
+
+
+def make_client(redis_url):
+    if redis_url:
+        import redis
+        return lambda: redis.Redis.from_url(redis_url)
+    import fakeredis
+    server = fakeredis.FakeServer()
+    return lambda: fakeredis.FakeRedis(server=server)
+
+
+def wait_for(predicate, timeout=2.0) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if predicate():
+            return time.perf_counter() - start
+        time.sleep(0.005)
+    return -1.0
+
+
+def check(backend: str, new_client) -> list:
+    namespace = f"coherence-{backend}-{time.time_ns()}"
+    workers = [CacheRegistry(backend, namespace=namespace, client=new_client()) for _ in range(2)]
+    a, b = [w.cache(catalog_cache.PRODUCTS, maxsize=100, ttl=60) for w in workers]
+    catalog_cache.register_guards(workers[1])
+    for w in workers:
+        w.start_listener()
+    time.sleep(0.2)  # let both subscriptions register
+
+    failures = []
+    try:
+        for key in range(1, 4):
+            a.set(key, {"id": key, "quantity": 10})
+            b.set(key, {"id": key, "quantity": 10})
+
+        workers[0].invalidate("catalog.products", [1])
+        lag = wait_for(lambda: b.get(1) is None)
+        if lag < 0:
+            failures.append(f"{backend}: worker B still serves key 1 after worker A invalidated it")
+        elif b.get(2) is None:
+            failures.append(f"{backend}: invalidating key 1 also dropped key 2")
+        print(f"{backend:<8} key delete propagated in {lag * 1000:.1f} ms")
+
+        workers[1].invalidate("catalog.products")
+        lag = wait_for(lambda: a.get(2) is None and a.get(3) is None)
+        if lag < 0:
+            failures.append(f"{backend}: worker A kept entries after worker B cleared the cache")
+        print(f"{backend:<8} clear propagated in {lag * 1000:.1f} ms")
+
+        # B reads product 4 before A's commit and stores it after A's invalidation arrived
+        generation = catalog_cache._current_generation()
+        workers[0].invalidate(catalog_cache.PRODUCTS, [4])
+        lag = wait_for(lambda: catalog_cache._current_generation() > generation)
+        catalog_cache._store(b, 4, {"id": 4, "quantity": 10}, generation, (("product", 4),))
+        if lag < 0:
+            failures.append(f"{backend}: worker B's fill guards never saw worker A's invalidation of key 4")
+        elif b.get(4) is not None:
+            failures.append(f"{backend}: worker B cached a fill that started before worker A's invalidation")
+        print(f"{backend:<8} stale fill after remote invalidation {'CACHED' if b.get(4) is not None else 'refused'}")
+    finally:
+        for w in workers:
+            w.stop_listener()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", help="real server to use instead of fakeredis")
+    args = parser.parse_args()
+
+    new_client = make_client(args.redis_url)
+    failures = check("memory", new_client) + check("redis", new_client)
+    for failure in failures:
+        print("FAIL", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
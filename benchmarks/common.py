@@ -0,0 +1,102 @@
+import os
+import time
+from contextlib import contextmanager
+
+# db.py builds its engine at import time, so make sure it has something to bind to.
+os.environ.setdefault("DB_URL", "sqlite://")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "1")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from db import Base
+from models import models
+
+
+def make_session_factory(url: str = "sqlite://"):
+    """Fresh engine + schema for a benchmark run."""
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def percentile(samples, q: float):
+    """Nearest-rank percentile (q in 0..1) of a non-empty sequence."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = (time.perf_counter() - start) * 1000
+
+
+def seed_catalog(db, products: int, orders: int = 0, suppliers: int = 0, lines_per_order: int = 3):
+    """Populate categories, the default location, products, inventory and optionally
+    orders / purchase orders."""
+    category = models.Category(name="Benchmark")
+    # migrated databases already have the default location
+    location = db.query(models.Location).filter(models.Location.code == "MAIN").first() \
+        or models.Location(code="MAIN", name="Main warehouse")
+    db.add_all([category, location])
+    db.flush()
+
+    db.bulk_insert_mappings(models.Product, [
+        {"id": i, "name": f"Product {i}", "sku": f"SKU-{i:06d}", "category_id": category.id,
+         "unit_price": 1 + (i % 97), "location_id": location.id}
+        for i in range(1, products + 1)
+    ])
+    db.bulk_insert_mappings(models.Inventory, [
+        {"product_id": i, "location_id": location.id, "quantity": i % 50} for i in range(1, products + 1)
+    ])
+
+    if orders:
+        customer = models.Customer(name="Benchmark", phone="9000000000", address="Dock 1")
+        db.add(customer)
+        db.flush()
+        db.bulk_insert_mappings(models.Order, [
+            {"id": i, "customer_id": customer.id, "status": "Pending", "total_amount": 0}
+            for i in range(1, orders + 1)
+        ])
+        db.bulk_insert_mappings(models.OrderItem, [
+            {"order_id": o, "product_id": (o * 7 + n) % products + 1, "quantity": 1 + n, "price": 10.0}
+            for o in range(1, orders + 1) for n in range(lines_per_order)
+        ])
+
+    if suppliers:
+        db.bulk_insert_mappings(models.Supplier, [
+            {"id": i, "name": f"Supplier {i}", "contact": "9000000000", "address": "Dock"}
+            for i in range(1, suppliers + 1)
+        ])
+        db.bulk_insert_mappings(models.PurchaseOrder, [
+            {"id": i, "supplier_id": i % suppliers + 1, "status": "received"}
+            for i in range(1, suppliers * 4 + 1)
+        ])
+        db.bulk_insert_mappings(models.PurchaseOrderItem, [
+            {"order_id": po, "product_id": (po + n) % products + 1, "quantity": 10,
+             "unit_cost": 2.5, "received_quantity": 10}
+            for po in range(1, suppliers * 4 + 1) for n in range(lines_per_order)
+        ])
+
+    db.commit()
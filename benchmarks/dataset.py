@@ -0,0 +1,426 @@
+"""Deterministic synthetic warehouse dataset for scale testing.
+
+    python -m benchmarks.dataset --url sqlite:////tmp/wms_scale.db --scale 10
+    python -m benchmarks.dataset --url postgresql://wms@localhost/wms_scale --scale 100
+
+Sizes grow linearly with --scale. Scale 1 is 1,000 products and about 100,000
+order items; scale 100 is production size: 100,000 products, 10M order items,
+5,000 suppliers and 50,000 purchase orders. The database is dropped and rebuilt
+by the migrations, so `main:app` boots on it as is, and every table is filled
+with bulk inserts:
+  * product popularity (order lines, reorders) and customer activity are
+    Zipfian, so a few products and customers dominate, as in production;
+  * orders grow over --days and carry mixed statuses: recent ones are mostly
+    pending or in transit, older ones mostly delivered;
+  * purchase orders are received, partially received or still pending;
+  * stock sits at each product's home location and a few others, and every
+    order line is allocated to one of them;
+  * the stock ledger holds an opening balance per inventory row plus every
+    receipt and order, so it sums to inventory; rollups and weekly snapshots
+    are built by the services that normally maintain them.
+The same --seed, --scale and --end always produce the same rows. The users
+created include ADMIN_USER / ADMIN_PASSWORD (admin role).
+"""
+import argparse
+import bisect
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from itertools import accumulate
+
+from benchmarks import common  # noqa: F401  (env defaults for db.py)
+from sqlalchemy import create_engine, insert, text, update
+from sqlalchemy.orm import Session
+
+import migrations
+import pytz
+from db import Base
+from models import models
+from services import rollup_service, stock_ledger_service
+from utils.auth_helper import hash_password
+
+ADMIN_USER, ADMIN_PASSWORD = "admin", "admin"
+BATCH_SIZE = 10_000
+IST = pytz.timezone("Asia/Kolkata")
+
+LINES_PER_ORDER = (30, 25, 15, 10, 7, 5, 3, 2, 2, 1)  # weights for 1..10 lines (mean ~3)
+LINE_QUANTITY = (50, 25, 12, 8, 5)                     # weights for 1..5 units
+RECENT_ORDER_STATUSES = {"Pending": 35, "accepted": 20, "Shipment started": 25, "Shipped": 20}
+OLD_ORDER_STATUSES = {"Delivered": 80, "received": 8, "Shipped": 8, "Shipment started": 4}
+
+
+@dataclass(frozen=True)
+class Sizes:
+    products: int
+    categories: int
+    locations: int
+    customers: int
+    suppliers: int
+    purchase_orders: int
+    order_items: int
+    users: int
+    jobs: int
+
+    @classmethod
+    def for_scale(cls, scale: float) -> "Sizes":
+        return cls(
+            products=max(10, int(1_000 * scale)),
+            categories=max(5, int(20 * math.sqrt(scale))),
+            locations=max(2, round(2 * math.sqrt(scale))),
+            customers=max(10, int(2_000 * scale)),
+            suppliers=max(2, int(50 * scale)),
+            purchase_orders=max(5, int(500 * scale)),
+            order_items=max(100, int(100_000 * scale)),
+            users=10 + int(scale),
+            jobs=max(5, int(20 * scale)),
+        )
+
+
+class Zipf:
+    """Draws ids 1..n with P(k-th most popular) proportional to 1/k**s; popularity ranks are shuffled over the ids."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.ranks = {item_id: rank for rank, item_id in enumerate(self.ids, 1)}
+        self.cumulative = list(accumulate(1 / k ** s for k in range(1, n + 1)))
+
+    def draw(self, rng: random.Random) -> int:
+        return self.ids[bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])]
+
+    def sample(self, rng: random.Random, k: int) -> list:
+        """k distinct ids."""
+        k = min(k, len(self.ids))
+        picked = {}
+        while len(picked) < k:
+            picked.setdefault(self.draw(rng), None)
+        return list(picked)
+
+    def rank(self, item_id: int) -> int:
+        """1 for the most popular id."""
+        return self.ranks[item_id]
+
+
+def _weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def _letters(n: int) -> str:
+    """1 -> A, 26 -> Z, 27 -> AA: category names may not contain digits."""
+    name = ""
+    while n:
+        n, rest = divmod(n - 1, 26)
+        name = chr(ord("A") + rest) + name
+    return name
+
+
+def _phone(rng: random.Random) -> str:
+    return str(rng.randint(6, 9)) + "".join(str(rng.randint(0, 9)) for _ in range(9))
+
+
+class Generator:
+    def __init__(self, engine, scale: float, seed: int, end: datetime, days: int, snapshot_days: int):
+        self.engine = engine
+        self.sizes = Sizes.for_scale(scale)
+        self.seed = seed
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.snapshot_days = snapshot_days
+        self.counts = {}
+        # stock per (product, location): received and sold over the period
+        self.received = defaultdict(int)
+        self.sold = defaultdict(int)
+
+    def rng(self, part: str) -> random.Random:
+        # one stream per table, so changing how one table is generated leaves the others alone
+        return random.Random(f"{self.seed}-{part}")
+
+    def insert(self, conn, model, rows):
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+        self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+
+    def at(self, fraction: float) -> datetime:
+        return self.start + (self.end - self.start) * fraction
+
+    # ----------------- Schema ----------------- #
+    def reset_schema(self):
+        with self.engine.begin() as conn:
+            Base.metadata.drop_all(conn)
+            migrations.version_table.drop(conn, checkfirst=True)
+        migrations.upgrade(self.engine)
+
+    # ----------------- Reference data ----------------- #
+    def users(self, conn):
+        rng = self.rng("users")
+        password = hash_password(ADMIN_PASSWORD)
+        rows = [{"id": 1, "name": ADMIN_USER, "email": "admin@example.com", "password_hash": password,
+                 "role": models.UserRole.admin, "created_at": self.start}]
+        for n in range(2, self.sizes.users + 1):
+            role = models.UserRole.manager if rng.random() < 0.15 else models.UserRole.staff
+            rows.append({"id": n, "name": f"user{n}", "email": f"user{n}@example.com",
+                         "password_hash": password, "role": role, "created_at": self.at(rng.random())})
+        self.insert(conn, models.User, rows)
+
+    def locations(self, conn):
+        rng = self.rng("locations")
+        # the migrations created the default location (MAIN) as id 1
+        conn.execute(update(models.Location).where(models.Location.id == 1).values(latitude=19.07, longitude=72.88))
+        self.insert(conn, models.Location, [
+            {"id": n, "code": f"DC-{n:03d}", "name": f"Distribution centre {n}",
+             "latitude": round(rng.uniform(8, 32), 4), "longitude": round(rng.uniform(68, 92), 4)}
+            for n in range(2, self.sizes.locations + 1)
+        ])
+        self.counts["locations"] += 1
+
+    def catalog(self, conn):
+        rng = self.rng("catalog")
+        sizes = self.sizes
+        self.insert(conn, models.Category, [
+            {"id": n, "name": f"Category {_letters(n)}"} for n in range(1, sizes.categories + 1)
+        ])
+        category = Zipf(sizes.categories, 0.7, rng)
+        self.prices = {}
+        self.home = {}
+        rows = []
+        for pid in range(1, sizes.products + 1):
+            price = max(0.5, round(math.exp(rng.gauss(3.5, 1.0)), 2))
+            home = 1 if rng.random() < 0.5 else rng.randint(1, sizes.locations)
+            created = self.at(rng.random() * 0.3)
+            self.prices[pid] = price
+            self.home[pid] = home
+            rows.append({
+                "id": pid, "name": f"Product {pid}", "sku": f"SKU-{pid:07d}",
+                "category_id": category.draw(rng), "unit_price": price, "location_id": home,
+                "created_at": created, "updated_at": created,
+            })
+        self.insert(conn, models.Product, rows)
+
+        # popular products are ordered more often and stocked in more places
+        self.popularity = Zipf(sizes.products, 1.1, rng)
+        self.stocked = {}
+        for pid in range(1, sizes.products + 1):
+            extra = 2 if self.popularity.rank(pid) <= sizes.products // 20 else rng.choice((0, 0, 1))
+            others = [loc for loc in range(1, sizes.locations + 1) if loc != self.home[pid]]
+            self.stocked[pid] = [self.home[pid]] + rng.sample(others, min(extra, len(others)))
+
+        self.insert(conn, models.Customer, [
+            {"id": n, "name": f"Customer {n}", "phone": f"9{n:09d}", "address": f"{rng.randint(1, 999)} Market Road"}
+            for n in range(1, sizes.customers + 1)
+        ])
+        self.insert(conn, models.Supplier, [
+            {"id": n, "name": f"Supplier {n}", "contact": _phone(rng), "address": f"Industrial Area {n}"}
+            for n in range(1, sizes.suppliers + 1)
+        ])
+
+    # ----------------- Purchase orders ----------------- #
+    def purchase_orders(self, conn):
+        rng = self.rng("purchase_orders")
+        supplier = Zipf(self.sizes.suppliers, 1.0, rng)
+        orders, items, movements = [], [], []
+        item_id = 0
+        for po_id in range(1, self.sizes.purchase_orders + 1):
+            created = self.at(rng.random())
+            age_days = (self.end - created).days
+            status = _weighted(rng, {"received": 85, "partial": 10, "pending": 5} if age_days > 30
+                               else {"received": 30, "partial": 30, "pending": 40})
+            lines = self.popularity.sample(rng, rng.randint(1, 8))
+            partial = rng.randrange(len(lines)) if status == "partial" else None
+            for n, pid in enumerate(lines):
+                quantity = rng.randint(1, 50) * 10
+                if status == "received":
+                    received = quantity
+                elif status == "partial":
+                    # at least one line short, the others anywhere from nothing to complete
+                    received = rng.randint(1, quantity - 1) if n == partial else rng.choice((0, quantity, rng.randint(0, quantity)))
+                else:
+                    received = 0
+                item_id += 1
+                items.append({"id": item_id, "order_id": po_id, "product_id": pid, "quantity": quantity,
+                              "unit_cost": round(self.prices[pid] * rng.uniform(0.4, 0.8), 2),
+                              "received_quantity": received})
+                if received:
+                    self.received[(pid, self.home[pid])] += received
+                    movements.append({
+                        "product_id": pid, "location_id": self.home[pid], "movement_type": "receipt",
+                        "delta": received, "purchase_order_id": po_id,
+                        "created_at": min(self.end, created + timedelta(days=rng.uniform(1, 10))),
+                    })
+            orders.append({"id": po_id, "supplier_id": supplier.draw(rng), "status": status,
+                           "created_at": created.astimezone(IST).replace(tzinfo=None)})
+        self.insert(conn, models.PurchaseOrder, orders)
+        self.insert(conn, models.PurchaseOrderItem, items)
+        self.insert(conn, models.StockMovement, movements)
+
+    # ----------------- Sales orders ----------------- #
+    def sales_orders(self, conn):
+        rng = self.rng("orders")
+        customer = Zipf(self.sizes.customers, 0.9, rng)
+        target = self.sizes.order_items
+        line_counts = range(1, len(LINES_PER_ORDER) + 1)
+        quantities = range(1, len(LINE_QUANTITY) + 1)
+        expected_orders = target / (sum(n * w for n, w in zip(line_counts, LINES_PER_ORDER)) / sum(LINES_PER_ORDER))
+
+        order_id = item_id = 0
+        orders, items, allocations, movements = [], [], [], []
+        while item_id < target:
+            order_id += 1
+            # more orders later in the period: order n of N lands at (n/N) ** (1/1.5)
+            created = self.at(min(1.0, (order_id / expected_orders) ** (1 / 1.5)) * rng.uniform(0.995, 1.0))
+            age_days = (self.end - created).days
+            status = _weighted(rng, OLD_ORDER_STATUSES if age_days > 14 else RECENT_ORDER_STATUSES)
+            count = min(rng.choices(line_counts, LINES_PER_ORDER)[0], target - item_id)
+            total = 0.0
+            for pid in self.popularity.sample(rng, count):
+                quantity = rng.choices(quantities, LINE_QUANTITY)[0]
+                stocked = self.stocked[pid]
+                location = stocked[0] if len(stocked) == 1 or rng.random() < 0.8 else rng.choice(stocked[1:])
+                item_id += 1
+                price = self.prices[pid]
+                total += price * quantity
+                self.sold[(pid, location)] += quantity
+                items.append({"id": item_id, "order_id": order_id, "product_id": pid,
+                              "quantity": quantity, "price": price})
+                allocations.append({"order_id": order_id, "product_id": pid,
+                                    "location_id": location, "quantity": quantity})
+                movements.append({"product_id": pid, "location_id": location, "movement_type": "order",
+                                  "delta": -quantity, "order_id": order_id, "created_at": created})
+            orders.append({"id": order_id, "customer_id": customer.draw(rng), "status": status,
+                           "total_amount": round(total, 2), "created_at": created})
+            if len(items) >= BATCH_SIZE:
+                self._flush_orders(conn, orders, items, allocations, movements)
+        self._flush_orders(conn, orders, items, allocations, movements)
+
+    def _flush_orders(self, conn, *batches):
+        for model, rows in zip((models.Order, models.OrderItem, models.OrderAllocation, models.StockMovement), batches):
+            self.insert(conn, model, rows)
+            rows.clear()
+
+    # ----------------- Inventory and ledger ----------------- #
+    def inventory(self, conn):
+        rng = self.rng("inventory")
+        rows, openings = [], []
+        for pid, locations in self.stocked.items():
+            for location in locations:
+                key = (pid, location)
+                on_hand = 0 if rng.random() < 0.08 else rng.randint(1, 200)
+                # opening balance so that opening + receipts - sales = on hand, never below zero
+                opening = max(0, on_hand + self.sold[key] - self.received[key])
+                rows.append({"product_id": pid, "location_id": location,
+                             "quantity": opening + self.received[key] - self.sold[key],
+                             "last_updated": self.end.replace(tzinfo=None)})
+                if opening:
+                    openings.append({"product_id": pid, "location_id": location, "movement_type": "opening",
+                                     "delta": opening, "created_at": self.start})
+        self.insert(conn, models.Inventory, rows)
+        self.insert(conn, models.StockMovement, openings)
+
+    def jobs(self, conn):
+        rng = self.rng("jobs")
+        rows = []
+        # recent history only: the workers purge anything older than a few days
+        for n in range(1, self.sizes.jobs + 1):
+            created = self.end - timedelta(hours=rng.uniform(1, 48))
+            kind = rng.choice(("ship_orders", "rebuild_rollups", "export_inventory_summary", "export_sales_summary"))
+            failed = rng.random() < 0.1
+            rows.append({
+                "id": n, "kind": kind, "status": "failed" if failed else "succeeded",
+                "params": {"order_ids": [rng.randint(1, 1000) for _ in range(3)]} if kind == "ship_orders" else {},
+                "result": None if failed else {}, "error": "OperationalError: database is locked" if failed else None,
+                "attempts": 1, "created_by": 1, "created_at": created,
+                "started_at": created + timedelta(seconds=1), "finished_at": created + timedelta(seconds=rng.uniform(2, 90)),
+            })
+        self.insert(conn, models.Job, rows)
+
+    def reset_sequences(self, conn):
+        if conn.dialect.name != "postgresql":
+            return
+        for table in ("users", "locations", "categories", "products", "customers", "suppliers", "purchase_orders",
+                      "purchase_order_items", "orders", "order_items", "jobs"):
+            conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                              f"(SELECT coalesce(max(id), 1) FROM {table}))"))
+
+    # ----------------- Derived tables ----------------- #
+    def derived(self):
+        with Session(self.engine) as db:
+            self.counts.update(rollup_service.rebuild_rollups(db))
+            snapshots = 0
+            if self.snapshot_days:
+                at = self.start + timedelta(days=self.snapshot_days)
+                while at <= self.end:
+                    snapshots += stock_ledger_service.take_snapshots(db, as_of=at)
+                    at += timedelta(days=self.snapshot_days)
+            self.counts["stock_snapshots"] = snapshots
+
+    def run(self) -> dict:
+        steps = [
+            ("schema", lambda conn: None),
+            ("users", self.users),
+            ("locations", self.locations),
+            ("catalog", self.catalog),
+            ("purchase orders", self.purchase_orders),
+            ("orders", self.sales_orders),
+            ("inventory", self.inventory),
+            ("jobs", self.jobs),
+            ("sequences", self.reset_sequences),
+        ]
+        timings = {}
+        start = time.perf_counter()
+        self.reset_schema()
+        timings["schema"] = time.perf_counter() - start
+        for name, step in steps[1:]:
+            start = time.perf_counter()
+            with self.engine.begin() as conn:
+                step(conn)
+            timings[name] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.derived()
+        timings["rollups + snapshots"] = time.perf_counter() - start
+        return timings
+
+
+def generate(url: str, scale: float = 1, seed: int = 24, end: datetime = None, days: int = 365,
+             snapshot_days: int = 7) -> dict:
+    """Rebuild the database at `url` with the dataset; returns rows written per table."""
+    if end is None:
+        end = datetime.combine(date.today(), dt_time(), tzinfo=timezone.utc)
+    engine = create_engine(url)
+    try:
+        generator = Generator(engine, scale, seed, end, days, snapshot_days)
+        generator.run()
+        return generator.counts
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_dataset.db", help="database to rebuild (dropped first)")
+    parser.add_argument("--scale", type=float, default=1, help="1 = 1k products / 100k order items; 100 = production")
+    parser.add_argument("--seed", type=int, default=24)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(),
+                        help="last day of history (default today); pin it for identical data on later days")
+    parser.add_argument("--days", type=int, default=365, help="days of order history")
+    parser.add_argument("--snapshot-days", type=int, default=7, help="stock snapshot interval (0 for none)")
+    args = parser.parse_args()
+
+    end = datetime.combine(args.end, dt_time(), tzinfo=timezone.utc)
+    engine = create_engine(args.url)
+    generator = Generator(engine, args.scale, args.seed, end, args.days, args.snapshot_days)
+    started = time.perf_counter()
+    timings = generator.run()
+    engine.dispose()
+
+    print(f"scale {args.scale:g}, seed {args.seed}, {args.days} days to {args.end}: {generator.sizes}")
+    print(f"{'table':<28} {'rows':>12}")
+    for table, rows in sorted(generator.counts.items()):
+        print(f"{table:<28} {rows:>12,}")
+    print("\n" + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in timings.items()))
+    print(f"total {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
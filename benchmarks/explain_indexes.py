@@ -0,0 +1,159 @@
+"""Index usage check: builds the schema through the migrations, runs the hot
+service queries and EXPLAINs every SELECT they issue, expecting each one to be
+served by the indexes added for it.
+
+    python -m benchmarks.explain_indexes [--url postgresql://...] [--rows 20000] [--verbose]
+
+Exits with status 1 if the migrated schema lacks an index declared on the
+models, or if a service query's plan does not use its expected index.
+Against PostgreSQL the tables must be empty and sequential scans are disabled
+for the EXPLAINs, so small test tables still show which indexes are usable.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.common import seed_catalog
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import migrations
+from db import Base
+from models import models
+from services import allocation_service, analysis_service, inventory_service, order_service, supplier_service
+
+# (label, service call, indexes: each entry is a tuple of acceptable index names)
+CASES = [
+    ("inventory_service.load_stock",
+     lambda db: inventory_service.load_stock(db, [(3, 1), (1, 1), (2, 1)]),
+     [("ix_inventory_product_id_location_id",)]),
+    ("allocation_service.available_stock",
+     lambda db: allocation_service.available_stock(db, [3, 1, 2], refresh=True),
+     [("ix_inventory_product_id_location_id",)]),
+    ("supplier_service.get_inventory(product_id)",
+     lambda db: supplier_service.get_inventory(db, product_id=5),
+     [("ix_inventory_product_id_location_id",)]),
+    ("order_service.list_shipped_orders",
+     lambda db: order_service.list_shipped_orders(db),
+     [("ix_orders_status",), ("ix_order_items_order_id",)]),
+    ("order_service.list_orders(status)",
+     lambda db: order_service.list_orders(db, status="accepted"),
+     [("ix_orders_status",), ("ix_order_items_order_id",)]),
+    ("supplier_service.get_supplier_order_summary",
+     lambda db: supplier_service.get_supplier_order_summary(db, 1),
+     [("ix_purchase_orders_supplier_id",), ("ix_purchase_order_items_order_id",)]),
+    ("supplier_service.get_order_items_by_status",
+     lambda db: supplier_service.get_order_items_by_status(db, 1, "received"),
+     [("ix_purchase_order_items_order_id",)]),
+    ("analysis_service.purchase_summary(pending)",
+     lambda db: analysis_service.purchase_summary(db, only_received=False),
+     [("ix_purchase_orders_supplier_id", "ix_purchase_orders_status"), ("ix_purchase_order_items_order_id",)]),
+    ("analysis_service.low_stock",
+     lambda db: analysis_service.low_stock(db, threshold=10),
+     [("ix_inventory_product_id_location_id",)]),
+]
+
+
+def missing_indexes(engine) -> list:
+    """Indexes declared on the models that the migrated database does not have."""
+    inspector = inspect(engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                missing.append(f"{table.name}.{index.name}")
+    return missing
+
+
+def seed(session_factory, rows: int):
+    with session_factory() as db:
+        seed_catalog(db, products=rows, orders=rows, suppliers=max(rows // 100, 2), lines_per_order=3)
+        # give the status columns realistic selectivity
+        db.query(models.Order).filter(models.Order.id % 20 == 0).update({models.Order.status: "Shipment started"})
+        db.query(models.Order).filter(models.Order.id % 20 == 1).update({models.Order.status: "accepted"})
+        db.query(models.PurchaseOrder).filter(models.PurchaseOrder.id % 10 == 0).update({models.PurchaseOrder.status: "pending"})
+        db.commit()
+
+
+def explain(conn, statement: str, parameters) -> str:
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return "\n".join(row[-1] for row in rows)
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def run_case(engine, session_factory, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with session_factory() as db:
+            call(db)
+            db.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        return [(statement, explain(conn, statement, parameters)) for statement, parameters in statements]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="database to migrate and seed (default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    db_file = None
+    url = args.url
+    if url is None:
+        db_file = os.path.join(tempfile.gettempdir(), "wms_explain_indexes.db")
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        url = f"sqlite:///{db_file}"
+
+    engine = create_engine(url)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    failures = []
+    try:
+        migrations.upgrade(engine)
+        for name in missing_indexes(engine):
+            failures.append(f"schema: {name} is declared on the models but no migration creates it")
+
+        seed(session_factory, args.rows)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+        for label, call, expected in CASES:
+            plans = run_case(engine, session_factory, call)
+            combined = "\n".join(plan for _, plan in plans)
+            missing = [" or ".join(names) for names in expected if not any(n in combined for n in names)]
+            print(f"{'FAIL' if missing else 'ok':<5} {label}")
+            if missing:
+                failures.append(f"{label}: plan does not use {', '.join(missing)}")
+            if missing or args.verbose:
+                for statement, plan in plans:
+                    print("      " + " ".join(statement.split())[:160])
+                    print("        " + plan.replace("\n", "\n        "))
+    finally:
+        engine.dispose()
+        if db_file and os.path.exists(db_file):
+            os.remove(db_file)
+
+    for failure in failures:
+        print("FAIL", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
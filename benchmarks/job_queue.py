@@ -0,0 +1,124 @@
+"""API latency while heavy exports run inline in the API vs. through the job queue.
+
+Boots `uvicorn main:app` (no in-process job threads) plus a
+`python manage.py worker` process against one seeded database, and measures
+light requests from `--concurrency` clients in three phases:
+  * idle:   light requests only;
+  * inline: one more client downloads the inventory/sales exports back to back
+            from the API (GET /reports/.../export);
+  * queued: that client submits the same exports as jobs (POST /jobs/), polls
+            them until done and downloads the file.
+Needs `httpx`.
+
+    python -m benchmarks.job_queue --products 50000 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.async_load import wait_until_up
+from benchmarks.common import make_session_factory, percentile, seed_catalog
+from models import models
+from utils.auth_helper import hash_password
+
+LIGHT_PATHS = ["/products/{id}", "/orders/?limit=20", "/categories/"]
+EXPORTS = [("inventory-summary", "export_inventory_summary"), ("sales-summary", "export_sales_summary")]
+
+
+def seed(url: str, products: int):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=products, orders=products // 2)
+        db.add(models.User(name="bench", email="bench@example.com",
+                           password_hash=hash_password("bench"), role=models.UserRole.admin))
+        db.commit()
+    engine.dispose()
+
+
+async def heavy_inline(client, stop_at):
+    done = 0
+    while time.perf_counter() < stop_at:
+        name, _ = EXPORTS[done % len(EXPORTS)]
+        async with client.stream("GET", f"/reports/{name}/export") as response:
+            async for _ in response.aiter_bytes():
+                pass
+        done += 1
+    return done
+
+
+async def heavy_queued(client, stop_at):
+    done = 0
+    while time.perf_counter() < stop_at:
+        _, kind = EXPORTS[done % len(EXPORTS)]
+        job = (await client.post("/jobs/", json={"kind": kind})).json()
+        while job["status"] in ("queued", "running"):
+            await asyncio.sleep(0.05)
+            job = (await client.get(f"/jobs/{job['id']}")).json()
+        if job["status"] == "succeeded":
+            await client.get(f"/jobs/{job['id']}/result")
+        done += 1
+    return done
+
+
+async def drive(base: str, args, heavy=None):
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+        login = await client.post("/auth/login", json={"username_or_email": "bench", "password": "bench"})
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        latencies = []
+        stop_at = time.perf_counter() + args.duration
+
+        async def user(n):
+            i = n
+            while time.perf_counter() < stop_at:
+                path = LIGHT_PATHS[i % len(LIGHT_PATHS)].format(id=i % args.products + 1)
+                start = time.perf_counter()
+                await client.get(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                i += 1
+
+        tasks = [user(n) for n in range(args.concurrency)]
+        if heavy is not None:
+            tasks.append(heavy(client, stop_at))
+        results = await asyncio.gather(*tasks)
+        return latencies, results[-1] if heavy is not None else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_job_queue.db")
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    seed(args.url, args.products)
+    # the schema comes from create_all, so the server must not try to migrate it
+    env = dict(os.environ, DB_URL=args.url, DB_AUTO_MIGRATE="false",
+               JOB_WORKER_THREADS="0", JOB_POLL_SECONDS="0.05")
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"], env=env,
+    )
+    worker = subprocess.Popen([sys.executable, "manage.py", "worker"], env=env)
+    try:
+        wait_until_up(base)
+        print(f"{'phase':<8} {'light req/s':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'exports':>8}")
+        for phase, heavy in (("idle", None), ("inline", heavy_inline), ("queued", heavy_queued)):
+            latencies, exports = asyncio.run(drive(base, args, heavy))
+            print(f"{phase:<8} {len(latencies) / args.duration:>12.0f} {statistics.median(latencies):>8.1f} "
+                  f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {exports:>8}")
+    finally:
+        for process in (server, worker):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""End-to-end load test of the API with a realistic mix of requests.
+
+    python -m benchmarks.load_test --concurrency 32 --duration 30
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier run>.json
+
+Seeds a database (with --scale, a benchmarks.dataset one of that size) and
+boots `uvicorn main:app` on it (or targets a running server with --server),
+logs in through /auth/login and runs --concurrency virtual users. Each iteration a user picks one action, weighted by --mix:
+  lookup   GET /products/{id}
+  browse   GET /products/ from a random cursor
+  order    POST /orders/ with 1-5 lines (a 400 for missing stock is a rejection)
+  receive  POST /purchase-orders/, then PUT /purchase-orders/{id}/tracking
+  ship     POST /orders/{id}/ship for an order placed earlier in the run
+  report   GET one of the /reports/ endpoints
+Throughput and p50/p95/p99 latency are reported per endpoint, measured after
+--warmup seconds. Every run is saved as JSON (with the git commit and settings)
+under benchmarks/results/ so commits can be compared with --compare. Needs `httpx`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks import dataset
+from benchmarks.async_load import wait_until_up
+from benchmarks.common import make_session_factory, percentile, seed_catalog
+from models import models
+from utils.auth_helper import hash_password
+from utils.pagination import encode_cursor
+
+DEFAULT_MIX = "lookup=40,browse=10,order=20,receive=5,ship=5,report=20"
+REPORTS = [
+    "/reports/total-stock-value",
+    "/reports/low-stock",
+    "/reports/sales-summary",
+    "/reports/purchase-summary",
+    "/reports/inventory-summary",
+]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+USER, PASSWORD = "loadtest", "loadtest"
+
+
+def seed(url: str, products: int, customers: int, suppliers: int):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=products, orders=products // 4, suppliers=suppliers)
+        db.bulk_insert_mappings(models.Customer, [
+            {"name": f"Customer {n}", "phone": f"8{n:09d}", "address": "Load street"}
+            for n in range(1, customers + 1)
+        ])
+        db.add(models.User(name=USER, email="loadtest@example.com",
+                           password_hash=hash_password(PASSWORD), role=models.UserRole.admin))
+        db.commit()
+        customer_ids = [cid for (cid,) in db.query(models.Customer.id)]
+        supplier_ids = [sid for (sid,) in db.query(models.Supplier.id)]
+    engine.dispose()
+    return customer_ids, supplier_ids
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ACTIONS:
+            raise SystemExit(f"unknown action '{name.strip()}' in --mix (choose from {', '.join(ACTIONS)})")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+# ----------------- Actions ----------------- #
+class Run:
+    """Shared state of one load test: the client, what has been created, and the samples."""
+
+    def __init__(self, client, args, customer_ids, supplier_ids, measure_from: float):
+        self.client = client
+        self.args = args
+        self.customer_ids = customer_ids
+        self.supplier_ids = supplier_ids
+        self.measure_from = measure_from
+        self.placed_orders = deque(maxlen=10_000)
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.elapsed = 0.0
+
+    async def call(self, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "transport-error"
+        if start >= self.measure_from:
+            self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            self.statuses[endpoint][status] += 1
+        return response
+
+
+async def lookup(run: Run, rng: random.Random):
+    await run.call("GET /products/{id}", "GET", f"/products/{rng.randint(1, run.args.products)}")
+
+
+async def browse(run: Run, rng: random.Random):
+    cursor = encode_cursor(rng.randint(0, run.args.products))
+    await run.call("GET /products/", "GET", "/products/", params={"cursor": cursor, "limit": 50})
+
+
+async def order(run: Run, rng: random.Random):
+    lines = [
+        {"product_id": pid, "quantity": rng.randint(1, 3)}
+        for pid in rng.sample(range(1, run.args.products + 1), rng.randint(1, 5))
+    ]
+    response = await run.call("POST /orders/", "POST", "/orders/",
+                              json={"customer_id": rng.choice(run.customer_ids), "items": lines})
+    if response is not None and response.status_code == 200:
+        run.placed_orders.append(response.json()["id"])
+
+
+async def receive(run: Run, rng: random.Random):
+    lines = [
+        {"product_id": pid, "quantity": rng.randint(20, 60), "unit_cost": round(rng.uniform(1, 50), 2)}
+        for pid in rng.sample(range(1, run.args.products + 1), rng.randint(1, 3))
+    ]
+    response = await run.call("POST /purchase-orders/", "POST", "/purchase-orders/",
+                              json={"supplier_id": rng.choice(run.supplier_ids), "items": lines})
+    if response is None or response.status_code != 200:
+        return
+    received = [{"product_id": line["product_id"], "received_quantity": line["quantity"]} for line in lines]
+    await run.call("PUT /purchase-orders/{order_id}/tracking", "PUT",
+                   f"/purchase-orders/{response.json()['id']}/tracking", json={"received_items": received})
+
+
+async def ship(run: Run, rng: random.Random):
+    if not run.placed_orders:
+        return await lookup(run, rng)
+    await run.call("POST /orders/{id}/ship", "POST", f"/orders/{run.placed_orders.popleft()}/ship")
+
+
+async def report(run: Run, rng: random.Random):
+    path = rng.choice(REPORTS)
+    await run.call(f"GET {path}", "GET", path)
+
+
+ACTIONS = {"lookup": lookup, "browse": browse, "order": order, "receive": receive, "ship": ship, "report": report}
+
+
+async def drive(base: str, args, customer_ids, supplier_ids) -> Run:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=60, limits=limits) as client:
+        login = await client.post("/auth/login", json={"username_or_email": args.user, "password": args.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        weights = parse_mix(args.mix)
+        names, shares = list(weights), list(weights.values())
+        start = time.perf_counter()
+        run = Run(client, args, customer_ids, supplier_ids, measure_from=start + args.warmup)
+        stop_at = start + args.warmup + args.duration
+
+        async def user(n):
+            rng = random.Random(args.seed * 1000 + n)
+            while time.perf_counter() < stop_at:
+                await ACTIONS[rng.choices(names, shares)[0]](run, rng)
+
+        await asyncio.gather(*(user(n) for n in range(args.concurrency)))
+        run.elapsed = time.perf_counter() - run.measure_from
+        return run
+
+
+# ----------------- Results ----------------- #
+def summarize(run: Run) -> dict:
+    endpoints = {}
+    for endpoint, samples in sorted(run.latencies.items()):
+        statuses = run.statuses[endpoint]
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / run.elapsed, 2),
+            "ok": sum(n for s, n in statuses.items() if isinstance(s, int) and s < 400),
+            "rejected": sum(n for s, n in statuses.items() if isinstance(s, int) and 400 <= s < 500),
+            "errors": sum(n for s, n in statuses.items() if not isinstance(s, int) or s >= 500),
+            "mean_ms": round(statistics.mean(samples), 2),
+            "p50_ms": round(percentile(samples, 0.50), 2),
+            "p95_ms": round(percentile(samples, 0.95), 2),
+            "p99_ms": round(percentile(samples, 0.99), 2),
+            "max_ms": round(max(samples), 2),
+        }
+    everything = [ms for samples in run.latencies.values() for ms in samples]
+    total = {
+        "requests": len(everything),
+        "rps": round(len(everything) / run.elapsed, 2),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "p50_ms": round(percentile(everything, 0.50), 2) if everything else None,
+        "p95_ms": round(percentile(everything, 0.95), 2) if everything else None,
+        "p99_ms": round(percentile(everything, 0.99), 2) if everything else None,
+    }
+    return {"endpoints": endpoints, "total": total}
+
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(results: dict):
+    print(f"{'endpoint':<44} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rejected':>9} {'errors':>7}")
+    for endpoint, e in results["endpoints"].items():
+        print(f"{endpoint:<44} {e['rps']:>8.1f} {e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f} "
+              f"{e['rejected']:>9} {e['errors']:>7}")
+    t = results["total"]
+    if t["requests"]:
+        print(f"{'total':<44} {t['rps']:>8.1f} {t['p50_ms']:>8.1f} {t['p95_ms']:>8.1f} {t['p99_ms']:>8.1f} "
+              f"{'':>9} {t['errors']:>7}")
+
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\nagainst {baseline['commit']} ({baseline['timestamp']}):")
+    print(f"{'endpoint':<44} {'req/s':>16} {'p95 ms':>18} {'p99 ms':>18}")
+
+    def change(new, old):
+        return f"{new:>8.1f} {(new - old) / old * 100:>+6.0f}%" if old else f"{new:>8.1f} {'':>7}"
+
+    rows = list(results["endpoints"].items()) + [("total", results["total"])]
+    for endpoint, e in rows:
+        old = baseline["endpoints"].get(endpoint) if endpoint != "total" else baseline["total"]
+        if not old or not e.get("requests"):
+            continue
+        print(f"{endpoint:<44} {change(e['rps'], old['rps']):>16} {change(e['p95_ms'], old['p95_ms']):>18} "
+              f"{change(e['p99_ms'], old['p99_ms']):>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_load_test.db",
+                        help="database to seed and serve (dropped and recreated)")
+    parser.add_argument("--server", help="base URL of an already running API to test instead (no seeding)")
+    parser.add_argument("--user", default=USER)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--products", type=int, default=5000, help="catalog size (product ids 1..N)")
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--suppliers", type=int, default=20)
+    parser.add_argument("--scale", type=float,
+                        help="seed with benchmarks.dataset at this scale instead (sets the sizes and user)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=23)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--async-db", action="store_true", help="serve with DB_ASYNC=true")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="where to save the results (default benchmarks/results/)")
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="earlier results to compare against")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    server = None
+    if args.server:
+        base = args.server.rstrip("/")
+        customer_ids = list(range(1, args.customers + 1))
+        supplier_ids = list(range(1, args.suppliers + 1))
+    else:
+        if args.scale:
+            sizes = dataset.Sizes.for_scale(args.scale)
+            args.products, args.customers, args.suppliers = sizes.products, sizes.customers, sizes.suppliers
+            args.user, args.password = dataset.ADMIN_USER, dataset.ADMIN_PASSWORD
+            dataset.generate(args.url, args.scale, seed=args.seed)
+            customer_ids = list(range(1, args.customers + 1))
+            supplier_ids = list(range(1, args.suppliers + 1))
+        else:
+            customer_ids, supplier_ids = seed(args.url, args.products, args.customers, args.suppliers)
+        base = f"http://127.0.0.1:{args.port}"
+        # seed() builds the schema with create_all, so the server must not try to migrate it
+        env = dict(os.environ, DB_URL=args.url, DB_AUTO_MIGRATE="false",
+                   DB_ASYNC="true" if args.async_db else "false")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=env,
+        )
+    try:
+        wait_until_up(base)
+        print(f"{args.concurrency} users, {args.duration:.0f}s after {args.warmup:.0f}s warmup, mix {args.mix}")
+        run = asyncio.run(drive(base, args, customer_ids, supplier_ids))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "password")},
+        **summarize(run),
+    }
+    print_summary(results)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_test-{results['timestamp'].replace(':', '')[:17]}-{results['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Latency and query count of order_service.create_order versus line count.
+
+    python -m benchmarks.order_lines --lines 10 100 300 1000
+"""
+import argparse
+
+from benchmarks.common import make_session_factory, seed_catalog, QueryCounter, timed
+from models import models
+from schemas.order_schema import OrderCreate
+from services import order_service
+
+
+def run(lines: int, url: str, repeat: int):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=max(lines, 1000))
+        db.query(models.Inventory).update({models.Inventory.quantity: 1_000_000})
+        customer = models.Customer(name="Benchmark", phone="9000000001", address="Dock 2")
+        db.add(customer)
+        db.commit()
+        customer_id = customer.id
+
+    order = OrderCreate(
+        customer_id=customer_id,
+        items=[{"product_id": i, "quantity": 1} for i in range(1, lines + 1)],
+    )
+    samples = []
+    for n in range(repeat):
+        latency = {}
+        with SessionLocal() as db, QueryCounter(engine) as counter, timed(latency, "create_order"):
+            order_service.create_order(db, order)
+        samples.append((counter.count, latency["create_order"]))
+    engine.dispose()
+    queries = samples[-1][0]
+    best = min(ms for _, ms in samples)
+    return queries, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", default="sqlite://", help="database to benchmark against (dropped and recreated)")
+    args = parser.parse_args()
+
+    print(f"{'lines':>8} {'queries':>8} {'best ms':>10}")
+    for lines in args.lines:
+        queries, ms = run(lines, args.url, args.repeat)
+        print(f"{lines:>8} {queries:>8} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
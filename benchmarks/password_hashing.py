@@ -0,0 +1,140 @@
+"""Login throughput and API latency under login bursts, by password hashing cost.
+
+For each cost on the command line this boots `uvicorn main:app` with that
+PASSWORD_HASHER cost, seeds users hashed at it and runs two kinds of client
+at once for --duration seconds:
+  * --logins clients logging in back to back (POST /auth/login), a shift change;
+  * --concurrency clients doing light reads (GET /products/{id}).
+It prints the time of one hash in this process, login throughput and latency,
+and the light requests' latency next to an idle phase without logins, which
+shows whether hashing starves the rest of the API. PASSWORD_HASH_POOL and
+PASSWORD_HASH_WORKERS are passed through to the server. Needs `httpx`.
+
+    python -m benchmarks.password_hashing --hasher scrypt --costs 4096,16384,65536
+    python -m benchmarks.password_hashing --hasher pbkdf2_sha256 --costs 100000,300000,600000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.async_load import wait_until_up
+from benchmarks.common import make_session_factory, percentile, seed_catalog
+from models import models
+from utils import password_hasher
+
+PASSWORD = "shift-change"
+COST_ENV = {"scrypt": "PASSWORD_SCRYPT_N", "pbkdf2_sha256": "PASSWORD_PBKDF2_ITERATIONS"}
+
+
+def make_hasher(name: str, cost: int):
+    return password_hasher.Scrypt(n=cost) if name == "scrypt" else password_hasher.Pbkdf2Sha256(iterations=cost)
+
+
+def seed(url: str, products: int, users: int, hasher):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=products)
+        db.bulk_insert_mappings(models.User, [
+            {"name": f"picker{n}", "email": f"picker{n}@example.com", "password_hash": hasher.hash(PASSWORD),
+             "role": models.UserRole.staff}
+            for n in range(users)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+async def drive(base: str, args, logins: int):
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+        first = await client.post("/auth/login", json={"username_or_email": "picker0", "password": PASSWORD})
+        first.raise_for_status()
+        headers = {"Authorization": f"Bearer {first.json()['access_token']}"}
+        login_ms, light_ms = [], []
+        stop_at = time.perf_counter() + args.duration
+
+        async def login(n):
+            i = n
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                response = await client.post("/auth/login", json={
+                    "username_or_email": f"picker{i % args.users}", "password": PASSWORD})
+                response.raise_for_status()
+                login_ms.append((time.perf_counter() - start) * 1000)
+                i += logins
+
+        async def light(n):
+            i = n
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                await client.get(f"/products/{i % args.products + 1}", headers=headers)
+                light_ms.append((time.perf_counter() - start) * 1000)
+                i += 1
+
+        await asyncio.gather(*[login(n) for n in range(logins)], *[light(n) for n in range(args.concurrency)])
+        return login_ms, light_ms
+
+
+def run_cost(args, cost: int) -> list:
+    hasher = make_hasher(args.hasher, cost)
+    start = time.perf_counter()
+    hasher.hash(PASSWORD)
+    hash_ms = (time.perf_counter() - start) * 1000
+
+    seed(args.url, args.products, args.users, hasher)
+    # the schema comes from create_all, so the server must not try to migrate it
+    env = dict(os.environ, DB_URL=args.url, DB_AUTO_MIGRATE="false", JOB_WORKER_THREADS="0",
+               PASSWORD_HASHER=args.hasher, **{COST_ENV[args.hasher]: str(cost)})
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"], env=env,
+    )
+    try:
+        wait_until_up(base)
+        _, idle = asyncio.run(drive(base, args, logins=0))
+        login_ms, light_ms = asyncio.run(drive(base, args, logins=args.logins))
+    finally:
+        server.terminate()
+        server.wait()
+    return [
+        hash_ms,
+        len(login_ms) / args.duration,
+        statistics.median(login_ms) if login_ms else 0.0,
+        percentile(login_ms, 0.95) if login_ms else 0.0,
+        percentile(idle, 0.95),
+        percentile(light_ms, 0.95),
+        len(light_ms) / len(idle),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_password_hashing.db")
+    parser.add_argument("--hasher", choices=sorted(COST_ENV), default="scrypt")
+    parser.add_argument("--costs", default="4096,16384,65536",
+                        help="comma separated: scrypt n (power of 2) or pbkdf2 iterations")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--logins", type=int, default=16, help="clients logging in concurrently")
+    parser.add_argument("--concurrency", type=int, default=4, help="clients doing light reads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    pool = os.getenv("PASSWORD_HASH_POOL", password_hasher.PASSWORD_HASH_POOL)
+    workers = os.getenv("PASSWORD_HASH_WORKERS", password_hasher.PASSWORD_HASH_WORKERS)
+    print(f"{args.hasher}, {pool} pool x{workers}, {args.logins} logging in, {args.concurrency} reading")
+    print(f"{'cost':>8} {'hash ms':>8} {'login/s':>8} {'login p50':>10} {'login p95':>10} "
+          f"{'read p95 idle':>14} {'read p95 burst':>15} {'reads kept':>11}")
+    for cost in (int(c) for c in args.costs.split(",")):
+        hash_ms, rate, p50, p95, idle_p95, burst_p95, kept = run_cost(args, cost)
+        print(f"{cost:>8} {hash_ms:>8.1f} {rate:>8.1f} {p50:>10.1f} {p95:>10.1f} "
+              f"{idle_p95:>14.1f} {burst_p95:>15.1f} {kept:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
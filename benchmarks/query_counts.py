@@ -0,0 +1,102 @@
+"""Query-count regression check: every endpoint must issue the same number of SQL
+statements whether the tables hold a few rows or many (i.e. no N+1 loading).
+
+    python -m benchmarks.query_counts
+
+Exits with status 1 and lists the offending endpoints when a count grows with
+the row count.
+"""
+import os
+import sys
+import tempfile
+
+_db_file = os.path.join(tempfile.gettempdir(), "wms_query_counts.db")
+os.environ["DB_URL"] = f"sqlite:///{_db_file}"
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import seed_catalog, QueryCounter
+from db import Base, engine, SessionLocal
+from models import models
+from services import catalog_cache
+from utils.response_cache import response_cache
+from utils.auth_helper import hash_password, token_cache, user_cache
+import main
+
+SMALL, LARGE = 5, 40  # both below the default page size, so pages hold every row
+
+ENDPOINTS = [
+    "/orders/",
+    "/orders/shipped",
+    "/products/",
+    "/products/1",
+    "/customers/",
+    "/suppliers/",
+    "/suppliers/1/summary",
+    "/inventory/",
+    "/categories/",
+    "/purchase-orders/1/items?status=received",
+    "/reports/inventory-summary",
+    "/reports/low-stock",
+    "/reports/sales-summary",
+    "/reports/purchase-summary",
+    "/reports/total-stock-value",
+]
+
+
+def reset(rows: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        seed_catalog(db, products=rows, orders=rows, lines_per_order=3)
+        db.query(models.Order).filter(models.Order.id % 2 == 0).update({models.Order.status: "Shipment started"})
+        db.add(models.Supplier(id=1, name="Supplier 1", contact="9000000000", address="Dock"))
+        db.bulk_insert_mappings(models.PurchaseOrder, [
+            {"id": po, "supplier_id": 1, "status": "received"} for po in range(1, rows + 1)
+        ])
+        db.bulk_insert_mappings(models.PurchaseOrderItem, [
+            {"order_id": po, "product_id": n % rows + 1, "quantity": 5, "unit_cost": 2.0, "received_quantity": 5}
+            for po in range(1, rows + 1) for n in range(rows if po == 1 else 3)
+        ])
+        db.add(models.User(name="qc", email="qc@example.com", password_hash=hash_password("qc"),
+                           role=models.UserRole.admin))
+        db.commit()
+    token_cache.clear()
+    user_cache.clear()
+    catalog_cache.clear()
+    response_cache.clear()  # the reseed bypasses the session events that version responses
+
+
+def measure(rows: int) -> dict:
+    reset(rows)
+    client = TestClient(main.app)
+    token = client.post("/auth/login", json={"username_or_email": "qc", "password": "qc"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    client.get("/users/me")  # warm the auth cache so it does not skew the first endpoint
+
+    counts = {}
+    for path in ENDPOINTS:
+        with QueryCounter(engine) as counter:
+            response = client.get(path)
+        if response.status_code >= 400:
+            raise SystemExit(f"{path} returned {response.status_code}: {response.text}")
+        counts[path] = counter.count
+    return counts
+
+
+def main_():
+    small, large = measure(SMALL), measure(LARGE)
+    failures = []
+    print(f"{'endpoint':<45} {SMALL:>6} {LARGE:>6}")
+    for path in ENDPOINTS:
+        flag = "" if small[path] == large[path] else "  <-- grows with rows"
+        print(f"{path:<45} {small[path]:>6} {large[path]:>6}{flag}")
+        if flag:
+            failures.append(path)
+    engine.dispose()
+    os.remove(_db_file)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,48 @@
+"""Query count and latency of the /reports services versus catalog size.
+
+    python -m benchmarks.report_queries --sizes 1000 10000 50000
+"""
+import argparse
+
+from benchmarks.common import make_session_factory, seed_catalog, QueryCounter, timed
+from services import analysis_service, rollup_service
+
+REPORTS = {
+    "inventory_summary": lambda db: analysis_service.inventory_summary(db),
+    "low_stock": lambda db: analysis_service.low_stock(db, threshold=10),
+    "sales_summary": lambda db: analysis_service.sales_summary(db, limit=50),
+    "purchase_summary": lambda db: analysis_service.purchase_summary(db, only_received=True, limit=50),
+    "total_stock_value": lambda db: analysis_service.total_stock_value(db),
+}
+
+
+def run(size: int, url: str):
+    engine, SessionLocal = make_session_factory(url)
+    with SessionLocal() as db:
+        seed_catalog(db, products=size, orders=size // 2, suppliers=max(size // 100, 1))
+        rollup_service.rebuild_rollups(db)
+
+    results = []
+    for name, report in REPORTS.items():
+        latency = {}
+        with SessionLocal() as db, QueryCounter(engine) as counter, timed(latency, name):
+            report(db)
+        results.append((name, counter.count, latency[name]))
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--url", default="sqlite://", help="database to benchmark against (dropped and recreated)")
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'report':<20} {'queries':>8} {'ms':>10}")
+    for size in args.sizes:
+        for name, queries, ms in run(size, args.url):
+            print(f"{size:>10} {name:<20} {queries:>8} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Point-in-time stock from the movement ledger, with and without snapshots.
+
+    python -m benchmarks.stock_as_of --products 1000 --movements 200 --days 30
+
+Seeds `movements` ledger rows per product spread over `days`, then times
+stock_as_of() for all products and for one product, first from raw movements
+only and again after daily snapshots were taken. Exits with status 1 if the two
+ever disagree.
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import make_session_factory, seed_catalog, timed
+from models import models
+from services import stock_ledger_service
+
+
+def seed(SessionLocal, products: int, movements: int, days: int, start: datetime):
+    rng = random.Random(18)
+    span = days * 86400
+    with SessionLocal() as db:
+        seed_catalog(db, products=products)
+        rows = []
+        for pid in range(1, products + 1):
+            for _ in range(movements):
+                rows.append({
+                    "product_id": pid,
+                    "movement_type": "order",
+                    "delta": rng.choice((-3, -2, -1, 1, 2, 5)),
+                    "created_at": start + timedelta(seconds=rng.uniform(0, span)),
+                })
+            if len(rows) >= 50_000:
+                db.bulk_insert_mappings(models.StockMovement, rows)
+                rows = []
+        db.bulk_insert_mappings(models.StockMovement, rows)
+        db.commit()
+
+
+def measure(SessionLocal, probes):
+    results = {}
+    answers = {}
+    with SessionLocal() as db:
+        for label, at, product_ids in probes:
+            with timed(results, label):
+                answers[label] = stock_ledger_service.stock_as_of(db, at, product_ids)
+    return results, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_stock_as_of.db",
+                        help="database to benchmark against (dropped and recreated)")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--movements", type=int, default=200, help="ledger rows per product")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=args.days)
+    engine, SessionLocal = make_session_factory(args.url)
+    seed(SessionLocal, args.products, args.movements, args.days, start)
+
+    probes = [
+        ("all products, now", end, None),
+        ("all products, mid-period", start + timedelta(days=args.days / 2, hours=7), None),
+        ("one product, now", end, [args.products // 2]),
+        ("one product, mid-period", start + timedelta(days=args.days / 2, hours=7), [args.products // 2]),
+    ]
+    before, expected = measure(SessionLocal, probes)
+
+    with SessionLocal() as db:
+        for day in range(1, args.days + 1):
+            stock_ledger_service.take_snapshots(db, as_of=start + timedelta(days=day))
+        snapshots = db.query(models.StockSnapshot).count()
+    after, answers = measure(SessionLocal, probes)
+    engine.dispose()
+
+    print(f"{args.products * args.movements} movements, {snapshots} snapshots")
+    print(f"{'query':<28} {'ledger only ms':>15} {'with snapshots ms':>18}")
+    for label, _, _ in probes:
+        print(f"{label:<28} {before[label]:>15.1f} {after[label]:>18.1f}")
+
+    mismatched = [label for label, _, _ in probes if answers[label] != expected[label]]
+    for label in mismatched:
+        print("FAIL", label, "differs once snapshots are used")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Stock write throughput: orders, stock adjustments and PO receipts per second,
+and how many statements / write statements each one costs.
+
+    python -m benchmarks.stock_writes --url sqlite:////tmp/wms_stock_writes.db --ops 2000
+
+Run it on two revisions to compare them; the statement counts show where the
+write volume goes independently of the machine.
+"""
+import argparse
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import make_session_factory, seed_catalog
+from models import models
+from schemas.order_schema import OrderCreate
+from services import order_service, product_service, supplier_service
+
+PRODUCTS = 200
+
+
+class WriteCounter:
+    """Counts statements and DML statements run on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = self.writes = 0
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb in ("INSERT", "UPDATE", "DELETE"):
+            self.writes += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._after)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "after_cursor_execute", self._after)
+
+
+def seed(SessionLocal):
+    with SessionLocal() as db:
+        seed_catalog(db, products=PRODUCTS)
+        db.query(models.Inventory).update({models.Inventory.quantity: 1_000_000})
+        customer = models.Customer(name="Writes", phone="9000000004", address="Dock 4")
+        supplier = models.Supplier(name="Writes", contact="9000000004", address="Dock 4")
+        db.add_all([customer, supplier])
+        db.commit()
+        return customer.id, supplier.id
+
+
+# Each bench_* does its setup and returns the timed part as a callable.
+def bench_orders(SessionLocal, customer_id, supplier_id, ops):
+    orders = [
+        OrderCreate(customer_id=customer_id, items=[
+            {"product_id": (n * 7 + k) % PRODUCTS + 1, "quantity": 1} for k in range(3)
+        ])
+        for n in range(ops)
+    ]
+
+    def run():
+        for order in orders:
+            with SessionLocal() as db:
+                order_service.create_order(db, order)
+    return run
+
+
+def bench_adjustments(SessionLocal, customer_id, supplier_id, ops):
+    def run():
+        for n in range(ops):
+            with SessionLocal() as db:
+                # +1 on every product, then -1 on every product, and so on
+                product_service.adjust_stock(db, n % PRODUCTS + 1, 1 if (n // PRODUCTS) % 2 == 0 else -1)
+    return run
+
+
+def bench_receipts(SessionLocal, customer_id, supplier_id, ops):
+    with SessionLocal() as db:
+        pos = []
+        for n in range(ops):
+            po = models.PurchaseOrder(supplier_id=supplier_id, status="pending")
+            po.items = [
+                models.PurchaseOrderItem(product_id=(n + k) % PRODUCTS + 1, quantity=5, unit_cost=1.0, received_quantity=0)
+                for k in range(3)
+            ]
+            pos.append(po)
+        db.add_all(pos)
+        db.commit()
+        receipts = [(po.id, [item.product_id for item in po.items]) for po in pos]
+
+    class Received:
+        def __init__(self, product_id):
+            self.product_id = product_id
+            self.received_quantity = 5
+            self.location_id = None
+
+    def run():
+        for order_id, product_ids in receipts:
+            with SessionLocal() as db:
+                supplier_service.mark_order_received(db, order_id, [Received(pid) for pid in product_ids])
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/wms_stock_writes.db",
+                        help="database to benchmark against (dropped and recreated)")
+    parser.add_argument("--ops", type=int, default=1000, help="operations per workload")
+    args = parser.parse_args()
+
+    print(f"{'workload':<14} {'ops/s':>8} {'stmts/op':>9} {'writes/op':>10}")
+    for name, bench in (
+        ("orders", bench_orders),
+        ("adjustments", bench_adjustments),
+        ("receipts", bench_receipts),
+    ):
+        engine, SessionLocal = make_session_factory(args.url)
+        run = bench(SessionLocal, *seed(SessionLocal), args.ops)
+        with WriteCounter(engine) as counter:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        engine.dispose()
+        ops = args.ops
+        print(f"{name:<14} {ops / elapsed:>8.0f} {counter.statements / ops:>9.1f} {counter.writes / ops:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
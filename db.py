@@ -1,19 +1,89 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
+from utils.pool_metrics import PoolStats, instrumented_pool_class, attach_pool_listeners
+from utils.request_metrics import attach_statement_listeners
+from utils.slow_query_log import attach_slow_query_log
 import os
 
 load_dotenv()
 DATABASE_URL = os.getenv("DB_URL")
+# DB_ASYNC=true serves requests from an AsyncSession instead of the sync threadpool.
+ASYNC_DB = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
 
-engine = create_engine(DATABASE_URL)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def pool_options(url: str, stats: PoolStats, async_engine: bool = False) -> dict:
+    """Pool settings from DB_POOL_* env vars; unset values keep SQLAlchemy's defaults."""
+    options = {"pool_pre_ping": _env_flag("DB_POOL_PRE_PING")}
+    if os.getenv("DB_POOL_RECYCLE"):
+        options["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE"))
+
+    # In-memory SQLite keeps its single-connection pool; everything else gets a
+    # QueuePool that records checkout waits, overflow and timeouts.
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options["poolclass"] = instrumented_pool_class(stats, async_engine)
+    for env_name, option in (
+        ("DB_POOL_SIZE", "pool_size"),
+        ("DB_MAX_OVERFLOW", "max_overflow"),
+        ("DB_POOL_TIMEOUT", "pool_timeout"),
+    ):
+        if os.getenv(env_name):
+            options[option] = int(os.getenv(env_name))
+    return options
+
+pool_stats = PoolStats()
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, pool_stats))
+attach_pool_listeners(engine, pool_stats)
+attach_statement_listeners(engine)
+attach_slow_query_log(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+async_engine = None
+AsyncSessionLocal = None
+async_pool_stats = PoolStats()
+if ASYNC_DB:
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DB_URL") or to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, async_pool_stats, async_engine=True)
+    )
+    attach_pool_listeners(async_engine.sync_engine, async_pool_stats)
+    attach_statement_listeners(async_engine.sync_engine)
+    attach_slow_query_log(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_engine)
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if ASYNC_DB else get_sync_db
+
+def pool_status() -> dict:
+    status = {"sync": pool_stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        status["async"] = async_pool_stats.snapshot(async_engine.sync_engine.pool)
+    return status
@@ -1,10 +1,34 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from db import Base, engine
+from db import engine
 from app import route
+import migrations
+from utils.cache import caches
+from utils import job_worker, password_hasher
+from utils.response_cache import ResponseCacheMiddleware
+from utils.request_metrics import RequestMetricsMiddleware
 
-Base.metadata.create_all(bind=engine)
+# Schema changes ship as versioned migrations (see migrations/). Deployments that
+# run `python manage.py migrate` before starting workers can set DB_AUTO_MIGRATE=false.
+if os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes"):
+    migrations.upgrade(engine)
 
-app = FastAPI(title="Sales & Order Management Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # other workers publish cache invalidations; listen for them while serving
+    caches.start_listener()
+    # background jobs submitted through /jobs (see utils/job_worker.py)
+    job_worker.start_threads()
+    yield
+    job_worker.stop_threads()
+    password_hasher.shutdown_pool()
+    caches.stop_listener()
+
+app = FastAPI(title="Sales & Order Management Service", lifespan=lifespan)
+app.add_middleware(ResponseCacheMiddleware)
+# outermost, so responses served from the response cache are measured too
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(route.router)
 
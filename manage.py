@@ -0,0 +1,71 @@
+import argparse
+from db import engine, SessionLocal
+import migrations
+import models.models  # noqa: F401  (register tables on Base.metadata)
+
+
+def migrate(args):
+    if args.status:
+        for version, description, applied_at in migrations.status(engine):
+            state = applied_at.isoformat() if applied_at else "pending"
+            print(f"{version}  {description:<50} {state}")
+        return
+    applied = migrations.upgrade(engine, target=args.to)
+    print(f"Applied {', '.join(applied)}" if applied else "Database is up to date")
+
+
+def rebuild_rollups(args):
+    from services.rollup_service import rebuild_rollups as rebuild
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        counts = rebuild(db)
+    finally:
+        db.close()
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+def snapshot_stock(args):
+    from services.stock_ledger_service import take_snapshots
+    db = SessionLocal()
+    try:
+        written = take_snapshots(db)
+    finally:
+        db.close()
+    print(f"stock_snapshots: {written} rows written")
+
+
+def worker(args):
+    from utils import job_worker
+    job_worker.run_processes(args.processes, burst=args.burst)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WMS maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser("migrate", help="Apply pending schema migrations")
+    migrate_cmd.add_argument("--to", metavar="VERSION", help="stop after this version")
+    migrate_cmd.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    migrate_cmd.set_defaults(func=migrate)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute the report rollup tables from scratch")
+    rebuild.set_defaults(func=rebuild_rollups)
+
+    snapshot = commands.add_parser(
+        "snapshot-stock", help="Snapshot stock per product (run periodically, e.g. from cron)"
+    )
+    snapshot.set_defaults(func=snapshot_stock)
+
+    worker_cmd = commands.add_parser("worker", help="Run background job workers (see /jobs)")
+    worker_cmd.add_argument("--processes", type=int, default=1, help="number of worker processes")
+    worker_cmd.add_argument("--burst", action="store_true", help="exit once the queue is empty")
+    worker_cmd.set_defaults(func=worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Versioned schema migrations.
+
+Each module in migrations/versions is named `<version>_<name>.py` (e.g.
+`0002_hot_lookup_indexes.py`) and defines a `description` string and an
+`upgrade(conn)` function. Applied versions are recorded in the
+`schema_migrations` table; `upgrade()` runs the pending ones in version order,
+each in its own transaction.
+"""
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, MetaData, String, Table, insert, select, text
+
+from migrations import versions as _versions_pkg
+
+# Any constant works; it only has to be the same for every worker.
+PG_ADVISORY_LOCK_KEY = 7_301_016
+
+version_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def discover() -> list:
+    """All migration modules, oldest first."""
+    modules = []
+    for info in pkgutil.iter_modules(_versions_pkg.__path__):
+        version, _, _ = info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{_versions_pkg.__name__}.{info.name}")
+        module.version = version
+        modules.append(module)
+    modules.sort(key=lambda m: m.version)
+    versions = [m.version for m in modules]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {versions}")
+    return modules
+
+
+def applied_versions(conn) -> dict:
+    version_table.create(conn, checkfirst=True)
+    return {row.version: row.applied_at for row in conn.execute(select(version_table))}
+
+
+def status(engine) -> list:
+    """(version, description, applied_at or None) for every known migration."""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+        conn.commit()
+    return [(m.version, m.description, applied.get(m.version)) for m in discover()]
+
+
+def upgrade(engine, target: str = None) -> list:
+    """Apply pending migrations up to `target` (default: all). Returns the versions applied."""
+    done = []
+    with engine.connect() as conn:
+        # Several workers may start at once; on PostgreSQL only one migrates at a time.
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PG_ADVISORY_LOCK_KEY})
+            conn.commit()
+        try:
+            applied = applied_versions(conn)
+            conn.commit()
+            for migration in discover():
+                if target is not None and migration.version > target:
+                    break
+                if migration.version in applied:
+                    continue
+                with conn.begin():
+                    migration.upgrade(conn)
+                    conn.execute(insert(version_table).values(
+                        version=migration.version,
+                        description=migration.description,
+                        applied_at=datetime.now(timezone.utc),
+                    ))
+                done.append(migration.version)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PG_ADVISORY_LOCK_KEY})
+                conn.commit()
+    return done
@@ -0,0 +1,129 @@
+"""Schema as it stood before versioned migrations (previously made by create_all).
+
+The tables are spelled out here rather than taken from models.models, so this
+migration keeps creating the same schema however the models change later.
+Databases that already have these tables are left untouched.
+"""
+from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, MetaData, String, Table, func
+
+description = "baseline schema"
+
+metadata = MetaData()
+
+
+Table(
+    "categories", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+)
+
+Table(
+    "customers", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("phone", String, unique=True),
+    Column("address", String),
+)
+
+Table(
+    "products", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("sku", String, unique=True, nullable=False),
+    Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
+    Column("unit_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("location_id", Integer, nullable=True),
+    Column("created_at", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("customer_id", Integer, ForeignKey("customers.id")),
+    Column("status", String),
+    Column("total_amount", Float),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id")),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("price", Float, nullable=False),
+)
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+    Column("email", String, unique=True, nullable=False, index=True),
+    Column("password_hash", String, nullable=False),
+    Column("role", Enum("admin", "manager", "staff", name="userrole")),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "suppliers", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("contact", String(10), nullable=False),
+    Column("address", String, nullable=False),
+)
+
+Table(
+    "purchase_orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("supplier_id", Integer, ForeignKey("suppliers.id")),
+    Column("status", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "purchase_order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("purchase_orders.id")),
+    Column("product_id", Integer, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("unit_cost", Float, nullable=False),
+    Column("received_quantity", Integer),
+)
+
+Table(
+    "inventory", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, nullable=False),
+    Column("quantity", Integer),
+    Column("last_updated", DateTime),
+)
+
+Table(
+    "product_stock_rollups", metadata,
+    Column("product_id", Integer, ForeignKey("products.id"), primary_key=True),
+    Column("available_quantity", Integer, nullable=False),
+    Column("unit_price", Float, nullable=False),
+    Column("stock_value", Float, nullable=False),
+)
+
+Table(
+    "product_sales_rollups", metadata,
+    Column("product_id", Integer, ForeignKey("products.id"), primary_key=True),
+    Column("total_sold", Integer, nullable=False),
+    Column("total_revenue", Float, nullable=False, index=True),
+)
+
+Table(
+    "supplier_purchase_rollups", metadata,
+    Column("supplier_id", Integer, ForeignKey("suppliers.id"), primary_key=True),
+    Column("total_ordered_quantity", Integer, nullable=False),
+    Column("total_received_quantity", Integer, nullable=False),
+    Column("total_received_value", Float, nullable=False, index=True),
+    Column("purchase_orders_count", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,37 @@
+"""Indexes on the columns every order, receipt and report filters or joins on,
+and one inventory row per product."""
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, text
+
+description = "hot lookup indexes, unique inventory.product_id"
+
+metadata = MetaData()
+inventory = Table("inventory", metadata, Column("id", Integer), Column("product_id", Integer))
+order_items = Table("order_items", metadata, Column("order_id", Integer), Column("product_id", Integer))
+orders = Table("orders", metadata, Column("status", String))
+purchase_orders = Table("purchase_orders", metadata, Column("supplier_id", Integer), Column("status", String))
+purchase_order_items = Table("purchase_order_items", metadata, Column("order_id", Integer), Column("product_id", Integer))
+
+INDEXES = [
+    Index("ix_inventory_product_id", inventory.c.product_id, unique=True),
+    Index("ix_order_items_order_id", order_items.c.order_id),
+    Index("ix_order_items_product_id", order_items.c.product_id),
+    Index("ix_orders_status", orders.c.status),
+    Index("ix_purchase_orders_supplier_id", purchase_orders.c.supplier_id),
+    Index("ix_purchase_orders_status", purchase_orders.c.status),
+    Index("ix_purchase_order_items_order_id", purchase_order_items.c.order_id),
+    Index("ix_purchase_order_items_product_id", purchase_order_items.c.product_id),
+]
+
+
+def upgrade(conn):
+    # Duplicate inventory rows must go before the unique index can be built. The
+    # services always lock and update the lowest id, so that row holds the stock.
+    removed = conn.execute(text(
+        "DELETE FROM inventory WHERE id NOT IN "
+        "(SELECT min(id) FROM inventory GROUP BY product_id)"
+    )).rowcount
+    if removed:
+        print(f"Removed {removed} duplicate inventory rows; run `python manage.py rebuild-rollups` afterwards.")
+
+    for index in INDEXES:
+        index.create(conn, checkfirst=True)
@@ -0,0 +1,30 @@
+"""Stock is stored only in inventory: reconcile products.quantity into it, then
+drop the column.
+
+Orders and receipts were validated against, and reports read, the inventory
+row first, so where the two copies disagree the inventory quantity wins.
+Products without an inventory row get one holding their product quantity.
+"""
+from sqlalchemy import text
+
+description = "single stock store: reconcile and drop products.quantity"
+
+
+def upgrade(conn):
+    divergent = conn.execute(text(
+        "SELECT count(*) FROM products p JOIN inventory i ON i.product_id = p.id "
+        "WHERE i.quantity IS NULL OR i.quantity <> p.quantity"
+    )).scalar()
+    created = conn.execute(text(
+        "INSERT INTO inventory (product_id, quantity, last_updated) "
+        "SELECT p.id, p.quantity, CURRENT_TIMESTAMP FROM products p "
+        "WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = p.id)"
+    )).rowcount
+    conn.execute(text("UPDATE inventory SET quantity = 0 WHERE quantity IS NULL"))
+    conn.execute(text("ALTER TABLE products DROP COLUMN quantity"))
+
+    if divergent or created:
+        print(
+            f"Stock reconciled: kept the inventory quantity for {divergent} divergent products, "
+            f"created {created} missing inventory rows; run `python manage.py rebuild-rollups` afterwards."
+        )
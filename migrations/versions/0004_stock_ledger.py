@@ -0,0 +1,48 @@
+"""Append-only stock movement ledger and per-product snapshots.
+
+Every product's current inventory quantity is recorded as an `opening`
+movement, so the ledger sums to the live balance from the start.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, bindparam, text
+
+description = "stock movement ledger and snapshots"
+
+metadata = MetaData()
+Table("products", metadata, Column("id", Integer, primary_key=True))
+Table("orders", metadata, Column("id", Integer, primary_key=True))
+Table("purchase_orders", metadata, Column("id", Integer, primary_key=True))
+
+stock_movements = Table(
+    "stock_movements", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("movement_type", String, nullable=False),
+    Column("delta", Integer, nullable=False),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=True),
+    Column("purchase_order_id", Integer, ForeignKey("purchase_orders.id"), nullable=True),
+    Column("note", String, nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Index("ix_stock_movements_product_id_created_at", "product_id", "created_at"),
+)
+
+stock_snapshots = Table(
+    "stock_snapshots", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("as_of", DateTime(timezone=True), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Index("ix_stock_snapshots_product_id_as_of", "product_id", "as_of", unique=True),
+)
+
+
+def upgrade(conn):
+    stock_movements.create(conn)
+    stock_snapshots.create(conn)
+    conn.execute(
+        text(
+            "INSERT INTO stock_movements (product_id, movement_type, delta, created_at) "
+            "SELECT product_id, 'opening', quantity, :now FROM inventory WHERE quantity <> 0"
+        ).bindparams(bindparam("now", type_=DateTime(timezone=True))),
+        {"now": datetime.now(timezone.utc)},
+    )
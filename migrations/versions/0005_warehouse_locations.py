@@ -0,0 +1,76 @@
+"""Warehouse locations: inventory holds one row per product and location, and
+orders record which locations their stock was taken from.
+
+Every value already used in products.location_id becomes a location with that
+id, and a `MAIN` location is added for everything else. Each product's existing
+inventory row moves to its location (MAIN if it had none), and products without
+a location get MAIN as their home location. Recorded stock movements are
+attributed to the same location as their product's stock.
+"""
+from sqlalchemy import Column, Float, ForeignKey, Integer, MetaData, String, Table, insert, text
+
+description = "warehouse locations: per-location inventory and order allocations"
+
+DEFAULT_LOCATION_CODE = "MAIN"
+
+metadata = MetaData()
+Table("products", metadata, Column("id", Integer, primary_key=True))
+Table("orders", metadata, Column("id", Integer, primary_key=True))
+
+locations = Table(
+    "locations", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("code", String, unique=True, nullable=False),
+    Column("name", String, nullable=False),
+    Column("latitude", Float, nullable=True),
+    Column("longitude", Float, nullable=True),
+)
+
+order_allocations = Table(
+    "order_allocations", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False, index=True),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("location_id", Integer, ForeignKey("locations.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    postgres = conn.dialect.name == "postgresql"
+    locations.create(conn)
+
+    used = list(conn.execute(text(
+        "SELECT DISTINCT location_id FROM products WHERE location_id IS NOT NULL ORDER BY location_id"
+    )).scalars())
+    if used:
+        conn.execute(insert(locations), [
+            {"id": location_id, "code": f"LOC-{location_id}", "name": f"Location {location_id}"}
+            for location_id in used
+        ])
+    main_id = max(used, default=0) + 1
+    conn.execute(insert(locations).values(id=main_id, code=DEFAULT_LOCATION_CODE, name="Main warehouse"))
+    if postgres:
+        conn.execute(text("SELECT setval(pg_get_serial_sequence('locations', 'id'), :id)"), {"id": main_id})
+    conn.execute(text("UPDATE products SET location_id = :main WHERE location_id IS NULL"), {"main": main_id})
+
+    conn.execute(text("ALTER TABLE inventory ADD COLUMN location_id INTEGER REFERENCES locations (id)"))
+    conn.execute(text(
+        "UPDATE inventory SET location_id = COALESCE("
+        "(SELECT p.location_id FROM products p WHERE p.id = inventory.product_id), :main)"
+    ), {"main": main_id})
+    if postgres:
+        conn.execute(text("ALTER TABLE inventory ALTER COLUMN location_id SET NOT NULL"))
+    conn.execute(text("DROP INDEX ix_inventory_product_id"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX ix_inventory_product_id_location_id ON inventory (product_id, location_id)"
+    ))
+    conn.execute(text("CREATE INDEX ix_inventory_location_id ON inventory (location_id)"))
+
+    # Until now every product had one inventory row, so its past movements all happened there
+    conn.execute(text("ALTER TABLE stock_movements ADD COLUMN location_id INTEGER REFERENCES locations (id)"))
+    conn.execute(text(
+        "UPDATE stock_movements SET location_id = COALESCE("
+        "(SELECT p.location_id FROM products p WHERE p.id = stock_movements.product_id), :main)"
+    ), {"main": main_id})
+    order_allocations.create(conn)
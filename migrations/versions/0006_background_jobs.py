@@ -0,0 +1,27 @@
+"""Background job queue: one row per submitted job, claimed by workers."""
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+
+description = "background job queue"
+
+metadata = MetaData()
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+jobs = Table(
+    "jobs", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("kind", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("params", JSON, nullable=False),
+    Column("result", JSON, nullable=True),
+    Column("error", String, nullable=True),
+    Column("attempts", Integer, nullable=False),
+    Column("created_by", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("started_at", DateTime(timezone=True), nullable=True),
+    Column("finished_at", DateTime(timezone=True), nullable=True),
+    Index("ix_jobs_status_id", "status", "id"),
+)
+
+
+def upgrade(conn):
+    jobs.create(conn)
@@ -0,0 +1,10 @@
+"""Job heartbeats: running jobs are requeued when their worker stops beating, not after a fixed time."""
+from sqlalchemy import text
+
+description = "job heartbeat"
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at TIMESTAMP WITH TIME ZONE"
+                      if conn.dialect.name == "postgresql" else "ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME"))
+    conn.execute(text("UPDATE jobs SET heartbeat_at = started_at WHERE status = 'running'"))
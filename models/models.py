@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey,Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey,Enum, Index, JSON, select
+from sqlalchemy.orm import relationship, column_property
 from datetime import datetime, timezone
 from db import Base
 from sqlalchemy.sql import func
@@ -36,8 +36,7 @@ class Product(Base):
     sku = Column(String, unique=True, nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     unit_price = Column(Float, nullable=False)
-    quantity = Column(Integer, nullable=False)
-    location_id = Column(Integer, nullable=True)  # Optional warehouse location
+    location_id = Column(Integer, nullable=True)  # Home location: where stock is received/adjusted by default
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime(timezone=True),
@@ -55,7 +54,7 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"))
-    status = Column(String, default="Pending")
+    status = Column(String, default="Pending", index=True)
     total_amount = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
@@ -68,8 +67,8 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
 
@@ -108,8 +107,8 @@ class PurchaseOrder(Base):
     __tablename__ = "purchase_orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    supplier_id = Column(Integer, ForeignKey("suppliers.id"))
-    status = Column(String, default="pending")  
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), index=True)
+    status = Column(String, default="pending", index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(IST))
 
     supplier = relationship("Supplier", back_populates="purchase_orders")
@@ -120,18 +119,134 @@ class PurchaseOrderItem(Base):
     __tablename__ = "purchase_order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("purchase_orders.id"))
-    product_id = Column(Integer, nullable=False)
+    order_id = Column(Integer, ForeignKey("purchase_orders.id"), index=True)
+    product_id = Column(Integer, nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     unit_cost = Column(Float, nullable=False)
     received_quantity = Column(Integer, default=0)  
 
     order = relationship("PurchaseOrder", back_populates="items")
 
+# ----------------- Warehouse Locations ----------------- #
+class Location(Base):
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String, unique=True, nullable=False)
+    name = Column(String, nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
+
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (Index("ix_inventory_product_id_location_id", "product_id", "location_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     quantity = Column(Integer, default=0)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Stock is stored once, in inventory (one row per product and location);
+# Product.quantity is a read-only view of the total. Changes go through
+# services.inventory_service.
+Product.quantity = column_property(
+    func.coalesce(
+        select(func.sum(Inventory.quantity))
+        .where(Inventory.product_id == Product.id)
+        .correlate_except(Inventory)
+        .scalar_subquery(),
+        0,
+    )
+)
+
+
+# Where an order's stock was taken from: one row per product and location.
+class OrderAllocation(Base):
+    __tablename__ = "order_allocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+# ----------------- Report Rollups ----------------- #
+# Kept up to date by the services that move stock, so reports read one row per
+# product/supplier instead of rescanning inventory and order history.
+class ProductStockRollup(Base):
+    __tablename__ = "product_stock_rollups"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    available_quantity = Column(Integer, nullable=False, default=0)
+    unit_price = Column(Float, nullable=False, default=0.0)
+    stock_value = Column(Float, nullable=False, default=0.0)
+
+
+class ProductSalesRollup(Base):
+    __tablename__ = "product_sales_rollups"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    total_sold = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Float, nullable=False, default=0.0, index=True)
+
+
+class SupplierPurchaseRollup(Base):
+    __tablename__ = "supplier_purchase_rollups"
+
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), primary_key=True)
+    total_ordered_quantity = Column(Integer, nullable=False, default=0)
+    total_received_quantity = Column(Integer, nullable=False, default=0)
+    total_received_value = Column(Float, nullable=False, default=0.0, index=True)
+    purchase_orders_count = Column(Integer, nullable=False, default=0)
+
+
+# ----------------- Stock Ledger ----------------- #
+# Append-only history of every stock change. inventory.quantity stays the live
+# balance that reservations are checked against; the ledger says how it got there.
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    __table_args__ = (Index("ix_stock_movements_product_id_created_at", "product_id", "created_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    movement_type = Column(String, nullable=False)  # opening, initial, order, receipt, adjustment
+    delta = Column(Integer, nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    purchase_order_id = Column(Integer, ForeignKey("purchase_orders.id"), nullable=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (Index("ix_stock_snapshots_product_id_as_of", "product_id", "as_of", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+
+# ----------------- Background Jobs ----------------- #
+# Work too slow to run inside a request (bulk status updates, rollup rebuilds,
+# exports) is queued here and picked up by utils.job_worker.
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_id", "status", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    params = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # refreshed by the worker while it runs
+    finished_at = Column(DateTime(timezone=True), nullable=True)
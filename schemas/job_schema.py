@@ -0,0 +1,70 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from utils.export import ExportFormat
+
+
+class JobKind(str, Enum):
+    ship_orders = "ship_orders"
+    update_order_status = "update_order_status"
+    rebuild_rollups = "rebuild_rollups"
+    snapshot_stock = "snapshot_stock"
+    export_inventory_summary = "export_inventory_summary"
+    export_sales_summary = "export_sales_summary"
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+# ----------------- Parameters per job kind ----------------- #
+class NoParams(BaseModel):
+    pass
+
+
+class ShipOrdersParams(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, example=[1, 2, 3])
+
+
+class OrderStatusParams(ShipOrdersParams):
+    status: str = Field(..., example="Delivered")
+
+    @field_validator("status")
+    def not_blank(cls, v: str) -> str:
+        if not v or not v.strip():
+            raise ValueError("Status is required")
+        return v.strip()
+
+
+class ExportParams(BaseModel):
+    format: ExportFormat = ExportFormat.csv
+
+
+class SalesExportParams(ExportParams):
+    limit: Optional[int] = Field(None, gt=0)
+
+
+# ----------------- Jobs ----------------- #
+class JobCreate(BaseModel):
+    kind: JobKind
+    params: Dict[str, Any] = Field(default_factory=dict, example={"order_ids": [1, 2, 3]})
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: JobKind
+    status: JobStatus
+    params: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
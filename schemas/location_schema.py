@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional
+
+
+class LocationCreate(BaseModel):
+    code: str = Field(..., example="BLR-1")
+    name: str = Field(..., example="Bengaluru DC")
+    latitude: Optional[float] = Field(None, example=12.97)
+    longitude: Optional[float] = Field(None, example=77.59)
+
+    @field_validator("code", "name")
+    def not_blank(cls, v: str) -> str:
+        if not v or not v.strip():
+            raise ValueError("Location code and name are required")
+        return v.strip()
+
+    @field_validator("latitude")
+    def latitude_in_range(cls, v: Optional[float]) -> Optional[float]:
+        if v is not None and not -90 <= v <= 90:
+            raise ValueError("Latitude must be between -90 and 90")
+        return v
+
+    @field_validator("longitude")
+    def longitude_in_range(cls, v: Optional[float]) -> Optional[float]:
+        if v is not None and not -180 <= v <= 180:
+            raise ValueError("Longitude must be between -180 and 180")
+        return v
+
+
+class LocationOut(BaseModel):
+    id: int
+    code: str
+    name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    class Config:
+        from_attributes = True
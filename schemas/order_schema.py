@@ -8,6 +8,8 @@ class OrderBase(BaseModel):
 
 class OrderCreate(OrderBase):
     items: List[OrderItemCreate]
+    # Ship from as near this location as possible (default: from the fewest, best-stocked locations)
+    preferred_location_id: Optional[int] = None
 
 class OrderResponse(BaseModel):
     id: int
@@ -20,5 +22,13 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderAllocationOut(BaseModel):
+    product_id: int
+    location_id: int
+    quantity: int
+
+    class Config:
+        from_attributes = True
+
 class UpdateOrderStatus(BaseModel):
     status: str
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 import re
 
@@ -28,6 +28,7 @@ class ProductBase(BaseModel):
     sku: str = Field(..., example="BAT-001")
     category_id: Optional[int] = None
     unit_price: float = Field(..., example=100.0)
+    location_id: Optional[int] = Field(None, description="Home location; the default location if omitted")
 
     @field_validator("unit_price")
     def unit_price_must_be_positive(cls, v: float) -> float:
@@ -56,6 +57,7 @@ class ProductUpdate(BaseModel):
     category_id: Optional[int] = None
     unit_price: Optional[float] = None
     quantity: Optional[int] = None
+    location_id: Optional[int] = None
 
     @field_validator("unit_price")
     def unit_price_positive(cls, v: Optional[float]) -> Optional[float]:
@@ -87,9 +89,22 @@ class Product(ProductBase):
 class StockAdjustment(BaseModel):
     adjustment: int = Field(..., example=-5)
     reason: Optional[str] = Field(None, example="damaged item")
+    location_id: Optional[int] = Field(None, description="Location to adjust; the product's home location if omitted")
 
     @field_validator("adjustment")
     def adjustment_nonzero(cls, v: int) -> int:
         if v == 0:
             raise ValueError("Adjustment cannot be 0")
         return v
+
+# ---------------- BULK IMPORT ----------------
+class ProductImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    errors: List[str]
+
+class ProductImportResult(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
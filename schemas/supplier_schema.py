@@ -104,15 +104,45 @@ class PurchaseOrderOut(BaseModel):
 class ReceivedItem(BaseModel):
     product_id: int
     received_quantity: int
+    location_id: Optional[int] = None  # the product's home location if omitted
 
 
 class ReceiveOrder(BaseModel):
     received_items: List[ReceivedItem]
 
 
+class PurchaseOrderReceipt(ReceiveOrder):
+    order_id: int
+
+
+class BatchReceiveOrders(BaseModel):
+    receipts: List[PurchaseOrderReceipt]
+
+
+class ReceiptResult(BaseModel):
+    order_id: int
+    status: str
+    updated_items: int
+
+
+class BatchReceiveResult(BaseModel):
+    orders: List[ReceiptResult]
+    updated_items: int
+
+
+class InventoryLevel(BaseModel):
+    product_id: int
+    location_id: int
+    quantity: int
+
+    class Config:
+        from_attributes = True
+
+
 class InventoryOut(BaseModel):
     id: int
     product_id: int
+    location_id: int
     quantity: int
     last_updated: Optional[datetime] = None
 
@@ -124,4 +154,24 @@ class InventoryOut(BaseModel):
         if not last_updated:
             return None
         ist_time = last_updated.astimezone(IST)
-        return ist_time.strftime("%d-%b-%Y %I:%M:%S %p IST")
\ No newline at end of file
+        return ist_time.strftime("%d-%b-%Y %I:%M:%S %p IST")
+
+class StockMovementOut(BaseModel):
+    id: int
+    product_id: int
+    movement_type: str
+    delta: int
+    order_id: Optional[int] = None
+    purchase_order_id: Optional[int] = None
+    location_id: Optional[int] = None
+    note: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockLevelAsOf(BaseModel):
+    product_id: int
+    quantity: int
+    as_of: datetime
@@ -0,0 +1,196 @@
+import math
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from models import models
+from services import inventory_service
+from utils.cache import caches
+
+# Orders are allocated against an index of available stock per product and
+# location kept in this process, so picking locations for a many-line order does
+# not read every location row of every product. The index is only a hint: the
+# chosen inventory rows are re-read (with the products locked) before stock is
+# taken, and a product whose hint was wrong or short is reloaded from the
+# database and planned again. Writers update their own index after commit and
+# invalidate the other workers' entries (see utils.cache.CacheRegistry); the TTL
+# bounds staleness if a message is lost.
+STOCK_INDEX_TTL_SECONDS = float(os.getenv("STOCK_INDEX_TTL_SECONDS", "60"))
+STOCK_INDEX_SIZE = int(os.getenv("STOCK_INDEX_SIZE", "100000"))
+
+STOCK_INDEX, LOCATIONS = "inventory.stock_index", "inventory.locations"
+stock_index = caches.cache(STOCK_INDEX, STOCK_INDEX_SIZE, STOCK_INDEX_TTL_SECONDS, local=True)  # product id -> {location id: qty}
+location_cache = caches.cache(LOCATIONS, 1, STOCK_INDEX_TTL_SECONDS, local=True)                # ALL -> {location id: (lat, lon)}
+
+ALL_LOCATIONS = "__all__"
+
+Allocation = Dict[int, List[Tuple[int, int]]]  # product id -> [(location id, quantity), ...]
+
+
+# ----------------- Stock index ----------------- #
+def _load_stock(db: Session, product_ids: List[int]) -> Dict[int, Dict[int, int]]:
+    inventory = models.Inventory
+    stock = {pid: {} for pid in product_ids}
+    for pid, location_id, quantity in db.execute(
+        select(inventory.product_id, inventory.location_id, inventory.quantity)
+        .where(inventory.product_id.in_(product_ids))
+        .where(inventory.quantity > 0)
+    ):
+        stock[pid][location_id] = quantity
+    return stock
+
+
+def available_stock(db: Session, product_ids: Iterable[int], refresh: bool = False) -> Dict[int, Dict[int, int]]:
+    """Available quantity per location for each product; misses are loaded in one query."""
+    stock = {}
+    missing = []
+    for pid in product_ids:
+        entry = None if refresh else stock_index.get(pid)
+        if entry is None:
+            missing.append(pid)
+        else:
+            stock[pid] = entry
+    if missing:
+        loaded = _load_stock(db, missing)
+        for pid, entry in loaded.items():
+            stock_index.set(pid, entry)
+        stock.update(loaded)
+    return stock
+
+
+def stock_changed(levels: Dict[inventory_service.StockKey, int]):
+    """Record committed (product, location) quantities here and drop them in other workers."""
+    changed = defaultdict(dict)
+    for (pid, location_id), quantity in levels.items():
+        changed[pid][location_id] = quantity
+    if not changed:
+        return
+    known = {pid: stock_index.get(pid) for pid in changed}
+    caches.invalidate(STOCK_INDEX, list(changed))
+    for pid, quantities in changed.items():
+        if known[pid] is not None:
+            entry = {**known[pid], **quantities}
+            stock_index.set(pid, {loc: qty for loc, qty in entry.items() if qty > 0})
+
+
+def location_points(db: Session) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+    points = location_cache.get(ALL_LOCATIONS)
+    if points is None:
+        points = {
+            row.id: (row.latitude, row.longitude)
+            for row in db.execute(select(models.Location.id, models.Location.latitude, models.Location.longitude))
+        }
+        location_cache.set(ALL_LOCATIONS, points)
+    return points
+
+
+def locations_changed():
+    caches.invalidate(LOCATIONS)
+
+
+def distances_from(points, origin_id: Optional[int]) -> Dict[int, float]:
+    """Great-circle km from `origin_id` to every location; locations without coordinates are farthest."""
+    if origin_id is None or origin_id not in points or None in points[origin_id]:
+        return {}
+    lat1, lon1 = map(math.radians, points[origin_id])
+    distances = {}
+    for location_id, (lat, lon) in points.items():
+        if lat is None or lon is None:
+            distances[location_id] = math.inf
+            continue
+        lat2, lon2 = math.radians(lat), math.radians(lon)
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        distances[location_id] = 12742 * math.asin(math.sqrt(a))
+    return distances
+
+
+# ----------------- Allocation ----------------- #
+def plan_allocation(
+    requested: Dict[int, int],
+    stock: Dict[int, Dict[int, int]],
+    distances: Optional[Dict[int, float]] = None,
+) -> Tuple[Allocation, List[int]]:
+    """Choose the locations to take each product's requested quantity from.
+
+    Lines that some single location can fill are never split. They are covered
+    greedily by the location that can fill the most outstanding lines, then the
+    nearest, then the one holding the most of them, so an order ships from as
+    few locations as possible (one whenever one location can fill it all).
+    Lines no single location can fill take from the largest stocks first, which
+    gives the fewest pieces. Returns the allocation and the products that cannot
+    be filled at all.
+    """
+    distances = distances or {}
+    allocation = {}
+    short = []
+    whole = defaultdict(set)  # location id -> products it can fill on its own
+    for pid, quantity in requested.items():
+        at = stock.get(pid, {})
+        if sum(at.values()) < quantity:
+            short.append(pid)
+            continue
+        fillers = [loc for loc, qty in at.items() if qty >= quantity]
+        if fillers:
+            for loc in fillers:
+                whole[loc].add(pid)
+        else:
+            taken, pieces = 0, []
+            for loc, qty in sorted(at.items(), key=lambda e: (-e[1], distances.get(e[0], 0), e[0])):
+                take = min(qty, quantity - taken)
+                pieces.append((loc, take))
+                taken += take
+                if taken == quantity:
+                    break
+            allocation[pid] = pieces
+
+    # per candidate location: outstanding lines it can fill, and units it holds of them
+    counts = {loc: len(lines) for loc, lines in whole.items()}
+    units = {loc: sum(stock[pid][loc] for pid in lines) for loc, lines in whole.items()}
+    outstanding = {pid for lines in whole.values() for pid in lines}
+    while outstanding:
+        loc = min(counts, key=lambda l: (-counts[l], distances.get(l, 0), -units[l], l))
+        for pid in whole.pop(loc) & outstanding:
+            allocation[pid] = [(loc, requested[pid])]
+            outstanding.discard(pid)
+            for other, qty in stock[pid].items():
+                if other in counts and pid in whole[other]:
+                    counts[other] -= 1
+                    units[other] -= qty
+        del counts[loc]
+        counts = {l: n for l, n in counts.items() if n > 0}
+    return allocation, sorted(short)
+
+
+def allocate(
+    db: Session,
+    products: Dict[int, models.Product],
+    requested: Dict[int, int],
+    origin_location_id: Optional[int] = None,
+) -> Tuple[Allocation, Dict[inventory_service.StockKey, models.Inventory]]:
+    """Plan the allocation of `requested` (products locked) and load the chosen inventory rows.
+
+    Raises 400 if a product does not have enough stock across all locations.
+    """
+    distances = distances_from(location_points(db), origin_location_id)
+    for refresh in (False, True):
+        stock = available_stock(db, requested, refresh=refresh)
+        allocation, short = plan_allocation(requested, stock, distances)
+        if short and not refresh:
+            continue
+        if short:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Not enough stock in inventory for product {products[short[0]].name}"
+            )
+        keys = [(pid, loc) for pid, pieces in allocation.items() for loc, _ in pieces]
+        rows = inventory_service.load_stock(db, keys)
+        stale = [
+            (pid, loc) for pid, pieces in allocation.items() for loc, qty in pieces
+            if (pid, loc) not in rows or rows[(pid, loc)].quantity < qty
+        ]
+        if not stale or refresh:
+            # After a refresh the plan matches the locked rows; the guard in
+            # apply_stock_deltas still catches anything that moved under us.
+            return allocation, rows
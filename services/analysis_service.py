@@ -1,48 +1,120 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func, and_
 from sqlalchemy.exc import SQLAlchemyError
 from models.models import (
     Product, OrderItem, Order, PurchaseOrder, PurchaseOrderItem,
-    Supplier, Inventory
+    Supplier, Inventory, ProductStockRollup, ProductSalesRollup, SupplierPurchaseRollup
 )
 from schemas.analysis_schema import (
     InventorySummaryItem, InventorySummaryOut,
     LowStockItem, SalesSummaryItem, PurchaseSummaryItem
 )
 from fastapi import HTTPException,status
+from typing import Iterator, List, Optional
+
+SALES_STATUSES = ["Shipped", "Delivered", "Shipment started", "received", "Pending", "accepted"]
+EXPORT_BATCH_SIZE = 1000
+
+
+def stock_levels_query():
+    """One row per product with its available quantity (summed over its locations)."""
+    stock = (
+        select(Inventory.product_id, func.sum(Inventory.quantity).label("quantity"))
+        .group_by(Inventory.product_id)
+        .subquery()
+    )
+    return (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.unit_price.label("unit_price"),
+            func.coalesce(stock.c.quantity, 0).label("available_quantity"),
+        )
+        .outerjoin(stock, stock.c.product_id == Product.id)
+    )
+
+
+def sales_summary_query(limit: Optional[int] = 50):
+    """Quantity sold and revenue per product, best sellers first."""
+    total_sold = func.sum(func.coalesce(OrderItem.quantity, 0))
+    total_revenue = func.sum(func.coalesce(OrderItem.quantity, 0) * func.coalesce(OrderItem.price, 0))
+    return (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            total_sold.label("total_sold"),
+            total_revenue.label("total_revenue"),
+        )
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status.in_(SALES_STATUSES))
+        .group_by(Product.id, Product.name)
+        .having(total_sold > 0)
+        .order_by(total_revenue.desc(), Product.id)
+        .limit(limit)
+    )
+
+
+def purchase_summary_query(status_filter: str, limit: Optional[int] = 50):
+    """Ordered/received totals per supplier over purchase orders in the given status."""
+    received_quantity = func.coalesce(PurchaseOrderItem.received_quantity, 0)
+    total_received_value = func.coalesce(
+        func.sum(received_quantity * func.coalesce(PurchaseOrderItem.unit_cost, 0)), 0
+    )
+
+    # Suppliers without matching orders are still listed with zero totals.
+    return (
+        select(
+            Supplier.id.label("supplier_id"),
+            Supplier.name.label("supplier_name"),
+            func.coalesce(func.sum(func.coalesce(PurchaseOrderItem.quantity, 0)), 0).label("total_ordered_quantity"),
+            func.coalesce(func.sum(received_quantity), 0).label("total_received_quantity"),
+            total_received_value.label("total_received_value"),
+            func.count(func.distinct(PurchaseOrder.id)).label("purchase_orders_count"),
+        )
+        .outerjoin(
+            PurchaseOrder,
+            and_(PurchaseOrder.supplier_id == Supplier.id, PurchaseOrder.status == status_filter),
+        )
+        .outerjoin(PurchaseOrderItem, PurchaseOrderItem.order_id == PurchaseOrder.id)
+        .group_by(Supplier.id, Supplier.name)
+        .order_by(total_received_value.desc(), Supplier.id)
+        .limit(limit)
+    )
+
+
 def inventory_summary(db: Session) -> InventorySummaryOut:
     """Return stock details per product and total inventory value."""
     try:
         if db is None:
             raise ValueError("Database session not provided.")
-        products = db.query(Product).all()
-        if not products:
+        rows = db.execute(stock_levels_query().order_by(Product.id)).all()
+        if not rows:
             return InventorySummaryOut(rows=[], total_stock_value=0)
         summary_rows = []
         total_stock_value = 0
- 
-        for p in products:
-            inv = db.query(Inventory).filter(Inventory.product_id == p.id).first()
-            available_quantity = inv.quantity if inv else (p.quantity or 0)
-            total_value = available_quantity * (p.unit_price or 0)
+
+        for row in rows:
+            total_value = row.available_quantity * (row.unit_price or 0)
             total_stock_value += total_value
- 
+
             summary_rows.append(
                 InventorySummaryItem(
-                    product_id=p.id,
-                    product_name=p.name,
-                    available_quantity=available_quantity,
-                    unit_price=p.unit_price,
+                    product_id=row.product_id,
+                    product_name=row.product_name,
+                    available_quantity=row.available_quantity,
+                    unit_price=row.unit_price,
                     total_value=total_value,
                 )
             )
- 
+
         return InventorySummaryOut(rows=summary_rows, total_stock_value=total_stock_value)
- 
+
     except SQLAlchemyError as e:
         print(f"[DB Error - inventory_summary]: {e}")
         return InventorySummaryOut(rows=[], total_stock_value=0)
- 
- 
+
+
 def low_stock(db: Session, threshold: int = 10):
     """Return products whose quantity is below threshold."""
     try:
@@ -51,180 +123,187 @@ def low_stock(db: Session, threshold: int = 10):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Database session not provided."
             )
- 
+
         if threshold < 10:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Minimum threshold value should be 10."
             )
- 
-        products = db.query(Product).all()
-        if not products:
-            return []
- 
-        low_stock_items = []
-        inventories = db.query(Inventory).all()
-        inv_map = {inv.product_id: inv.quantity for inv in inventories}
- 
-        for p in products:
-            qty = inv_map.get(p.id, p.quantity or 0)
- 
-            if qty <= threshold:
-                low_stock_items.append(
-                    LowStockItem(
-                        product_id=p.id,
-                        product_name=p.name,
-                        available_quantity=qty,
-                        threshold=threshold
-                    )
-                )
- 
-        return low_stock_items
- 
+
+        levels = stock_levels_query().subquery()
+        rows = db.execute(
+            select(levels)
+            .where(levels.c.available_quantity <= threshold)
+            .order_by(levels.c.product_id)
+        ).all()
+
+        return [
+            LowStockItem(
+                product_id=row.product_id,
+                product_name=row.product_name,
+                available_quantity=row.available_quantity,
+                threshold=threshold
+            )
+            for row in rows
+        ]
+
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error occurred: {str(e)}"
         )
- 
+
     except HTTPException:
         raise
- 
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(e)}"
         )
- 
- 
+
+
 def sales_summary(db: Session, limit: int = 50):
     """Return total quantity sold and total revenue per product."""
     try:
         if db is None:
             raise ValueError("Database session not provided.")
- 
-        products = db.query(Product).all()
-        if not products:
-            return []
- 
-        summary = []
- 
-        for p in products:
-            items = (
-                db.query(OrderItem)
-                .join(Order, Order.id == OrderItem.order_id)
-                .filter(OrderItem.product_id == p.id)
-                .filter(Order.status.in_(["Shipped", "Delivered", "Shipment started", "received","Pending","accepted"]))
-                .all()
+
+        rows = db.execute(
+            select(
+                Product.id.label("product_id"),
+                Product.name.label("product_name"),
+                ProductSalesRollup.total_sold,
+                ProductSalesRollup.total_revenue,
             )
- 
-            if not items:
-                continue
- 
-            total_sold = sum(i.quantity or 0 for i in items)
-            total_revenue = sum((i.quantity or 0) * (i.price or 0) for i in items)
- 
-            if total_sold > 0:
-                summary.append(
-                    SalesSummaryItem(
-                        product_id=p.id,
-                        product_name=p.name,
-                        total_sold=total_sold,
-                        total_revenue=total_revenue
-                    )
-                )
- 
-        summary.sort(key=lambda x: x.total_revenue, reverse=True)
-        return summary[:limit]
- 
+            .select_from(ProductSalesRollup)
+            .join(Product, Product.id == ProductSalesRollup.product_id)
+            .where(ProductSalesRollup.total_sold > 0)
+            .order_by(ProductSalesRollup.total_revenue.desc(), ProductSalesRollup.product_id)
+            .limit(limit)
+        ).all()
+
+        return [
+            SalesSummaryItem(
+                product_id=row.product_id,
+                product_name=row.product_name,
+                total_sold=row.total_sold,
+                total_revenue=row.total_revenue
+            )
+            for row in rows
+        ]
+
     except SQLAlchemyError as e:
         print(f"[DB Error - sales_summary]: {e}")
         return []
     except Exception as e:
         print(f"[Error - sales_summary]: {e}")
         return []
- 
- 
+
+
 def purchase_summary(db: Session, only_received: bool = True, limit: int = 50):
     """Return purchase totals per supplier."""
     try:
         if db is None:
             raise ValueError("Database session not provided.")
- 
-        status_filter = "received" if only_received else "pending"
-        suppliers = db.query(Supplier).all()
-        if not suppliers:
-            return []
- 
-        summary = []
- 
-        for s in suppliers:
-            orders = (
-                db.query(PurchaseOrder)
-                .filter(PurchaseOrder.supplier_id == s.id)
-                .filter(PurchaseOrder.status == status_filter)
-                .all()
-            )
- 
-            total_ordered_quantity = 0
-            total_received_quantity = 0
-            total_received_value = 0
-            purchase_orders_count = len(orders)
- 
-            for order in orders:
-                items = db.query(PurchaseOrderItem).filter(PurchaseOrderItem.order_id == order.id).all()
-                for item in items:
-                    total_ordered_quantity += item.quantity or 0
-                    total_received_quantity += getattr(item, "received_quantity", 0)
-                    total_received_value += (
-                        getattr(item, "received_quantity", 0) * (item.unit_cost or 0)
-                    )
- 
-            summary.append(
-                PurchaseSummaryItem(
-                    supplier_id=s.id,
-                    supplier_name=s.name,
-                    total_ordered_quantity=total_ordered_quantity,
-                    total_received_quantity=total_received_quantity,
-                    total_received_value=total_received_value,
-                    purchase_orders_count=purchase_orders_count
+
+        if only_received:
+            # Fully received orders are final, so their totals come from the rollup.
+            rows = db.execute(
+                select(
+                    Supplier.id.label("supplier_id"),
+                    Supplier.name.label("supplier_name"),
+                    func.coalesce(SupplierPurchaseRollup.total_ordered_quantity, 0).label("total_ordered_quantity"),
+                    func.coalesce(SupplierPurchaseRollup.total_received_quantity, 0).label("total_received_quantity"),
+                    func.coalesce(SupplierPurchaseRollup.total_received_value, 0).label("total_received_value"),
+                    func.coalesce(SupplierPurchaseRollup.purchase_orders_count, 0).label("purchase_orders_count"),
                 )
+                .outerjoin(SupplierPurchaseRollup, SupplierPurchaseRollup.supplier_id == Supplier.id)
+                .order_by(func.coalesce(SupplierPurchaseRollup.total_received_value, 0).desc(), Supplier.id)
+                .limit(limit)
+            ).all()
+        else:
+            rows = db.execute(purchase_summary_query("pending", limit)).all()
+
+        return [
+            PurchaseSummaryItem(
+                supplier_id=row.supplier_id,
+                supplier_name=row.supplier_name,
+                total_ordered_quantity=row.total_ordered_quantity,
+                total_received_quantity=row.total_received_quantity,
+                total_received_value=row.total_received_value,
+                purchase_orders_count=row.purchase_orders_count
             )
- 
-        summary.sort(key=lambda x: x.total_received_value, reverse=True)
-        return summary[:limit]
- 
+            for row in rows
+        ]
+
     except SQLAlchemyError as e:
         print(f"[DB Error - purchase_summary]: {e}")
         return []
     except Exception as e:
         print(f"[Error - purchase_summary]: {e}")
         return []
- 
- 
+
+
 def total_stock_value(db: Session):
     """Return the total value of all stock items in inventory."""
     try:
         if db is None:
             raise ValueError("Database session not provided.")
- 
-        products = db.query(Product).all()
-        if not products:
+
+        total_value = db.execute(select(func.sum(ProductStockRollup.stock_value))).scalar()
+        if total_value is None:
             return {"total_stock_value": 0}
- 
-        total_value = 0
- 
-        for p in products:
-            inv = db.query(Inventory).filter(Inventory.product_id == p.id).first()
-            qty = inv.quantity if inv else (p.quantity or 0)
-            total_value += qty * (p.unit_price or 0)
- 
+
         return {"total_stock_value": round(float(total_value), 2)}
- 
+
     except SQLAlchemyError as e:
         print(f"[DB Error - total_stock_value]: {e}")
         return {"total_stock_value": 0}
     except Exception as e:
         print(f"[Error - total_stock_value]: {e}")
         return {"total_stock_value": 0}
- 
\ No newline at end of file
+
+
+# ----------------- Streaming Exports ----------------- #
+# Rows are pulled from a server-side cursor (yield_per) and handed out one batch
+# at a time, so an export never holds more than EXPORT_BATCH_SIZE rows in memory.
+def stream_inventory_summary(db: Session) -> Iterator[List[dict]]:
+    """Yield batches of inventory summary rows, ordered by product id."""
+    result = db.execute(
+        stock_levels_query()
+        .order_by(Product.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for partition in result.partitions():
+        yield [
+            {
+                "product_id": row.product_id,
+                "product_name": row.product_name,
+                "available_quantity": row.available_quantity,
+                "unit_price": row.unit_price,
+                "total_value": row.available_quantity * (row.unit_price or 0),
+            }
+            for row in partition
+        ]
+
+
+def stream_sales_summary(db: Session, limit: Optional[int] = None) -> Iterator[List[dict]]:
+    """Yield batches of sales summary rows, best sellers first."""
+    result = db.execute(
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            ProductSalesRollup.total_sold,
+            ProductSalesRollup.total_revenue,
+        )
+        .select_from(ProductSalesRollup)
+        .join(Product, Product.id == ProductSalesRollup.product_id)
+        .where(ProductSalesRollup.total_sold > 0)
+        .order_by(ProductSalesRollup.total_revenue.desc(), ProductSalesRollup.product_id)
+        .limit(limit)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for partition in result.partitions():
+        yield [row._asdict() for row in partition]
+
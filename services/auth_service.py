@@ -1,11 +1,56 @@
+from typing import Optional
 from fastapi import HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from utils.auth_helper import hash_password, verify_password, create_access_token, create_refresh_token
+from utils.auth_helper import create_access_token, create_refresh_token, invalidate_cached_user
+from utils.db_helper import run_service
+from utils import password_hasher
 from models.models import User,UserRole
 from schemas import auth_schema as schemas
 
+# Password hashing is slow on purpose, so it never runs inside the sync functions
+# below (they hold a threadpool thread, or the event loop with an AsyncSession).
+# The async entry points hash in password_hasher's own pool, then call them
+# through run_service with the finished hash.
 
-def register_user(db: Session, user_in: schemas.UserCreate):
+
+async def register(db, user_in: schemas.UserCreate):
+    password_hash = await password_hasher.hash_password_async(user_in.password)
+    return await run_service(db, register_user, user_in, password_hash, response_model=schemas.UserResponse)
+
+
+async def login(db, form_data: schemas.UserLogin):
+    user = await run_service(db, find_login_user, form_data.username_or_email)
+    if user is None:
+        await password_hasher.burn_verify_async(form_data.password)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    user_id, role, password_hash = user
+    matches, new_hash = await password_hasher.verify_password_async(form_data.password, password_hash)
+    if not matches:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash is not None:
+        # legacy SHA-256 or outdated cost: upgrade transparently now that we know the password
+        await run_service(db, store_rehashed_password, user_id, password_hash, new_hash)
+
+    token_data = {"user_id": user_id, "role": role.value}
+    access_token = create_access_token(token_data)
+    refresh_token = create_refresh_token(token_data)
+
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+async def update_user(db, user_id: int, user_update: schemas.UserUpdate, current_user):
+    # refuse before hashing, so nobody can make the server run the KDF for other users' ids
+    _check_can_update(current_user, user_id)
+    password_hash = None
+    if user_update.password is not None:
+        password_hash = await password_hasher.hash_password_async(user_update.password)
+    return await run_service(db, update_user_info, user_id, user_update, current_user, password_hash,
+                             response_model=schemas.UserResponse)
+
+
+def register_user(db: Session, user_in: schemas.UserCreate, password_hash: str):
     if db.query(User).filter(User.email == user_in.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
     if db.query(User).filter(User.name == user_in.name).first():
@@ -14,7 +59,7 @@ def register_user(db: Session, user_in: schemas.UserCreate):
     db_user = User(
         name=user_in.name,
         email=user_in.email,
-        password_hash=hash_password(user_in.password),
+        password_hash=password_hash,
         role=user_in.role or UserRole.staff
     )
     db.add(db_user)
@@ -22,42 +67,45 @@ def register_user(db: Session, user_in: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
-def login_user(db: Session, form_data: schemas.UserLogin):
-    user = db.query(User).filter(
-        (User.email == form_data.username_or_email) |
-        (User.name == form_data.username_or_email)
+def find_login_user(db: Session, username_or_email: str):
+    """(id, role, password hash) of the user logging in, or None."""
+    return db.query(User.id, User.role, User.password_hash).filter(
+        (User.email == username_or_email) |
+        (User.name == username_or_email)
     ).first()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+def store_rehashed_password(db: Session, user_id: int, old_hash: str, new_hash: str):
+    # only if the password was not changed while we were hashing
+    db.execute(update(User).where(User.id == user_id, User.password_hash == old_hash).values(password_hash=new_hash))
+    db.commit()
 
-    token_data = {"user_id": user.id, "role": user.role.value}
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
 
-    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+def _check_can_update(current_user, user_id: int):
+    if current_user.role.value != "admin" and current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="You are not allowed to update other users")
 
 
-def update_user_info(db: Session, user_id: int, user_update: schemas.UserUpdate, current_user):
+def update_user_info(db: Session, user_id: int, user_update: schemas.UserUpdate, current_user,
+                     password_hash: Optional[str] = None):
     db_user = db.query(User).filter(User.id == user_id).first()
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
 
-    if current_user.role.value != "admin" and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="You are not allowed to update other users")
+    _check_can_update(current_user, user_id)
 
 
     if user_update.name is not None:
         db_user.name = user_update.name
     if user_update.email is not None:
         db_user.email = user_update.email
-    if user_update.password is not None:
-        db_user.password_hash = hash_password(user_update.password)
+    if password_hash is not None:
+        db_user.password_hash = password_hash
     if current_user.role.value == "admin" and user_update.role is not None:
         db_user.role = user_update.role
 
     db.commit()
+    invalidate_cached_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -71,4 +119,5 @@ def delete_user_account(db: Session, user_id: int, current_user):
 
     db.delete(db_user)
     db.commit()
+    invalidate_cached_user(user_id)
     return None
\ No newline at end of file
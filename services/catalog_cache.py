@@ -0,0 +1,196 @@
+import os
+import threading
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy.orm import Session, selectinload
+from models import models
+from schemas import product_schema as schemas
+from utils.cache import caches
+
+# Product and category master data is read far more often than it changes (order
+# entry, PO validation, catalog pages), so lookups go through these caches.
+# Entries are pydantic snapshots, never ORM objects, so they outlive the session
+# that loaded them. Every write path calls invalidate_products() /
+# invalidate_categories() after its commit, which also tells the other worker
+# processes (see utils.cache.CacheRegistry); the TTL bounds staleness if a
+# message is lost.
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "10000"))
+
+PRODUCTS, SKUS, PRODUCT_PAGES, CATEGORIES = (
+    "catalog.products", "catalog.skus", "catalog.product_pages", "catalog.categories"
+)
+product_cache = caches.cache(PRODUCTS, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)            # id -> Product
+sku_cache = caches.cache(SKUS, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)                    # sku -> id
+product_page_cache = caches.cache(PRODUCT_PAGES, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)  # list args -> page
+category_cache = caches.cache(CATEGORIES, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)         # id / ALL -> Category(s)
+
+ALL_CATEGORIES = "__all__"
+
+# Fill guards. A loader notes the sequence number before it reads and only stores
+# its result if none of the entries it depends on were invalidated since, so a
+# read that started before a commit can never re-cache pre-commit data. The check
+# and the set happen under one lock, and invalidations bump before they drop
+# entries, so a store either lands before the drop or is refused. Invalidations
+# are tracked per key (hashed into a fixed number of slots; a collision only
+# costs a skipped store), so an order touching one product does not spoil the
+# fills of all the others. The bumps are hooked to the cache registry (see
+# register_guards), so invalidations published by other workers count too.
+_GUARD_SLOTS = 4096
+_seq = 0
+_bumped_at = [0] * _GUARD_SLOTS
+_all_bumped_at = 0
+_generation_lock = threading.Lock()
+
+PAGES_KEY = ("pages", None)
+CATEGORIES_KEY = ("categories", None)
+
+
+def _slot(key) -> int:
+    return hash(key) % _GUARD_SLOTS
+
+
+def _current_generation() -> int:
+    return _seq
+
+
+def _bump_generation(keys=None):
+    """Mark `keys` ((kind, key) pairs), or everything, as invalidated now."""
+    global _seq, _all_bumped_at
+    with _generation_lock:
+        _seq += 1
+        if keys is None:
+            _all_bumped_at = _seq
+        else:
+            for key in keys:
+                _bumped_at[_slot(key)] = _seq
+
+
+def _store(cache, key, value, generation: int, depends_on):
+    with _generation_lock:
+        if _all_bumped_at > generation or any(_bumped_at[_slot(dep)] > generation for dep in depends_on):
+            return
+        cache.set(key, value)
+
+
+def _store_product(product: schemas.Product, generation: int):
+    depends_on = (("product", product.id), ("sku", product.sku))
+    _store(product_cache, product.id, product, generation, depends_on)
+    _store(sku_cache, product.sku, product.id, generation, depends_on)
+
+
+# ----------------- Products ----------------- #
+def _load_products(db: Session, *criteria) -> List[models.Product]:
+    return (
+        db.query(models.Product)
+        .options(selectinload(models.Product.category))
+        .filter(*criteria)
+        .all()
+    )
+
+
+def get_product(db: Session, product_id: int) -> Optional[schemas.Product]:
+    product = product_cache.get(product_id)
+    if product is not None:
+        return product
+    generation = _current_generation()
+    rows = _load_products(db, models.Product.id == product_id)
+    if not rows:
+        return None
+    product = schemas.Product.model_validate(rows[0])
+    _store_product(product, generation)
+    return product
+
+
+def get_product_by_sku(db: Session, sku: str) -> Optional[schemas.Product]:
+    product_id = sku_cache.get(sku)
+    if product_id is not None:
+        product = get_product(db, product_id)
+        if product is not None and product.sku == sku:
+            return product
+    generation = _current_generation()
+    rows = _load_products(db, models.Product.sku == sku)
+    if not rows:
+        return None
+    product = schemas.Product.model_validate(rows[0])
+    _store_product(product, generation)
+    return product
+
+
+def cached_product_page(key, load: Callable[[], dict]) -> dict:
+    """Return a cached page of products, or build it with `load()` and cache it."""
+    page = product_page_cache.get(key)
+    if page is not None:
+        return page
+    generation = _current_generation()
+    page = load()
+    page = {**page, "items": [schemas.Product.model_validate(p) for p in page["items"]]}
+    _store(product_page_cache, key, page, generation, (PAGES_KEY,))
+    return page
+
+
+def invalidate_products(product_ids: Iterable[int] = (), skus: Iterable[str] = ()):
+    """Drop cached products (and every cached page) after they changed."""
+    product_ids, skus = list(product_ids), list(skus)
+    if product_ids:
+        caches.invalidate(PRODUCTS, product_ids)
+    if skus:
+        caches.invalidate(SKUS, skus)
+    caches.invalidate(PRODUCT_PAGES)
+
+
+# ----------------- Categories ----------------- #
+def get_category(db: Session, category_id: int) -> Optional[schemas.Category]:
+    category = category_cache.get(category_id)
+    if category is not None:
+        return category
+    generation = _current_generation()
+    row = db.get(models.Category, category_id)
+    if row is None:
+        return None
+    category = schemas.Category.model_validate(row)
+    _store(category_cache, category_id, category, generation, (CATEGORIES_KEY,))
+    return category
+
+
+def list_categories(db: Session) -> List[schemas.Category]:
+    categories = category_cache.get(ALL_CATEGORIES)
+    if categories is not None:
+        return categories
+    generation = _current_generation()
+    categories = [
+        schemas.Category.model_validate(row)
+        for row in db.query(models.Category).order_by(models.Category.id).all()
+    ]
+    _store(category_cache, ALL_CATEGORIES, categories, generation, (CATEGORIES_KEY,))
+    return categories
+
+
+def invalidate_categories():
+    caches.invalidate(CATEGORIES)
+
+
+def clear():
+    """Forget everything, e.g. after the tables were rebuilt behind the app's back."""
+    for name in (PRODUCTS, SKUS, PRODUCT_PAGES, CATEGORIES):
+        caches.invalidate(name)
+
+
+# ----------------- Guards follow every invalidation ----------------- #
+def _guard_keys(kind: str):
+    def bump(keys):
+        # a whole product or SKU cache cleared spoils every fill; pages and categories have one guard each
+        if kind in ("pages", "categories"):
+            _bump_generation([(kind, None)])
+        else:
+            _bump_generation(None if keys is None else [(kind, key) for key in keys])
+    return bump
+
+
+def register_guards(registry):
+    """Bump the fill guards on every invalidation `registry` applies, including
+    those published by other workers, before the entries are dropped."""
+    for name, kind in ((PRODUCTS, "product"), (SKUS, "sku"), (PRODUCT_PAGES, "pages"), (CATEGORIES, "categories")):
+        registry.on_invalidate(name, _guard_keys(kind))
+
+
+register_guards(caches)
@@ -1,10 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 from typing import List, Optional
 from models import models
 from schemas import product_schema as schemas
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
+from services import catalog_cache
 
 def create_category(db: Session, name: str) -> models.Category:
     try:
@@ -20,6 +20,7 @@ def create_category(db: Session, name: str) -> models.Category:
         db.add(category)
         db.commit()
         db.refresh(category)
+        catalog_cache.invalidate_categories()
         return category
  
     except IntegrityError:
@@ -29,9 +30,8 @@ def create_category(db: Session, name: str) -> models.Category:
             detail=f"Category with name '{name}' already exists."
         )
 
-def list_categories(db: Session) -> List[models.Category]:
-    result = db.execute(select(models.Category))
-    return result.scalars().all()
+def list_categories(db: Session) -> List[schemas.Category]:
+    return catalog_cache.list_categories(db)
 
-def get_category(db: Session, category_id: int) -> Optional[models.Category]:
-    return db.get(models.Category, category_id)
+def get_category(db: Session, category_id: int) -> Optional[schemas.Category]:
+    return catalog_cache.get_category(db, category_id)
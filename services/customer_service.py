@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from models.models import Customer
 from schemas.customer_schema import CustomerCreate
+from typing import Optional
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
 def create_customer_service(customer_data: CustomerCreate, db: Session):
     existing_customer = db.query(Customer).filter(Customer.phone == customer_data.phone).first()
@@ -11,3 +13,17 @@ def create_customer_service(customer_data: CustomerCreate, db: Session):
     db.commit()
     db.refresh(new_customer)
     return new_customer
+
+def list_customers(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    name: Optional[str] = None,
+    phone: Optional[str] = None,
+):
+    query = db.query(Customer)
+    if name:
+        query = query.filter(Customer.name.ilike(f"%{name}%"))
+    if phone:
+        query = query.filter(Customer.phone == phone)
+    return paginate(query, Customer.id, cursor, limit)
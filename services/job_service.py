@@ -0,0 +1,274 @@
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from models import models
+from schemas import analysis_schema
+from schemas import job_schema as schemas
+from schemas.job_schema import JobKind, JobStatus
+from services import analysis_service, order_service, rollup_service, stock_ledger_service
+from utils.export import MEDIA_TYPES, write_export
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+
+# Slow work is queued in the `jobs` table instead of running inside a request:
+# the API inserts a job and answers 202 with its id, and workers
+# (utils.job_worker, as threads of the API process or as `python manage.py
+# worker` processes) claim queued jobs one at a time and record the result.
+# Claiming is a guarded UPDATE (status queued -> running), with SKIP LOCKED on
+# PostgreSQL, so any number of workers can share the table. While a job runs its
+# worker refreshes heartbeat_at every JOB_HEARTBEAT_SECONDS; a worker that dies
+# stops beating, and once its job has gone JOB_TIMEOUT_SECONDS without a
+# heartbeat it is queued again, up to JOB_MAX_ATTEMPTS times, so handlers must
+# be safe to re-run. Long jobs whose worker is alive are never run twice.
+JOB_RESULT_DIR = os.getenv("JOB_RESULT_DIR", os.path.join(tempfile.gettempdir(), "wms-jobs"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "300"))  # without a heartbeat
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+# Set when a job is submitted so worker threads in this process start at once
+# instead of waiting for their next poll.
+_submitted = threading.Event()
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    handler: Callable[[Session, int, BaseModel], dict]  # (db, job id, params) -> JSON result
+    params: Type[BaseModel]
+    manager_only: bool = False
+
+
+# ----------------- Handlers ----------------- #
+def _ship_orders(db: Session, job_id: int, params: schemas.ShipOrdersParams) -> dict:
+    return order_service.update_orders_status(db, params.order_ids, order_service.SHIPPED_STATUS)
+
+
+def _update_order_status(db: Session, job_id: int, params: schemas.OrderStatusParams) -> dict:
+    return order_service.update_orders_status(db, params.order_ids, params.status)
+
+
+def _rebuild_rollups(db: Session, job_id: int, params: schemas.NoParams) -> dict:
+    return rollup_service.rebuild_rollups(db)
+
+
+def _snapshot_stock(db: Session, job_id: int, params: schemas.NoParams) -> dict:
+    return {"stock_snapshots": stock_ledger_service.take_snapshots(db)}
+
+
+def _export(producer: Callable, fields, name: str):
+    def run(db: Session, job_id: int, params: schemas.ExportParams) -> dict:
+        filename = f"{name}.{params.format.value}"
+        os.makedirs(JOB_RESULT_DIR, exist_ok=True)
+        rows = write_export(
+            db, producer, fields, params.format, _result_path(job_id, filename),
+            **params.model_dump(exclude={"format"}),
+        )
+        return {"filename": filename, "media_type": MEDIA_TYPES[params.format], "rows": rows}
+    return run
+
+
+JOBS = {
+    JobKind.ship_orders: JobSpec(_ship_orders, schemas.ShipOrdersParams),
+    JobKind.update_order_status: JobSpec(_update_order_status, schemas.OrderStatusParams),
+    JobKind.rebuild_rollups: JobSpec(_rebuild_rollups, schemas.NoParams, manager_only=True),
+    JobKind.snapshot_stock: JobSpec(_snapshot_stock, schemas.NoParams, manager_only=True),
+    JobKind.export_inventory_summary: JobSpec(
+        _export(analysis_service.stream_inventory_summary,
+                list(analysis_schema.InventorySummaryItem.model_fields), "inventory-summary"),
+        schemas.ExportParams,
+    ),
+    JobKind.export_sales_summary: JobSpec(
+        _export(analysis_service.stream_sales_summary,
+                list(analysis_schema.SalesSummaryItem.model_fields), "sales-summary"),
+        schemas.SalesExportParams,
+    ),
+}
+
+
+def _result_path(job_id: int, filename: str) -> str:
+    return os.path.join(JOB_RESULT_DIR, f"job-{job_id}-{filename}")
+
+
+# ----------------- API side ----------------- #
+def submit_job(db: Session, job_in: schemas.JobCreate, user_id: Optional[int] = None) -> models.Job:
+    spec = JOBS[job_in.kind]
+    try:
+        params = spec.params.model_validate(job_in.params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    job = models.Job(
+        kind=job_in.kind.value,
+        status=JobStatus.queued.value,
+        params=params.model_dump(mode="json"),
+        attempts=0,
+        created_by=user_id,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _submitted.set()
+    return job
+
+
+def get_job(db: Session, job_id: int) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job with ID {job_id} not found")
+    return job
+
+
+def list_jobs(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    kind: Optional[JobKind] = None,
+    job_status: Optional[JobStatus] = None,
+):
+    query = db.query(models.Job)
+    if kind is not None:
+        query = query.filter(models.Job.kind == kind.value)
+    if job_status is not None:
+        query = query.filter(models.Job.status == job_status.value)
+    return paginate(query, models.Job.id, cursor, limit)
+
+
+def result_file(db: Session, job_id: int) -> Tuple[str, str, str]:
+    """(path, filename, media type) of a finished export job's file."""
+    job = get_job(db, job_id)
+    if job.status != JobStatus.succeeded.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is {job.status}; its result is not available"
+        )
+    filename = (job.result or {}).get("filename")
+    path = filename and _result_path(job.id, filename)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} has no result file")
+    return path, filename, job.result["media_type"]
+
+
+# ----------------- Worker side ----------------- #
+def wait_for_jobs(timeout: float):
+    """Block until a job is submitted in this process or `timeout` seconds pass."""
+    if _submitted.wait(timeout):
+        _submitted.clear()
+
+
+def wake_workers():
+    _submitted.set()
+
+
+def claim_job(db: Session) -> Optional[models.Job]:
+    """Mark the oldest queued job running and return it, or None if the queue is empty."""
+    while True:
+        job_id = db.scalar(
+            select(models.Job.id)
+            .where(models.Job.status == JobStatus.queued.value)
+            .order_by(models.Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job_id is None:
+            db.rollback()
+            return None
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == JobStatus.queued.value)
+            .values(
+                status=JobStatus.running.value,
+                started_at=datetime.now(timezone.utc),
+                heartbeat_at=datetime.now(timezone.utc),
+                attempts=models.Job.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(models.Job, job_id, populate_existing=True)
+        # another worker took it between the SELECT and the UPDATE
+
+
+def heartbeat(db: Session, job_id: int):
+    """Record that the worker running `job_id` is still alive."""
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == JobStatus.running.value)
+        .values(heartbeat_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _finish(db: Session, job_id: int, job_status: JobStatus, result: dict = None, error: str = None):
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id)
+        .values(status=job_status.value, result=result, error=error, finished_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def run_job(db: Session, job: models.Job) -> JobStatus:
+    """Run a claimed job and record its result (or error)."""
+    job_id, kind, params = job.id, JobKind(job.kind), job.params
+    spec = JOBS[kind]
+    try:
+        result = spec.handler(db, job_id, spec.params.model_validate(params))
+    except Exception as e:
+        db.rollback()
+        error = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+        print(f"[Job Error - {kind.value} #{job_id}]: {error}")
+        _finish(db, job_id, JobStatus.failed, error=str(error))
+        return JobStatus.failed
+    # the handler's own uncommitted writes commit together with the result
+    _finish(db, job_id, JobStatus.succeeded, result=result)
+    return JobStatus.succeeded
+
+
+def requeue_stale(db: Session) -> int:
+    """Queue again jobs whose worker stopped beating; fail them once they used all attempts."""
+    now = datetime.now(timezone.utc)
+    job = models.Job
+    last_seen = func.coalesce(job.heartbeat_at, job.started_at)
+    stale = (job.status == JobStatus.running.value, last_seen < now - timedelta(seconds=JOB_TIMEOUT_SECONDS))
+    db.execute(
+        update(job)
+        .where(*stale, job.attempts >= JOB_MAX_ATTEMPTS)
+        .values(status=JobStatus.failed.value, error="Worker stopped responding", finished_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.execute(
+        update(job).where(*stale).values(status=JobStatus.queued.value)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return requeued
+
+
+def purge_jobs(db: Session) -> int:
+    """Delete finished jobs (and their files) older than JOB_RETENTION_HOURS."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=JOB_RETENTION_HOURS)
+    old = (
+        db.query(models.Job)
+        .filter(models.Job.status.in_([JobStatus.succeeded.value, JobStatus.failed.value]))
+        .filter(models.Job.finished_at < cutoff)
+        .all()
+    )
+    for job in old:
+        filename = (job.result or {}).get("filename")
+        if filename:
+            try:
+                os.remove(_result_path(job.id, filename))
+            except FileNotFoundError:
+                pass
+        db.delete(job)
+    db.commit()
+    return len(old)
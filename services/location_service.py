@@ -0,0 +1,23 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from typing import List
+from models import models
+from schemas import location_schema as schemas
+from services import allocation_service
+
+
+def create_location(db: Session, location_in: schemas.LocationCreate) -> models.Location:
+    existing = db.query(models.Location).filter(models.Location.code == location_in.code).first()
+    if existing:
+        raise HTTPException(status_code=400, detail=f"Location with code '{location_in.code}' already exists.")
+
+    location = models.Location(**location_in.dict())
+    db.add(location)
+    db.commit()
+    db.refresh(location)
+    allocation_service.locations_changed()
+    return location
+
+
+def list_locations(db: Session) -> List[models.Location]:
+    return db.query(models.Location).order_by(models.Location.id).all()
@@ -1,10 +1,20 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import insert
+from datetime import datetime
+from typing import List, Optional
 from fastapi import HTTPException, status
 from models.models import Order
 from models.models import OrderItem
 from models.models import Customer
-from models.models import Product,Inventory
+from models.models import OrderAllocation
 from schemas.order_schema import OrderCreate
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+from services import rollup_service, inventory_service, catalog_cache, stock_ledger_service, allocation_service
+
+SHIPPED_STATUS = "Shipment started"
+# Bulk status updates commit every STATUS_BATCH_SIZE orders so one large job
+# never holds a long transaction.
+STATUS_BATCH_SIZE = 500
 
 # Create a new Order
 def create_order(db: Session, order_data: OrderCreate):
@@ -16,9 +26,17 @@ def create_order(db: Session, order_data: OrderCreate):
             detail=f"Customer with ID {order_data.customer_id} not found"
         )
 
-    # Step 2: Validate Products and Calculate Total
+    # Step 2: Lock and load every referenced Product (the locks,
+    # taken in product-id order, cover their stock until the commit)
+    product_ids = {item.product_id for item in order_data.items}
+    products = inventory_service.lock_products(db, product_ids)
+    if order_data.preferred_location_id is not None:
+        inventory_service.get_location(db, order_data.preferred_location_id)
+
+    # Step 3: Validate Products and Calculate Total
     total = 0
     valid_items = []
+    requested = {}
 
     for item in order_data.items:
         if item.quantity <= 0:
@@ -27,68 +45,90 @@ def create_order(db: Session, order_data: OrderCreate):
                 detail=f"Quantity for product ID {item.product_id} must be greater than 0"
             )
 
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with ID {item.product_id} not found"
             )
 
-        # ✅ Fetch inventory record
-        inventory = db.query(Inventory).filter(Inventory.product_id == item.product_id).first()
-        if not inventory:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No inventory record found for product ID {item.product_id}"
-            )
-
-        # ✅ Check stock availability (use inventory stock, not product.quantity)
-        if inventory.quantity < item.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough stock in inventory for product {product.name}"
-            )
+        # Every line of the order that draws on the same product is allocated together
+        requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
 
         price = item.quantity * product.unit_price
         total += price
-        valid_items.append((product, inventory, item, price))
+        valid_items.append((item, price))
 
-    # Step 3: Create Order
+    # Step 4: Pick the locations to take the stock from
+    allocation, inventories = allocation_service.allocate(
+        db, products, requested, order_data.preferred_location_id
+    )
+
+    # Step 5: Create Order header and bulk insert its items in the same transaction
     order = Order(customer_id=order_data.customer_id, total_amount=total)
     db.add(order)
-    db.commit()
-    db.refresh(order)
-
-    # Step 4: Create Order Items & Update Product + Inventory Quantities
-    for product, inventory, item, price in valid_items:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price=price
-        )
-        db.add(order_item)
-
-        # ✅ Reduce both Product and Inventory stock
-        product.quantity -= item.quantity
-        inventory.quantity -= item.quantity
-        db.add(product)
-        db.add(inventory)
+    db.flush()
+
+    order_items = db.scalars(
+        insert(OrderItem).returning(OrderItem),
+        [
+            {
+                "order_id": order.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": price,
+            }
+            for item, price in valid_items
+        ],
+    ).all()
+    pieces = [(pid, loc, qty) for pid, taken in allocation.items() for loc, qty in taken]
+    db.execute(insert(OrderAllocation), [
+        {"order_id": order.id, "product_id": pid, "location_id": loc, "quantity": qty}
+        for pid, loc, qty in pieces
+    ])
+
+    # Step 6: Reserve the stock at the chosen locations
+    levels = inventory_service.apply_stock_deltas(
+        db, products, inventories, {(pid, loc): -qty for pid, loc, qty in pieces}
+    )
+    stock_ledger_service.record_movements(db, [
+        {"product_id": pid, "location_id": loc, "movement_type": "order", "delta": -qty, "order_id": order.id}
+        for pid, loc, qty in pieces
+    ])
+
+    # Step 7: Keep report rollups in the same transaction
+    rollup_service.record_stock(db, [products[pid] for pid in requested])
+    if order.status in rollup_service.SALES_STATUSES:
+        rollup_service.record_sales(db, order_items)
 
     db.commit()
+    catalog_cache.invalidate_products(requested)
+    allocation_service.stock_changed(levels)
     db.refresh(order)
     return order
 
 
+def list_order_allocations(db: Session, order_id: int) -> List[OrderAllocation]:
+    if not db.query(Order.id).filter(Order.id == order_id).first():
+        raise HTTPException(status_code=404, detail="Order not found")
+    return (
+        db.query(OrderAllocation)
+        .filter(OrderAllocation.order_id == order_id)
+        .order_by(OrderAllocation.product_id, OrderAllocation.location_id)
+        .all()
+    )
+
+
 # Trigger Shipment for an Order
 def trigger_shipment(db: Session, order_id: int):
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order ID not found")
-    if order.status == "Shipment started":
+    if order.status == SHIPPED_STATUS:
         raise HTTPException(status_code=400, detail="Status already updated")
 
-    order.status = "Shipment started"
+    rollup_service.record_order_status_change(db, order, order.status, SHIPPED_STATUS)
+    order.status = SHIPPED_STATUS
     db.commit()
     db.refresh(order)
     return order
@@ -96,14 +136,45 @@ def trigger_shipment(db: Session, order_id: int):
 
 
 # List Orders (Not Yet Shipped)
-def list_orders(db: Session):
-    return db.query(Order).filter(Order.status != "Shipment started").all()
+def list_orders(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    query = db.query(Order).options(selectinload(Order.items)).filter(Order.status != SHIPPED_STATUS)
+    if status is not None:
+        query = query.filter(Order.status == status)
+    query = _filter_orders(query, customer_id, created_from, created_to)
+    return paginate(query, Order.id, cursor, limit)
 
 
 
 # List Shipped Orders
-def list_shipped_orders(db: Session):
-    return db.query(Order).filter(Order.status == "Shipment started").all()
+def list_shipped_orders(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    query = db.query(Order).options(selectinload(Order.items)).filter(Order.status == SHIPPED_STATUS)
+    query = _filter_orders(query, customer_id, created_from, created_to)
+    return paginate(query, Order.id, cursor, limit)
+
+
+def _filter_orders(query, customer_id, created_from, created_to):
+    if customer_id is not None:
+        query = query.filter(Order.customer_id == customer_id)
+    if created_from is not None:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Order.created_at < created_to)
+    return query
 
 
 
@@ -113,7 +184,38 @@ def update_order_status(db: Session, order_id: int, status: str):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
+    rollup_service.record_order_status_change(db, order, order.status, status)
     order.status = status
     db.commit()
     db.refresh(order)
-    return order
\ No newline at end of file
+    return order
+
+
+# Update the Status of Many Orders (run as a background job)
+def update_orders_status(db: Session, order_ids: List[int], new_status: str) -> dict:
+    """Move every order in `order_ids` to `new_status`.
+
+    Returns the ids updated, the ids already in that status and the ids that do
+    not exist. Orders are committed in batches, so a failure part way keeps the
+    batches already done; running the same update again skips them.
+    """
+    order_ids = sorted(set(order_ids))
+    updated, unchanged, missing = [], [], []
+    for start in range(0, len(order_ids), STATUS_BATCH_SIZE):
+        batch = order_ids[start:start + STATUS_BATCH_SIZE]
+        orders = {
+            o.id: o for o in
+            db.query(Order).options(selectinload(Order.items)).filter(Order.id.in_(batch)).all()
+        }
+        for order_id in batch:
+            order = orders.get(order_id)
+            if order is None:
+                missing.append(order_id)
+            elif order.status == new_status:
+                unchanged.append(order_id)
+            else:
+                rollup_service.record_order_status_change(db, order, order.status, new_status)
+                order.status = new_status
+                updated.append(order_id)
+        db.commit()
+    return {"updated": updated, "unchanged": unchanged, "missing": missing}
@@ -1,36 +1,54 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+import csv
+import io
+import json
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, insert
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException,status
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
 from models import models
 from schemas import product_schema as schemas
+from utils.pagination import paginate
+from services import rollup_service, inventory_service, catalog_cache, stock_ledger_service, allocation_service
 
 # --------- PRODUCTS ---------
 def create_product(db: Session, product_in: schemas.ProductCreate) -> models.Product:
     try:
         # Step 1: Validate Category
-        category = db.query(models.Category).filter(models.Category.id == product_in.category_id).first()
+        category = catalog_cache.get_category(db, product_in.category_id)
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category with ID {product_in.category_id} not found"
             )
 
-        # Step 2: Create Product
-        product = models.Product(**product_in.dict())
+        # Step 2: Validate (or default) the home location
+        data = product_in.dict()
+        quantity = data.pop("quantity")
+        if data.get("location_id") is None:
+            data["location_id"] = inventory_service.default_location_id(db)
+        else:
+            inventory_service.get_location(db, data["location_id"])
+
+        # Step 3: Create Product
+        product = models.Product(**data)
         db.add(product)
-        db.commit()
-        db.refresh(product)
+        db.flush()
 
-        # Step 3: Create Matching Inventory Record
-        inventory = models.Inventory(
-            product_id=product.id,
-            quantity=product.quantity  # initialize with product quantity
-        )
+        # Step 4: Create Matching Inventory Record at the home location (the only place stock is stored)
+        inventory = models.Inventory(product_id=product.id, location_id=product.location_id, quantity=quantity)
         db.add(inventory)
+        db.flush()
+        set_committed_value(product, "quantity", quantity)
+        stock_ledger_service.record_movements(db, [
+            {"product_id": product.id, "location_id": product.location_id, "movement_type": "initial", "delta": quantity}
+        ])
+        rollup_service.record_stock(db, [product])
         db.commit()
-        db.refresh(inventory)
+        db.refresh(product)
+        catalog_cache.invalidate_products([product.id], [product.sku])
 
         return product
 
@@ -47,14 +65,35 @@ def create_product(db: Session, product_in: schemas.ProductCreate) -> models.Pro
             detail=f"Unexpected error: {str(e)}"
         )
 
-def get_product(db: Session, product_id: int) -> Optional[models.Product]:
-    return db.query(models.Product).filter(models.Product.id == product_id).first()
+def get_product(db: Session, product_id: int) -> Optional[schemas.Product]:
+    return catalog_cache.get_product(db, product_id)
+
+def get_product_by_sku(db: Session, sku: str) -> Optional[schemas.Product]:
+    return catalog_cache.get_product_by_sku(db, sku)
 
-def list_products(db: Session, skip: int = 0, limit: int = 100) -> List[models.Product]:
-    return db.query(models.Product).offset(skip).limit(limit).all()
+def list_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+) -> dict:
+    def load():
+        query = db.query(models.Product).options(selectinload(models.Product.category))
+        if category_id is not None:
+            query = query.filter(models.Product.category_id == category_id)
+        # `skip` is kept for old clients; the cursor is the cheap way to page deep.
+        return paginate(query, models.Product.id, cursor, limit, offset=0 if cursor else skip)
+
+    return catalog_cache.cached_product_page(("list", skip, limit, cursor, category_id), load)
 
 def update_product(db: Session, product_id: int, patch: schemas.ProductUpdate) -> models.Product:
-    product = get_product(db, product_id)
+    product = inventory_service.lock_products(
+        db, [product_id], selectinload(models.Product.category)
+    ).get(product_id)
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    old_sku = product.sku
     update_data = patch.dict(exclude_unset=True)
 
     # Validate category
@@ -71,52 +110,220 @@ def update_product(db: Session, product_id: int, patch: schemas.ProductUpdate) -
     if "quantity" in update_data and update_data["quantity"] is not None and update_data["quantity"] <= 0:
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
 
+    # Validate home location
+    if update_data.get("location_id") is not None:
+        inventory_service.get_location(db, update_data["location_id"])
+
+    # Quantity is the total over all locations; setting it adjusts the home location by the difference
+    new_quantity = update_data.pop("quantity", None)
+    levels = {}
+    if new_quantity is not None:
+        key = (product_id, update_data.get("location_id") or inventory_service.home_location_id(db, product))
+        delta = new_quantity - (product.quantity or 0)
+        inventories = inventory_service.load_stock(db, [key], create=True)
+        levels = inventory_service.apply_stock_deltas(
+            db, {product_id: product}, inventories, {key: delta},
+            error_detail="Quantity cannot be set below the stock held at other locations"
+        )
+        stock_ledger_service.record_movements(db, [{
+            "product_id": product_id, "location_id": key[1], "movement_type": "adjustment", "delta": delta,
+            "note": "quantity set by product update",
+        }])
+
     # Apply updates
     for field, value in update_data.items():
         setattr(product, field, value)
 
+    rollup_service.record_stock(db, [product])
+
     db.add(product)
     db.commit()
     db.refresh(product)
+    catalog_cache.invalidate_products([product_id], {old_sku, product.sku})
+    allocation_service.stock_changed(levels)
 
     return product
 
 
-def adjust_stock(db: Session, product_id: int, adjustment: int) -> models.Product:
-    # Fetch product
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+def adjust_stock(
+    db: Session,
+    product_id: int,
+    adjustment: int,
+    reason: Optional[str] = None,
+    location_id: Optional[int] = None,
+) -> models.Product:
+    # Fetch (and lock) product
+    product = inventory_service.lock_products(db, [product_id]).get(product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    # Fetch inventory entry
-    inventory = db.query(models.Inventory).filter(models.Inventory.product_id == product_id).first()
+    # Fetch inventory entry at the location (home location by default); stock
+    # can be added to a location that has none yet
+    if location_id is not None:
+        inventory_service.get_location(db, location_id)
+    key = (product_id, location_id or inventory_service.home_location_id(db, product))
+    inventory = inventory_service.load_stock(db, [key], create=adjustment > 0).get(key)
     if not inventory:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Inventory record not found for product ID {product_id}"
+            detail=f"Inventory record not found for product ID {product_id} at location {key[1]}"
         )
 
-    # Calculate new quantities
-    new_product_qty = product.quantity + adjustment
-    new_inventory_qty = inventory.quantity + adjustment
-
     # Prevent negative quantities
-    if new_product_qty < 0 or new_inventory_qty < 0:
+    if inventory.quantity + adjustment < 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Quantity cannot go below zero"
         )
 
-    # Apply updates
-    product.quantity = new_product_qty
-    inventory.quantity = new_inventory_qty
+    # Apply updates atomically; the guard re-checks against the committed quantity
+    levels = inventory_service.apply_stock_deltas(
+        db, {product_id: product}, {key: inventory}, {key: adjustment},
+        error_detail="Quantity cannot go below zero"
+    )
+    stock_ledger_service.record_movements(db, [{
+        "product_id": product_id, "location_id": key[1], "movement_type": "adjustment",
+        "delta": adjustment, "note": reason,
+    }])
 
     # Save changes
-    db.add(product)
-    db.add(inventory)
+    rollup_service.record_stock(db, [product])
     db.commit()
     db.refresh(product)
-    db.refresh(inventory)
+    catalog_cache.invalidate_products([product_id])
+    allocation_service.stock_changed(levels)
 
     return product
 
+
+# --------- BULK IMPORT ---------
+IMPORT_BATCH_SIZE = 1000
+
+def _read_import_rows(fileobj, fmt: str) -> Iterator[Tuple[Any, Optional[str]]]:
+    """(row, None) per row, or (None, error) for an NDJSON line that is not valid JSON."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}, None
+    else:
+        for line in text:
+            if line.strip():
+                try:
+                    yield json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield None, f"invalid JSON: {e}"
+
+
+def import_products(db: Session, fileobj, fmt: str, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Bulk-create products (and their inventory rows) from a CSV or NDJSON upload.
+
+    Rows are validated with ProductCreate and written in batches: one multi-row
+    INSERT ... RETURNING for products, one for inventory and one for stock
+    rollups per batch, committed per batch (a batch that hits an integrity error
+    is retried row by row). Bad rows are reported back and skipped; they never
+    abort the rest of the file.
+    """
+    category_ids = set(db.scalars(select(models.Category.id)))
+    location_ids = set(db.scalars(select(models.Location.id)))
+    default_location_id = None
+    errors = []
+    imported = 0
+    total = 0
+    seen_skus = set()
+
+    def flush(batch):
+        # batch: list of (row_number, ProductCreate)
+        if not batch:
+            return
+        existing = set(db.scalars(
+            select(models.Product.sku).where(models.Product.sku.in_([p.sku for _, p in batch]))
+        ))
+        fresh = []
+        for row_number, product_in in batch:
+            if product_in.sku in existing:
+                errors.append({"row": row_number, "sku": product_in.sku, "errors": [f"SKU '{product_in.sku}' already exists"]})
+            else:
+                fresh.append((row_number, product_in))
+        if fresh:
+            write(fresh)
+
+    def write(rows):
+        nonlocal imported
+        try:
+            quantities = {p.sku: p.quantity for _, p in rows}
+            created = db.execute(
+                insert(models.Product).returning(
+                    models.Product.id, models.Product.sku, models.Product.unit_price, models.Product.location_id,
+                    sort_by_parameter_order=True
+                ),
+                [{**p.dict(exclude={"quantity"}), "location_id": p.location_id or default_location_id} for _, p in rows],
+            ).all()
+            db.execute(insert(models.Inventory), [
+                {"product_id": pid, "location_id": loc, "quantity": quantities[sku]} for pid, sku, _, loc in created
+            ])
+            stock_ledger_service.record_movements(db, [
+                {"product_id": pid, "location_id": loc, "movement_type": "initial", "delta": quantities[sku]}
+                for pid, sku, _, loc in created
+            ])
+            db.execute(insert(models.ProductStockRollup), [
+                {"product_id": pid, "available_quantity": quantities[sku], "unit_price": price,
+                 "stock_value": quantities[sku] * price}
+                for pid, sku, price, _ in created
+            ])
+            db.commit()
+            catalog_cache.invalidate_products()
+            imported += len(created)
+        except IntegrityError as e:
+            db.rollback()
+            if len(rows) > 1:
+                # e.g. a SKU inserted concurrently: retry row by row so only the offending rows fail
+                for row in rows:
+                    write([row])
+                return
+            row_number, product_in = rows[0]
+            errors.append({"row": row_number, "sku": product_in.sku, "errors": [f"Integrity error: {e.orig}"]})
+
+    batch = []
+    try:
+        for row_number, (raw, parse_error) in enumerate(_read_import_rows(fileobj, fmt), start=1):
+            total += 1
+            if parse_error is not None:
+                errors.append({"row": row_number, "sku": None, "errors": [parse_error]})
+                continue
+            try:
+                product_in = schemas.ProductCreate.model_validate(raw)
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "sku": raw.get("sku") if isinstance(raw, dict) else None,
+                    "errors": [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()],
+                })
+                continue
+
+            if product_in.category_id not in category_ids:
+                errors.append({"row": row_number, "sku": product_in.sku, "errors": [f"Category with ID {product_in.category_id} not found"]})
+                continue
+            if product_in.location_id is not None and product_in.location_id not in location_ids:
+                errors.append({"row": row_number, "sku": product_in.sku, "errors": [f"Location with ID {product_in.location_id} not found"]})
+                continue
+            if product_in.location_id is None and default_location_id is None:
+                default_location_id = inventory_service.default_location_id(db)
+            if product_in.sku in seen_skus:
+                errors.append({"row": row_number, "sku": product_in.sku, "errors": [f"Duplicate SKU '{product_in.sku}' in upload"]})
+                continue
+            seen_skus.add(product_in.sku)
+
+            batch.append((row_number, product_in))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        flush(batch)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse upload after {imported} imported rows: {e}"
+        )
+
+    errors.sort(key=lambda err: err["row"])
+    return {"total_rows": total, "imported": imported, "failed": len(errors), "errors": errors}
+
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func, bindparam
+from models import models
+from services.analysis_service import (
+    SALES_STATUSES, stock_levels_query, sales_summary_query, purchase_summary_query
+)
+
+# Rollup rows are written inside the caller's transaction; nothing here commits
+# except rebuild_rollups.
+
+
+# ----------------- Stock Value ----------------- #
+def record_stock(db: Session, products):
+    """Store the current stock value of each product (Product.quantity, across locations)."""
+    stock = {product.id: product for product in products}
+    if not stock:
+        return
+    existing = {
+        r.product_id: r for r in db.query(models.ProductStockRollup)
+        .filter(models.ProductStockRollup.product_id.in_(stock))
+        .all()
+    }
+
+    for product_id, product in stock.items():
+        quantity = product.quantity or 0
+        unit_price = product.unit_price or 0
+
+        rollup = existing.get(product_id)
+        if rollup is None:
+            rollup = models.ProductStockRollup(product_id=product_id)
+            db.add(rollup)
+        rollup.available_quantity = quantity
+        rollup.unit_price = unit_price
+        rollup.stock_value = quantity * unit_price
+
+
+# ----------------- Sales ----------------- #
+def record_sales(db: Session, order_items, sign: int = 1):
+    """Add (or with sign=-1 remove) order lines to the per-product sales totals."""
+    totals = defaultdict(lambda: [0, 0.0])
+    for item in order_items:
+        totals[item.product_id][0] += item.quantity or 0
+        totals[item.product_id][1] += (item.quantity or 0) * (item.price or 0)
+    if not totals:
+        return
+
+    table = models.ProductSalesRollup.__table__
+    existing = set(db.scalars(select(table.c.product_id).where(table.c.product_id.in_(totals))))
+
+    # Increments are applied in SQL so concurrent orders never overwrite each other.
+    if existing:
+        db.execute(
+            update(table)
+            .where(table.c.product_id == bindparam("b_product_id"))
+            .values(
+                total_sold=table.c.total_sold + bindparam("b_sold"),
+                total_revenue=table.c.total_revenue + bindparam("b_revenue"),
+            ),
+            [
+                {"b_product_id": pid, "b_sold": sign * qty, "b_revenue": sign * revenue}
+                for pid, (qty, revenue) in totals.items() if pid in existing
+            ],
+        )
+    missing = [
+        {"product_id": pid, "total_sold": sign * qty, "total_revenue": sign * revenue}
+        for pid, (qty, revenue) in totals.items() if pid not in existing
+    ]
+    if missing:
+        db.execute(insert(table), missing)
+
+
+def record_order_status_change(db: Session, order: models.Order, old_status: str, new_status: str):
+    """Keep sales totals in step when an order moves in or out of the counted statuses."""
+    was_counted = old_status in SALES_STATUSES
+    is_counted = new_status in SALES_STATUSES
+    if was_counted == is_counted:
+        return
+    record_sales(db, order.items, sign=1 if is_counted else -1)
+
+
+# ----------------- Purchases ----------------- #
+def record_purchases_received(db: Session, purchase_orders):
+    """Add fully received purchase orders to their suppliers' totals."""
+    totals = defaultdict(lambda: [0, 0, 0.0, 0])
+    for po in purchase_orders:
+        supplier = totals[po.supplier_id]
+        supplier[0] += sum(i.quantity or 0 for i in po.items)
+        supplier[1] += sum(i.received_quantity or 0 for i in po.items)
+        supplier[2] += sum((i.received_quantity or 0) * (i.unit_cost or 0) for i in po.items)
+        supplier[3] += 1
+    if not totals:
+        return
+
+    table = models.SupplierPurchaseRollup.__table__
+    existing = set(db.scalars(select(table.c.supplier_id).where(table.c.supplier_id.in_(totals))))
+
+    if existing:
+        db.execute(
+            update(table)
+            .where(table.c.supplier_id == bindparam("b_supplier_id"))
+            .values(
+                total_ordered_quantity=table.c.total_ordered_quantity + bindparam("b_ordered"),
+                total_received_quantity=table.c.total_received_quantity + bindparam("b_received"),
+                total_received_value=table.c.total_received_value + bindparam("b_value"),
+                purchase_orders_count=table.c.purchase_orders_count + bindparam("b_count"),
+            ),
+            [
+                {"b_supplier_id": sid, "b_ordered": o, "b_received": r, "b_value": v, "b_count": n}
+                for sid, (o, r, v, n) in totals.items() if sid in existing
+            ],
+        )
+    missing = [
+        {"supplier_id": sid, "total_ordered_quantity": o, "total_received_quantity": r,
+         "total_received_value": v, "purchase_orders_count": n}
+        for sid, (o, r, v, n) in totals.items() if sid not in existing
+    ]
+    if missing:
+        db.execute(insert(table), missing)
+
+
+# ----------------- Rebuild ----------------- #
+def rebuild_rollups(db: Session) -> dict:
+    """Recompute every rollup table from the source tables in one transaction."""
+    db.execute(delete(models.ProductStockRollup))
+    db.execute(delete(models.ProductSalesRollup))
+    db.execute(delete(models.SupplierPurchaseRollup))
+
+    levels = stock_levels_query().subquery()
+    db.execute(
+        insert(models.ProductStockRollup).from_select(
+            ["product_id", "available_quantity", "unit_price", "stock_value"],
+            select(
+                levels.c.product_id,
+                levels.c.available_quantity,
+                func.coalesce(levels.c.unit_price, 0),
+                levels.c.available_quantity * func.coalesce(levels.c.unit_price, 0),
+            )
+        )
+    )
+
+    sales = sales_summary_query(limit=None).subquery()
+    db.execute(
+        insert(models.ProductSalesRollup).from_select(
+            ["product_id", "total_sold", "total_revenue"],
+            select(sales.c.product_id, sales.c.total_sold, sales.c.total_revenue)
+        )
+    )
+
+    purchases = purchase_summary_query("received", limit=None).subquery()
+    db.execute(
+        insert(models.SupplierPurchaseRollup).from_select(
+            ["supplier_id", "total_ordered_quantity", "total_received_quantity",
+             "total_received_value", "purchase_orders_count"],
+            select(
+                purchases.c.supplier_id,
+                purchases.c.total_ordered_quantity,
+                purchases.c.total_received_quantity,
+                purchases.c.total_received_value,
+                purchases.c.purchase_orders_count,
+            ).where(purchases.c.purchase_orders_count > 0)
+        )
+    )
+    db.commit()
+
+    return {
+        "product_stock": db.scalar(select(func.count()).select_from(models.ProductStockRollup)),
+        "product_sales": db.scalar(select(func.count()).select_from(models.ProductSalesRollup)),
+        "supplier_purchases": db.scalar(select(func.count()).select_from(models.SupplierPurchaseRollup)),
+    }
@@ -0,0 +1,116 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+from sqlalchemy import DateTime, and_, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from models import models
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+
+# Stock at any moment = the product's latest snapshot at or before it, plus the
+# movements recorded after that snapshot up to the moment. Snapshots are cut
+# STOCK_SNAPSHOT_LAG_SECONDS behind "now": a movement is stamped just before its
+# transaction commits, so anything stamped before the cut has committed by then
+# and a snapshot never misses a movement.
+SNAPSHOT_LAG_SECONDS = int(os.getenv("STOCK_SNAPSHOT_LAG_SECONDS", "300"))
+
+MOVEMENT_FIELDS = ("product_id", "location_id", "movement_type", "delta", "order_id", "purchase_order_id", "note")
+
+
+def _utc(at: datetime) -> datetime:
+    """Naive datetimes are taken as UTC."""
+    return at.replace(tzinfo=timezone.utc) if at.tzinfo is None else at.astimezone(timezone.utc)
+
+
+def record_movements(db: Session, movements: Iterable[dict]):
+    """Append movements (dicts with MOVEMENT_FIELDS) in the caller's transaction."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {**{field: movement.get(field) for field in MOVEMENT_FIELDS}, "created_at": now}
+        for movement in movements if movement.get("delta")
+    ]
+    if rows:
+        db.execute(insert(models.StockMovement), rows)
+
+
+def _stock_at(at: datetime, product_ids: Optional[List[int]] = None):
+    """product_id, quantity and the number of movements since the snapshot used, at `at`."""
+    snap = models.StockSnapshot
+    move = models.StockMovement
+
+    latest = select(snap.product_id, func.max(snap.as_of).label("as_of")).where(snap.as_of <= at)
+    if product_ids is not None:
+        latest = latest.where(snap.product_id.in_(product_ids))
+    latest = latest.group_by(snap.product_id).subquery()
+    base = (
+        select(snap.product_id, snap.as_of, snap.quantity)
+        .join(latest, and_(snap.product_id == latest.c.product_id, snap.as_of == latest.c.as_of))
+        .subquery()
+    )
+
+    tail = (
+        select(
+            move.product_id,
+            func.sum(move.delta).label("delta"),
+            func.count(move.id).label("movements"),
+        )
+        .outerjoin(base, base.c.product_id == move.product_id)
+        .where(move.created_at <= at)
+        .where(or_(base.c.as_of.is_(None), move.created_at > base.c.as_of))
+    )
+    if product_ids is not None:
+        tail = tail.where(move.product_id.in_(product_ids))
+    tail = tail.group_by(move.product_id).subquery()
+
+    query = (
+        select(
+            models.Product.id.label("product_id"),
+            (func.coalesce(base.c.quantity, 0) + func.coalesce(tail.c.delta, 0)).label("quantity"),
+            func.coalesce(tail.c.movements, 0).label("movements"),
+        )
+        .outerjoin(base, base.c.product_id == models.Product.id)
+        .outerjoin(tail, tail.c.product_id == models.Product.id)
+        .order_by(models.Product.id)
+    )
+    if product_ids is not None:
+        query = query.where(models.Product.id.in_(product_ids))
+    return query
+
+
+def stock_as_of(db: Session, at: datetime, product_ids: Optional[List[int]] = None) -> List[dict]:
+    """Stock per product at `at`, from snapshots plus the movement tail."""
+    at = _utc(at)
+    return [
+        {"product_id": row.product_id, "quantity": row.quantity, "as_of": at}
+        for row in db.execute(_stock_at(at, product_ids))
+    ]
+
+
+def take_snapshots(db: Session, as_of: Optional[datetime] = None) -> int:
+    """Snapshot every product that moved since its last snapshot; returns the rows written."""
+    as_of = _utc(as_of) if as_of else datetime.now(timezone.utc) - timedelta(seconds=SNAPSHOT_LAG_SECONDS)
+    levels = _stock_at(as_of).subquery()
+    result = db.execute(
+        insert(models.StockSnapshot).from_select(
+            ["product_id", "as_of", "quantity"],
+            select(levels.c.product_id, literal(as_of, DateTime(timezone=True)), levels.c.quantity)
+            .where(levels.c.movements > 0)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def list_movements(
+    db: Session,
+    product_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    query = db.query(models.StockMovement).filter(models.StockMovement.product_id == product_id)
+    if since is not None:
+        query = query.filter(models.StockMovement.created_at >= _utc(since))
+    if until is not None:
+        query = query.filter(models.StockMovement.created_at < _utc(until))
+    return paginate(query, models.StockMovement.id, cursor, limit)
@@ -1,10 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select
 from fastapi import HTTPException
 from datetime import datetime
 import re
 from models import models
 from schemas import supplier_schema as schemas
+from services import rollup_service, inventory_service, catalog_cache, stock_ledger_service, allocation_service
 import pytz
+from typing import Optional
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
 IST = pytz.timezone("Asia/Kolkata")
 
@@ -37,11 +41,14 @@ def create_supplier(db: Session, supplier: schemas.SupplierCreate):
     return new_supplier
 
 
-def get_suppliers(db: Session):
-    suppliers = db.query(models.Supplier).all()
-    if not suppliers:
+def get_suppliers(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, name: Optional[str] = None):
+    query = db.query(models.Supplier)
+    if name:
+        query = query.filter(models.Supplier.name.ilike(f"%{name}%"))
+    page = paginate(query, models.Supplier.id, cursor, limit)
+    if not page["items"] and cursor is None and name is None:
         raise HTTPException(status_code=404, detail="No suppliers found. Please create a supplier first.")
-    return suppliers
+    return page
 
 # ----------------- Purchase Order Functions ----------------- #
 def create_purchase_order(db: Session, po_data: schemas.PurchaseOrderCreate):
@@ -72,7 +79,7 @@ def create_purchase_order(db: Session, po_data: schemas.PurchaseOrderCreate):
         if not item.product_id or item.product_id <= 0:
             raise HTTPException(status_code=400, detail=f"Item {i}: Enter a valid Product ID.")
 
-        product = db.query(models.Product).filter(models.Product.id == item.product_id).first()
+        product = catalog_cache.get_product(db, item.product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Item {i}: Product with ID {item.product_id} not found.")
 
@@ -108,74 +115,180 @@ def create_purchase_order(db: Session, po_data: schemas.PurchaseOrderCreate):
 
 
 def mark_order_received(db: Session, order_id: int, received_items: list):
-    po = db.query(models.PurchaseOrder).filter(models.PurchaseOrder.id == order_id).first()
-    if not po:
-        raise HTTPException(status_code=404, detail=f"Purchase order {order_id} not found.")
+    result = receive_purchase_orders(db, [(order_id, received_items)])[0]
+    if result["updated_items"] == 0:
+        raise HTTPException(status_code=400, detail="No valid items were updated.")
 
-    received_count = 0
-    for received_item in received_items:
-        product_id = received_item.product_id
-        received_qty = received_item.received_quantity
+    return {
+        **result,
+        "message": "Selected items successfully marked as received, and inventory updated."
+    }
 
-        if received_qty <= 0:
-            raise HTTPException(status_code=400, detail=f"Received quantity must be greater than 0 for product {product_id}.")
 
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product with ID {product_id} does not exist.")
-
-        po_item = db.query(models.PurchaseOrderItem).filter(
-            models.PurchaseOrderItem.order_id == order_id,
-            models.PurchaseOrderItem.product_id == product_id
-        ).first()
-        if not po_item:
-            raise HTTPException(status_code=404, detail=f"Product {product_id} is not part of this purchase order.")
-
-        if received_qty + po_item.received_quantity > po_item.quantity:
-            raise HTTPException(status_code=400, detail=f"Received quantity cannot exceed ordered quantity for product {product_id}.")
-
-        # Update received quantity
-        po_item.received_quantity += received_qty
-        received_count += 1
-
-        # Sync Product quantity
-        product.quantity += received_qty
-        product.updated_at = datetime.now(pytz.UTC)
-
-        # Update or create inventory entry
-        inv = db.query(models.Inventory).filter(models.Inventory.product_id == product_id).first()
-        if inv:
-            inv.quantity += received_qty
-            inv.last_updated = datetime.utcnow()
+def receive_purchase_orders(db: Session, receipts: list):
+    """Apply dock receipts for one or more purchase orders in a single transaction.
+
+    `receipts` is a list of (order_id, received_items). Purchase orders (with
+    their items), products and inventory rows are each loaded with one set
+    query, and stock is incremented with one UPDATE, however many lines the
+    trucks brought in. Items are stocked at their `location_id`, or at the
+    product's home location.
+    """
+    order_ids = sorted({order_id for order_id, _ in receipts})
+    product_ids = {item.product_id for _, items in receipts for item in items}
+    location_ids = {item.location_id for _, items in receipts for item in items if item.location_id is not None}
+    if location_ids:
+        missing = location_ids - set(db.scalars(select(models.Location.id).where(models.Location.id.in_(location_ids))))
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Location with ID {min(missing)} does not exist.")
+
+    # Lock the purchase orders, then the products' stock, in id order before any changes
+    pos = {
+        po.id: po for po in db.query(models.PurchaseOrder)
+        .options(selectinload(models.PurchaseOrder.items))
+        .filter(models.PurchaseOrder.id.in_(order_ids))
+        .order_by(models.PurchaseOrder.id)
+        .with_for_update()
+        .all()
+    }
+    products = inventory_service.lock_products(db, product_ids)
+    default_location_id = None
+
+    touched = {}
+    deltas = {}
+    movements = []
+    results = []
+    newly_received = []
+    for order_id, received_items in receipts:
+        po = pos.get(order_id)
+        if not po:
+            raise HTTPException(status_code=404, detail=f"Purchase order {order_id} not found.")
+        po_items = {}
+        for item in sorted(po.items, key=lambda i: i.id):
+            po_items.setdefault(item.product_id, item)
+
+        received_count = 0
+        for received_item in received_items:
+            product_id = received_item.product_id
+            received_qty = received_item.received_quantity
+
+            if received_qty <= 0:
+                raise HTTPException(status_code=400, detail=f"Received quantity must be greater than 0 for product {product_id}.")
+
+            product = products.get(product_id)
+            if not product:
+                raise HTTPException(status_code=404, detail=f"Product with ID {product_id} does not exist.")
+
+            po_item = po_items.get(product_id)
+            if not po_item:
+                raise HTTPException(status_code=404, detail=f"Product {product_id} is not part of this purchase order.")
+
+            if received_qty + po_item.received_quantity > po_item.quantity:
+                raise HTTPException(status_code=400, detail=f"Received quantity cannot exceed ordered quantity for product {product_id}.")
+
+            # Update received quantity
+            po_item.received_quantity += received_qty
+            received_count += 1
+
+            # Stock it at the given location, else the product's home location
+            location_id = received_item.location_id or product.location_id
+            if location_id is None:
+                if default_location_id is None:
+                    default_location_id = inventory_service.default_location_id(db)
+                location_id = default_location_id
+            key = (product_id, location_id)
+            deltas[key] = deltas.get(key, 0) + received_qty
+            touched[product_id] = product
+            movements.append({
+                "product_id": product_id, "location_id": location_id, "movement_type": "receipt",
+                "delta": received_qty, "purchase_order_id": po.id,
+            })
+
+        # Update Purchase Order status
+        previous_status = po.status
+        if all(i.received_quantity == i.quantity for i in po.items):
+            po.status = "received"
+        elif any(i.received_quantity > 0 for i in po.items):
+            po.status = "partial"
         else:
-            new_inv = models.Inventory(product_id=product_id, quantity=received_qty, last_updated=datetime.utcnow())
-            db.add(new_inv)
-
-    # Update Purchase Order status
-    all_items = po.items
-    if all(i.received_quantity == i.quantity for i in all_items):
-        po.status = "received"
-    elif any(i.received_quantity > 0 for i in all_items):
-        po.status = "partial"
-    else:
-        po.status = "pending"
+            po.status = "pending"
 
-    db.commit()
-    db.refresh(po)
+        if po.status == "received" and previous_status != "received":
+            newly_received.append(po)
+        results.append({"order_id": po.id, "status": po.status, "updated_items": received_count})
 
-    if received_count == 0:
-        raise HTTPException(status_code=400, detail="No valid items were updated.")
+    # Add the received stock in SQL (creating rows for locations new to a product)
+    inventories = inventory_service.load_stock(db, deltas, create=True)
+    levels = inventory_service.apply_stock_deltas(db, touched, inventories, deltas)
+    stock_ledger_service.record_movements(db, movements)
+    rollup_service.record_stock(db, touched.values())
+    rollup_service.record_purchases_received(db, newly_received)
+
+    db.commit()
+    catalog_cache.invalidate_products(touched)
+    allocation_service.stock_changed(levels)
+    return results
+
+def get_order_items_by_status(db: Session, order_id: int, status: str):
+    po = (
+        db.query(models.PurchaseOrder)
+        .options(selectinload(models.PurchaseOrder.items))
+        .filter(models.PurchaseOrder.id == order_id)
+        .first()
+    )
+    if not po:
+        raise HTTPException(status_code=404, detail="Purchase order not found")
+
+    filtered_items = []
+    for item in po.items:
+        if item.received_quantity == item.quantity:
+            item_status = "received"
+        elif item.received_quantity > 0:
+            item_status = "partial"
+        else:
+            item_status = "pending"
+
+        if item_status == status:
+            filtered_items.append({
+                "product_id": item.product_id,
+                "ordered_quantity": item.quantity,
+                "received_quantity": item.received_quantity,
+                "unit_cost": item.unit_cost,
+                "status": item_status,
+            })
+
+    if not filtered_items:
+        return {
+            "order_id": order_id,
+            "selected_status": status,
+            "total_items": 0,
+            "message": f"No items found for status '{status}'."
+        }
 
     return {
-        "order_id": po.id,
-        "status": po.status,
-        "updated_items": received_count,
-        "message": "Selected items successfully marked as received, and inventory updated."
+        "order_id": order_id,
+        "selected_status": status,
+        "total_items": len(filtered_items),
+        "items": filtered_items,
     }
 
 # ----------------- Inventory & Summary Functions ----------------- #
-def get_inventory(db: Session):
-    return db.query(models.Inventory).all()
+def get_inventory(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    product_id: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    location_id: Optional[int] = None,
+):
+    query = db.query(models.Inventory)
+    if product_id is not None:
+        query = query.filter(models.Inventory.product_id == product_id)
+    if location_id is not None:
+        query = query.filter(models.Inventory.location_id == location_id)
+    if max_quantity is not None:
+        query = query.filter(models.Inventory.quantity <= max_quantity)
+    return paginate(query, models.Inventory.id, cursor, limit)
 
 
 def get_supplier_order_summary(db: Session, supplier_id: int):
@@ -183,7 +296,12 @@ def get_supplier_order_summary(db: Session, supplier_id: int):
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
 
-    orders = db.query(models.PurchaseOrder).filter(models.PurchaseOrder.supplier_id == supplier_id).all()
+    orders = (
+        db.query(models.PurchaseOrder)
+        .options(selectinload(models.PurchaseOrder.items))
+        .filter(models.PurchaseOrder.supplier_id == supplier_id)
+        .all()
+    )
 
     total_pending_qty = total_received_qty = 0
     total_pending_value = total_received_value = 0.0
@@ -1,12 +1,18 @@
 import os
-import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from db import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import ASYNC_DB, get_sync_db, get_async_db
 from models.models import User,UserRole
+from utils.cache import caches
+from utils.password_hasher import hash_password, verify_password  # noqa: F401  (re-exported)
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,12 +24,6 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS"))
 
 security = HTTPBearer()
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return hash_password(plain_password) == hashed_password
-
 # JWT
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -44,11 +44,45 @@ def verify_token(token: str):
     except JWTError:
         return None
 
-def get_current_user_and_db(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+# Decoded access tokens and the users behind them are cached so role checks do not
+# hit the database on every request. Entries are small immutable snapshots (never
+# ORM objects, which expire when their session commits) and are dropped by
+# invalidate_cached_user() whenever a user is updated or deleted.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+token_cache = caches.cache("auth.tokens", AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+user_cache = caches.cache("auth.users", AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    name: str
+    email: str
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, name=user.name, email=user.email, role=user.role)
+
+
+def invalidate_cached_user(user_id: int):
+    caches.invalidate("auth.users", [user_id])
+
+
+def cached_user_for_token(token: str) -> Optional[CurrentUser]:
+    """The user behind `token` if both are already cached (no decoding, no query)."""
+    user_id = token_cache.get(token)
+    return None if user_id is None else user_cache.get(user_id)
+
+
+def _authenticated_user_id(credentials: HTTPAuthorizationCredentials) -> int:
     token = credentials.credentials
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -57,27 +91,57 @@ def get_current_user_and_db(
     user_id = payload.get("user_id")
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user, db
+
+    # never keep a token cached past its own expiry
+    token_cache.set(token, user_id, ttl=payload["exp"] - time.time() if "exp" in payload else None)
+    return user_id
+
+def get_current_user_and_sync_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_sync_db)
+):
+    user_id = _authenticated_user_id(credentials)
+    current_user = user_cache.get(user_id)
+    if current_user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        current_user = CurrentUser.from_user(user)
+        user_cache.set(user_id, current_user)
+    return current_user, db
+
+async def get_current_user_and_async_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = _authenticated_user_id(credentials)
+    current_user = user_cache.get(user_id)
+    if current_user is None:
+        user = (await db.execute(select(User).filter(User.id == user_id))).scalars().first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        current_user = CurrentUser.from_user(user)
+        user_cache.set(user_id, current_user)
+    return current_user, db
+
+get_current_user_and_db = get_current_user_and_async_db if ASYNC_DB else get_current_user_and_sync_db
 
 
-def admin_required(data=Depends(get_current_user_and_db)):
+async def admin_required(data=Depends(get_current_user_and_db)):
     user, db = data
     if user.role != UserRole.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return db
 
 
-def manager_required(data=Depends(get_current_user_and_db)):
+async def manager_required(data=Depends(get_current_user_and_db)):
     user, db = data
     if user.role not in [UserRole.admin, UserRole.manager]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Manager or Admin access required")
     return db
 
 
-def staff_required(data=Depends(get_current_user_and_db)):
+async def staff_required(data=Depends(get_current_user_and_db)):
     # staff, manager, admin all allowed
     _, db = data
     return db
\ No newline at end of file
@@ -0,0 +1,255 @@
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    A `ttl` of 0 (or less) disables caching: `set` becomes a no-op.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCache:
+    """Cache kept on a Redis-protocol server, so every worker process sees the same entries.
+
+    Values are pickled, so the server must be as trusted as the database. Size
+    bounds and LRU eviction are left to the server's `maxmemory` policy; `maxsize`
+    is only reported. Hit/miss counters are per process.
+    """
+
+    def __init__(self, registry: "CacheRegistry", name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.registry = registry
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prefix = f"{registry.namespace}:{name}:"
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + repr(key)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = self.registry.client.get(self._key(key))
+        if raw is None:
+            self._count("misses")
+            return default
+        self._count("hits")
+        return pickle.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self.registry.client.set(self._key(key), pickle.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: Hashable):
+        self.registry.client.delete(self._key(key))
+
+    def _keys(self):
+        return self.registry.client.scan_iter(match=self.prefix + "*", count=1000)
+
+    def clear(self):
+        batch = []
+        for key in self._keys():
+            batch.append(key)
+            if len(batch) >= 1000:
+                self.registry.client.delete(*batch)
+                batch = []
+        if batch:
+            self.registry.client.delete(*batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "backend": "redis",
+            "size": sum(1 for _ in self._keys()),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "evictions": None,
+        }
+
+
+# ----------------- Backend selection and invalidation ----------------- #
+# CACHE_BACKEND=memory keeps one TTLCache per worker process; CACHE_BACKEND=redis
+# keeps entries on the server at CACHE_REDIS_URL, shared by all workers. Whenever
+# a Redis URL is configured, invalidations are also published on a pub/sub channel
+# so workers drop their own in-memory copies of changed rows.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or None
+CACHE_NAMESPACE = os.getenv("CACHE_NAMESPACE", "wms")
+
+
+class CacheRegistry:
+    """Creates the named caches used by the services and routes invalidations to them."""
+
+    def __init__(self, backend: str = "memory", redis_url: Optional[str] = None,
+                 namespace: str = "wms", client=None):
+        if backend not in ("memory", "redis"):
+            raise ValueError(f"Unknown cache backend {backend!r} (expected 'memory' or 'redis')")
+        self.backend = backend
+        self.redis_url = redis_url or ("redis://localhost:6379/0" if backend == "redis" else None)
+        self.namespace = namespace
+        self.channel = f"{namespace}:cache-invalidate"
+        self.origin = uuid.uuid4().hex
+        self._client = client
+        self._caches = {}
+        self._hooks = {}  # cache name -> callbacks(keys) run on every invalidation, local or remote
+        self._pubsub = None
+        self._listener = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("The shared cache backend needs the 'redis' package installed") from e
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    @property
+    def publishes(self) -> bool:
+        return self._client is not None or self.redis_url is not None
+
+    def cache(self, name: str, maxsize: int = 1024, ttl: float = 60.0, local: bool = False):
+        """A named cache; `local` keeps it in this process whatever the backend."""
+        if self.backend == "redis" and not local:
+            cache = RedisCache(self, name, maxsize=maxsize, ttl=ttl)
+        else:
+            cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._caches[name] = cache
+        return cache
+
+    def on_invalidate(self, name: str, callback: Callable[[Optional[list]], None]):
+        """Call `callback(keys)` (None = everything) before entries of cache `name` are dropped,
+        whether the invalidation came from this worker or another one."""
+        self._hooks.setdefault(name, []).append(callback)
+
+    def _run_hooks(self, name: str, keys: Optional[list]):
+        for callback in self._hooks.get(name, ()):
+            callback(keys)
+
+    def _apply(self, name: str, keys: Optional[list]):
+        cache = self._caches.get(name)
+        if cache is None:
+            return
+        if keys is None:
+            cache.clear()
+        else:
+            for key in keys:
+                cache.delete(key)
+
+    def invalidate(self, name: str, keys: Optional[Iterable[Hashable]] = None):
+        """Drop `keys` (or everything) from cache `name` here and in every other worker."""
+        keys = None if keys is None else list(keys)
+        self._run_hooks(name, keys)
+        self._apply(name, keys)
+        if self.publishes:
+            message = {"origin": self.origin, "cache": name, "keys": keys}
+            try:
+                self.client.publish(self.channel, json.dumps(message))
+            except Exception as e:
+                # The TTL still bounds how stale other workers can get.
+                print(f"[Cache Error - invalidate {name}]: {e}")
+
+    def handle_message(self, data):
+        message = json.loads(data)
+        if message.get("origin") == self.origin:
+            return  # already applied locally
+        # hooks run even for shared caches: this worker may be filling the entry right now
+        self._run_hooks(message["cache"], message.get("keys"))
+        if isinstance(self._caches.get(message["cache"]), RedisCache):
+            return  # already deleted from the shared store
+        self._apply(message["cache"], message.get("keys"))
+
+    def start_listener(self):
+        """Apply invalidations published by other workers (no-op without Redis)."""
+        if not self.publishes or self._listener is not None:
+            return
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: lambda message: self.handle_message(message["data"])})
+        self._listener = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        return {name: cache.stats() for name, cache in self._caches.items()}
+
+
+caches = CacheRegistry(CACHE_BACKEND, CACHE_REDIS_URL, CACHE_NAMESPACE)
@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import Any, Callable
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model):
+    return TypeAdapter(response_model)
+
+
+async def run_service(db, fn: Callable, *args, response_model: Any = None, **kwargs):
+    """Call a service function `fn(session, *args, **kwargs)` without blocking the event loop.
+
+    With an AsyncSession the service runs through `run_sync`, so its queries are
+    awaited on the loop instead of holding a worker thread; with a plain Session it
+    runs in the threadpool as sync routes always did. When `response_model` is
+    given the result is converted inside the same call, so lazy relationships
+    (e.g. `Order.items`) are loaded while the session is still usable.
+    """
+    def call(session):
+        result = fn(session, *args, **kwargs)
+        if response_model is not None and result is not None:
+            result = _adapter(response_model).validate_python(result, from_attributes=True)
+        return result
+
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(call)
+    return await run_in_threadpool(call, db)
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import os
+from enum import Enum
+from typing import Callable, Iterator, List
+from fastapi.responses import StreamingResponse
+from db import SessionLocal
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _session_batches(producer: Callable, *args, **kwargs) -> Iterator[List[dict]]:
+    # The response body is produced after the route has returned, so the stream
+    # owns its own session instead of borrowing the request's.
+    db = SessionLocal()
+    try:
+        yield from producer(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def _encode(batches: Iterator[List[dict]], fields: List[str], fmt: ExportFormat) -> Iterator[str]:
+    if fmt == ExportFormat.csv:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        yield buffer.getvalue()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+    else:
+        for batch in batches:
+            yield "".join(json.dumps({f: row[f] for f in fields}) + "\n" for row in batch)
+
+
+def export_response(producer: Callable, fields: List[str], fmt: ExportFormat, filename: str, *args, **kwargs):
+    """Stream `producer(db, *args, **kwargs)` batches as a CSV or NDJSON download."""
+    body = _encode(_session_batches(producer, *args, **kwargs), fields, fmt)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt.value}"'},
+    )
+
+
+def write_export(db, producer: Callable, fields: List[str], fmt: ExportFormat, path: str, *args, **kwargs) -> int:
+    """Write `producer(db, *args, **kwargs)` batches to `path` (for background jobs). Returns the row count."""
+    rows = 0
+
+    def counted(batches):
+        nonlocal rows
+        for batch in batches:
+            rows += len(batch)
+            yield batch
+
+    # write to a temporary name so a poller never sees a half-written file
+    partial = path + ".part"
+    with open(partial, "w", newline="", encoding="utf-8") as out:
+        for chunk in _encode(counted(producer(db, *args, **kwargs)), fields, fmt):
+            out.write(chunk)
+    os.replace(partial, path)
+    return rows
@@ -0,0 +1,139 @@
+"""Workers that run queued background jobs (see services.job_service).
+
+Workers run either as threads of the API process (JOB_WORKER_THREADS, started
+from the app lifespan) or as separate processes with
+`python manage.py worker --processes N`, which keeps heavy jobs off the API's
+CPU entirely; deployments that run worker processes set JOB_WORKER_THREADS=0.
+Worker processes must share JOB_RESULT_DIR with the API for export downloads,
+and a Redis CACHE_BACKEND so the API sees the cache invalidations of the rows
+their jobs write.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from typing import List
+from db import SessionLocal, engine
+from services import job_service
+
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# how often a worker requeues stalled jobs and purges expired ones
+JOB_HOUSEKEEPING_SECONDS = float(os.getenv("JOB_HOUSEKEEPING_SECONDS", "300"))
+# worker processes run at a lower CPU priority so that on a shared host the API
+# keeps serving at full speed while they are busy
+JOB_WORKER_NICE = int(os.getenv("JOB_WORKER_NICE", "10"))
+
+
+def _housekeeping():
+    db = SessionLocal()
+    try:
+        job_service.requeue_stale(db)
+        job_service.purge_jobs(db)
+    except Exception as e:
+        db.rollback()
+        print(f"[Job Error - housekeeping]: {e}")
+    finally:
+        db.close()
+
+
+def _heartbeat(job_id: int, done: threading.Event):
+    # a separate session, so beats go out while the handler's transaction is open
+    while not done.wait(job_service.JOB_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            job_service.heartbeat(db, job_id)
+        except Exception as e:
+            db.rollback()
+            print(f"[Job Error - heartbeat #{job_id}]: {e}")
+        finally:
+            db.close()
+
+
+def _run_with_heartbeat(db, job):
+    done = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job.id, done), name=f"job-heartbeat-{job.id}", daemon=True)
+    beat.start()
+    try:
+        job_service.run_job(db, job)
+    finally:
+        done.set()
+        beat.join()
+
+
+def work(stop: threading.Event, burst: bool = False):
+    """Run jobs until `stop` is set (or, with `burst`, until the queue is empty)."""
+    next_housekeeping = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_housekeeping:
+            _housekeeping()
+            next_housekeeping = time.monotonic() + JOB_HOUSEKEEPING_SECONDS
+        db = SessionLocal()
+        try:
+            job = job_service.claim_job(db)
+            if job is not None:
+                _run_with_heartbeat(db, job)
+        except Exception as e:
+            # the database is unreachable or the job row itself could not be updated
+            db.rollback()
+            print(f"[Job Error - worker]: {e}")
+            job = None
+            stop.wait(JOB_POLL_SECONDS)
+        finally:
+            db.close()
+        if job is None:
+            if burst:
+                return
+            job_service.wait_for_jobs(JOB_POLL_SECONDS)
+
+
+# ----------------- Threads in the API process ----------------- #
+_stop = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+def start_threads(count: int = JOB_WORKER_THREADS):
+    _stop.clear()
+    for n in range(count):
+        thread = threading.Thread(target=work, args=(_stop,), name=f"job-worker-{n}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+
+def stop_threads(timeout: float = 10):
+    """Stop the worker threads; a job already running is finished first (up to `timeout`)."""
+    _stop.set()
+    job_service.wake_workers()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+# ----------------- Worker processes ----------------- #
+def _process_main(burst: bool):
+    # connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+    if JOB_WORKER_NICE and hasattr(os, "nice"):
+        os.nice(JOB_WORKER_NICE)
+    try:
+        work(threading.Event(), burst=burst)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_processes(count: int, burst: bool = False):
+    """Run `count` worker processes until interrupted (or, with `burst`, the queue is empty)."""
+    if count == 1:
+        return _process_main(burst)
+    processes = [
+        multiprocessing.Process(target=_process_main, args=(burst,), name=f"job-worker-{n}")
+        for n in range(count)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
@@ -0,0 +1,41 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(query, key_column, cursor: Optional[str], limit: int, offset: int = 0) -> dict:
+    """Keyset page over `query` ordered by `key_column` (an increasing integer key).
+
+    Rows after the cursor are read with `WHERE key > :last` instead of OFFSET, so
+    every page costs the same no matter how deep it is.
+    """
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        query = query.filter(key_column > last_id)
+    query = query.order_by(key_column)
+    if offset:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key_column.key))
+    return {"items": rows, "next_cursor": next_cursor, "limit": limit}
@@ -0,0 +1,175 @@
+"""Password hashing with a tunable stdlib KDF, run off the request threads.
+
+Hashes are stored as "<algorithm>$<cost>$<salt>$<hash>" (salt and hash in
+base64), so the cost can be raised at any time:
+
+    scrypt$n=16384,r=8,p=1$<salt>$<hash>
+    pbkdf2_sha256$i=600000$<salt>$<hash>
+
+PASSWORD_HASHER picks the algorithm for new hashes (scrypt or pbkdf2_sha256)
+and PASSWORD_SCRYPT_N / _R / _P and PASSWORD_PBKDF2_ITERATIONS its cost. Any
+stored hash still verifies; a login with a hash made under other settings, or
+with a legacy unsalted SHA-256 hex digest, stores a fresh one (needs_rehash).
+
+A KDF is deliberately slow (tens of ms of CPU per call), so the API awaits
+hash_password_async / verify_password_async, which run in a pool of their
+own: PASSWORD_HASH_POOL=thread (the KDFs release the GIL) or process, with
+PASSWORD_HASH_WORKERS workers. A login burst then queues for those workers
+instead of taking every threadpool thread (and CPU) from other requests.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "scrypt")
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+# by default half the cores, so hashing never takes all of them from the API
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+SALT_BYTES = 16
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _parse_cost(cost: str) -> dict:
+    return {key: int(value) for key, value in (part.split("=") for part in cost.split(","))}
+
+
+class Scrypt:
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = PASSWORD_SCRYPT_N, r: int = PASSWORD_SCRYPT_R, p: int = PASSWORD_SCRYPT_P):
+        self.cost = {"n": n, "r": r, "p": p}
+
+    @staticmethod
+    def derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        # scrypt needs 128*n*r bytes of memory; leave headroom over OpenSSL's 32 MiB default
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(SALT_BYTES)
+        cost = ",".join(f"{key}={value}" for key, value in self.cost.items())
+        return f"{self.algorithm}${cost}${_b64(salt)}${_b64(self.derive(password, salt, **self.cost))}"
+
+    def verify(self, password: str, cost: str, salt: bytes, expected: bytes) -> bool:
+        return hmac.compare_digest(self.derive(password, salt, **_parse_cost(cost)), expected)
+
+
+class Pbkdf2Sha256:
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = PASSWORD_PBKDF2_ITERATIONS):
+        self.cost = {"i": iterations}
+
+    @staticmethod
+    def derive(password: str, salt: bytes, i: int) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, i)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(SALT_BYTES)
+        return f"{self.algorithm}$i={self.cost['i']}${_b64(salt)}${_b64(self.derive(password, salt, **self.cost))}"
+
+    def verify(self, password: str, cost: str, salt: bytes, expected: bytes) -> bool:
+        return hmac.compare_digest(self.derive(password, salt, **_parse_cost(cost)), expected)
+
+
+HASHERS = {hasher.algorithm: hasher for hasher in (Scrypt, Pbkdf2Sha256)}
+
+if PASSWORD_HASHER not in HASHERS:
+    raise RuntimeError(f"PASSWORD_HASHER must be one of {', '.join(HASHERS)}, not '{PASSWORD_HASHER}'")
+hasher = HASHERS[PASSWORD_HASHER]()
+
+
+def _is_legacy(hashed_password: str) -> bool:
+    # hash_password used to store a bare SHA-256 hex digest
+    return len(hashed_password) == 64 and "$" not in hashed_password
+
+
+# ----------------- Synchronous (scripts, workers) ----------------- #
+def hash_password(password: str) -> str:
+    return hasher.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if _is_legacy(hashed_password):
+        digest = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(digest, hashed_password)
+    try:
+        algorithm, cost, salt, expected = hashed_password.split("$")
+        return HASHERS[algorithm]().verify(plain_password, cost, base64.b64decode(salt), base64.b64decode(expected))
+    except (KeyError, ValueError):
+        print("[Password Hash Error]: unrecognised hash format")
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True unless the hash was made by the current algorithm at the current cost."""
+    if _is_legacy(hashed_password):
+        return True
+    algorithm, cost = hashed_password.split("$", 2)[:2]
+    return algorithm != hasher.algorithm or _parse_cost(cost) != hasher.cost
+
+
+def _verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    return True, hash_password(plain_password) if needs_rehash(hashed_password) else None
+
+
+# ----------------- Pool (API) ----------------- #
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> Executor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if PASSWORD_HASH_POOL == "process":
+                _pool = ProcessPoolExecutor(PASSWORD_HASH_WORKERS)
+            else:
+                _pool = ThreadPoolExecutor(PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash to store or None): a matching outdated hash is rehashed in the same pool call."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor(), _verify_and_rehash, plain_password, hashed_password
+    )
+
+
+_dummy_hash: Optional[str] = None
+
+
+async def burn_verify_async(plain_password: str):
+    """Spend the time a real verify would, so unknown usernames are not told apart by response time."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password_async(secrets.token_hex(8))
+    await verify_password_async(plain_password, _dummy_hash)
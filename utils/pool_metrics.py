@@ -0,0 +1,89 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Counters gathered from SQLAlchemy pool events for one engine."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.waits, 6) if self.waits else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        return data
+
+
+class _TimedCheckoutMixin:
+    """Measures how long a checkout waits for a free connection."""
+
+    stats: PoolStats = None
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+                self.stats.incr("timeouts")
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+            if self.overflow() > max(overflow_before, 0):
+                self.stats.incr("overflow_events")
+        return conn
+
+
+def instrumented_pool_class(stats: PoolStats, async_engine: bool = False):
+    base = AsyncAdaptedQueuePool if async_engine else QueuePool
+    return type(f"Instrumented{base.__name__}", (_TimedCheckoutMixin, base), {"stats": stats})
+
+
+def attach_pool_listeners(engine, stats: PoolStats):
+    """Wire pool events of a (sync) engine into `stats`."""
+    event.listen(engine, "connect", lambda *a: stats.incr("connects"))
+    event.listen(engine, "checkout", lambda *a: stats.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *a: stats.incr("checkins"))
+    event.listen(engine, "invalidate", lambda *a: stats.incr("invalidations"))
@@ -0,0 +1,202 @@
+"""Per-route request latency, SQL statement count and DB time, for Prometheus.
+
+RequestMetricsMiddleware times every HTTP request and labels it with the route
+template (`/orders/{id}/ship`, not the concrete path). Cursor events on the
+engines (attach_statement_listeners, wired up in db.py) count the statements
+each request runs and the time spent in them, so an N+1 regression shows up as
+a jump in `wms_http_request_db_statements` for one route. render() writes
+everything in the Prometheus text format for GET /metrics.
+
+Numbers are kept per process, like the pool stats; with several API workers
+each one is scraped (or reports) on its own.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# pool_status() keys exported as counters; the other numeric ones are gauges
+POOL_COUNTERS = ("connects", "checkouts", "checkins", "invalidations", "overflow_events", "timeouts", "wait_seconds_total")
+POOL_GAUGES = ("size", "checked_out", "checked_in", "overflow", "wait_seconds_max")
+
+
+class _RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Stats of the request being served. Threadpool calls (sync routes, run_service)
+# run in a copy of the request's context, so they add to the same object.
+_current: contextvars.ContextVar[Optional[_RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_route() -> Optional[str]:
+    """Route of the request being served as "METHOD /route/{template}", if any."""
+    stats = _current.get()
+    if stats is None:
+        return None
+    scope = stats.scope
+    return f"{scope['method']} {getattr(scope.get('route'), 'path', None) or scope['path']}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.statements: Dict[Tuple[str, str], Histogram] = {}
+        self.db_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, statements: int, db_seconds: float):
+        key = (method, route)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+                self.db_seconds[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.statements[key].observe(statements)
+            self.db_seconds[key].observe(db_seconds)
+            self.responses[(method, route, str(status))] += 1
+
+    def clear(self):
+        with self._lock:
+            self.latency.clear()
+            self.statements.clear()
+            self.db_seconds.clear()
+            self.responses.clear()
+
+    def render(self, pools: Optional[dict] = None) -> str:
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                ("wms_http_request_duration_seconds", "Time to serve a request, by route.", self.latency),
+                ("wms_http_request_db_statements", "SQL statements executed per request, by route.", self.statements),
+                ("wms_http_request_db_seconds", "Time spent executing SQL per request, by route.", self.db_seconds),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines += _histogram_lines(name, {"method": method, "route": route}, histogram)
+
+            lines += ["# HELP wms_http_responses_total Responses sent, by route and status code.",
+                      "# TYPE wms_http_responses_total counter"]
+            for (method, route, status), count in sorted(self.responses.items()):
+                lines.append(f"wms_http_responses_total{_labels(method=method, route=route, status=status)} {count}")
+            lines += ["# HELP wms_http_requests_in_flight Requests being served right now.",
+                      "# TYPE wms_http_requests_in_flight gauge",
+                      f"wms_http_requests_in_flight {self.in_flight}"]
+
+        for key in POOL_COUNTERS + POOL_GAUGES:
+            counter = key in POOL_COUNTERS
+            name = f"wms_db_pool_{key}" + ("" if not counter or key.endswith("_total") else "_total")
+            samples = [(engine, stats[key]) for engine, stats in sorted((pools or {}).items()) if key in stats]
+            if samples:
+                lines.append(f"# TYPE {name} {'counter' if counter else 'gauge'}")
+                lines += [f"{name}{_labels(engine=engine)} {value}" for engine, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, labels: dict, histogram: Histogram) -> list:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+metrics = RequestMetrics()
+
+
+# ----------------- SQL statements ----------------- #
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def attach_statement_listeners(engine):
+    """Count the statements (and their time) of a (sync) engine towards the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ----------------- Middleware ----------------- #
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency, statements and DB time of every HTTP request."""
+
+    def __init__(self, app, registry: RequestMetrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500  # unless a response is started, the request failed
+
+        async def record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = _RequestStats(scope)
+        token = _current.set(stats)
+        self.registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.in_flight -= 1
+            _current.reset(token)
+            # The router leaves the matched route in the scope, and the response
+            # cache names the route it served from. Anything else unmatched (404s,
+            # trailing-slash redirects) shares one label to bound cardinality.
+            route = getattr(scope.get("route"), "path", None) or scope.get("metrics_route") or "unmatched"
+            self.registry.observe(scope["method"], route, status, elapsed, stats.statements, stats.db_seconds)
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.auth_helper import cached_user_for_token
+from utils.cache import caches
+
+# Dashboards poll a few read-only endpoints far more often than their tables
+# change. Every commit bumps a version counter for each table it wrote; a cached
+# endpoint's ETag is derived from the versions of the tables it reads, so
+#   - If-None-Match with the current ETag gets a 304 without running the report,
+#   - otherwise a body cached under the current ETag is replayed,
+#   - and only after a write (or RESPONSE_CACHE_MAX_AGE) does the endpoint run again.
+# Without a Redis server the versions are per process, so writes made by other
+# API workers, job worker processes or manage.py are invisible here. The ETag
+# then also carries the time it was issued, and once it is older than
+# RESPONSE_CACHE_MAX_AGE it no longer earns a 304.
+# Only requests whose token and user are already in the auth cache are served from
+# here; anything else goes through the normal route and its auth checks.
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "5"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+# path -> tables the response is computed from
+CACHED_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "/reports/low-stock": ("products", "inventory"),
+    "/reports/total-stock-value": ("product_stock_rollups",),
+    "/categories/": ("categories",),
+}
+
+response_cache = caches.cache("responses", RESPONSE_CACHE_SIZE, RESPONSE_CACHE_MAX_AGE)
+
+
+# ----------------- Table versions ----------------- #
+class TableVersions:
+    """Per-table write counters, kept on the Redis server when one is configured
+    so every worker derives the same ETags, otherwise in this process."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.epoch = uuid.uuid4().hex[:8]  # a restarted process never reuses old ETags
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def _key(self, table: str) -> str:
+        return f"{self.registry.namespace}:table-version:{table}"
+
+    def bump(self, tables: Iterable[str]):
+        tables = sorted(set(tables))
+        if not tables:
+            return
+        if self.registry.publishes:
+            try:
+                pipe = self.registry.client.pipeline()
+                for table in tables:
+                    pipe.incr(self._key(table))
+                pipe.execute()
+            except Exception as e:
+                print(f"[Cache Error - table versions]: {e}")
+        with self._lock:
+            for table in tables:
+                self._local[table] = self._local.get(table, 0) + 1
+
+    def token(self, tables: Iterable[str]) -> Optional[str]:
+        tables = sorted(tables)
+        if self.registry.publishes:
+            try:
+                values = self.registry.client.mget([self._key(t) for t in tables])
+            except Exception as e:
+                print(f"[Cache Error - table versions]: {e}")
+                return None  # cannot tell what changed, so do not cache
+            return ",".join(f"{t}={int(v or 0)}" for t, v in zip(tables, values))
+        with self._lock:
+            return self.epoch + ":" + ",".join(f"{t}={self._local.get(t, 0)}" for t in tables)
+
+
+table_versions = TableVersions(caches)
+
+
+def _written_tables(session: Session) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            tables.add(table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    # bulk INSERT/UPDATE/DELETE statements bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    table_versions.bump(session.info.pop("written_tables", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop("written_tables", None)
+
+
+# ----------------- Middleware ----------------- #
+def _matching_etag(if_none_match: str, digest: str, max_age: Optional[int]) -> Optional[str]:
+    """The candidate in If-None-Match that is still valid for `digest`, if any.
+
+    ETags are '"<digest>"', or '"<digest>-<issued>"' when they expire after `max_age`.
+    """
+    now = time.time()
+    for candidate in (c.strip().removeprefix("W/") for c in if_none_match.split(",")):
+        value, _, issued = candidate.strip('"').partition("-")
+        if value != digest:
+            continue
+        if max_age is None:
+            return candidate
+        if issued.isdigit() and now - int(issued) < max_age:
+            return candidate
+    return None
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving CACHED_ROUTES with ETags and cached bodies."""
+
+    def __init__(self, app, routes: Dict[str, Tuple[str, ...]] = None, max_age: int = RESPONSE_CACHE_MAX_AGE):
+        self.app = app
+        self.routes = CACHED_ROUTES if routes is None else routes
+        self.max_age = max_age
+
+    def _headers(self, etag: str) -> list:
+        return [(b"etag", etag.encode()), (b"cache-control", f"private, max-age={self.max_age}".encode())]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.routes:
+            return await self.app(scope, receive, send)
+        # cached responses never reach the router, so name the route for the request metrics
+        scope["metrics_route"] = scope["path"]
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        authorization = headers.get("authorization", "")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+        if not token or cached_user_for_token(token) is None:
+            return await self.app(scope, receive, send)
+
+        # The version is read before the report runs, so a write that lands while
+        # it runs makes the next request miss rather than cache a stale body.
+        version = table_versions.token(self.routes[scope["path"]])
+        if version is None:
+            return await self.app(scope, receive, send)
+        key = scope["path"] + "?" + "&".join(sorted(scope.get("query_string", b"").decode("latin-1").split("&")))
+        digest = hashlib.sha1(f"{key}|{version}".encode()).hexdigest()[:20]
+        # shared versions see every write; local ones only this process's, so they expire
+        expires = None if caches.publishes else self.max_age
+
+        matched = _matching_etag(headers.get("if-none-match", ""), digest, expires)
+        if matched is not None:
+            await send({"type": "http.response.start", "status": 304, "headers": self._headers(matched)})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = response_cache.get(key)
+        if cached is not None and cached[0] == digest:
+            _, etag, status, response_headers, body = cached
+            await send({"type": "http.response.start", "status": status,
+                        "headers": response_headers + self._headers(etag)})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = f'"{digest}"' if expires is None else f'"{digest}-{int(time.time())}"'
+        cache_headers = self._headers(etag)
+
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                if message["status"] == 200:
+                    message = {**message, "headers": list(message.get("headers", [])) + cache_headers}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body") and start.get("status") == 200:
+                    response_headers = [
+                        (k, v) for k, v in start.get("headers", [])
+                        if k.lower() not in (b"etag", b"cache-control")
+                    ]
+                    response_cache.set(key, (digest, etag, 200, response_headers, b"".join(chunks)))
+            await send(message)
+
+        await self.app(scope, receive, capture)
@@ -0,0 +1,199 @@
+"""Opt-in log of slow SQL statements, attributed to the route and service that ran them.
+
+Set SLOW_QUERY_LOG to a file path to enable it. Every statement taking at least
+SLOW_QUERY_MS is written to that file as one JSON object per line:
+
+    {"ts": ..., "duration_ms": 812.4, "route": "PUT /purchase-orders/{po_id}/tracking",
+     "service": ["supplier_service.receive_purchase_orders", "inventory_service.apply_stock_deltas"],
+     "statement": "UPDATE inventory SET ...", "params": {"quantity_1": "int", ...}, ...}
+
+`service` lists the service functions on the call stack, outermost first
+(statements from outside services/ name the nearest application function).
+`params` gives only the names and types of the bind parameters, never their
+values. With SLOW_QUERY_EXPLAIN=true a slow SELECT is also explained on the
+same connection (inside a savepoint on PostgreSQL, so a failure cannot abort the
+request's transaction; EXPLAIN QUERY PLAN on SQLite), at most once per statement
+every SLOW_QUERY_EXPLAIN_INTERVAL seconds. EXPLAIN ANALYZE runs the query again,
+so it is only used for plain ORM/Core selects reading from tables; a SELECT that
+locks rows (FOR UPDATE), only calls functions (pg_advisory_lock, setval) or was
+written as text() is planned without running it ("explain": "plan" in the
+record). The file rotates at SLOW_QUERY_LOG_MAX_BYTES,
+keeping SLOW_QUERY_LOG_BACKUPS old files.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+from utils.request_metrics import current_route
+
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+# statements remembered for the rate limit
+SLOW_QUERY_EXPLAIN_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_EXPLAIN_MAX_STATEMENTS", "1000"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# frames from these packages are never the origin of a statement
+_LIBRARY_PREFIXES = (
+    "sqlalchemy.", "starlette.", "fastapi.", "anyio.", "asyncio.", "greenlet", "concurrent.", "threading",
+    "contextlib", "utils.slow_query_log", "utils.request_metrics",
+)
+
+
+class SlowQueryLog:
+    def __init__(self, path: str, threshold_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN,
+                 max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES, backups: int = SLOW_QUERY_LOG_BACKUPS):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.logger = logging.getLogger(f"wms.slow_queries.{path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+        self._explained = {}  # statement -> when it was last explained
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        """Log the slow statements of a (sync) engine."""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+        try:
+            record = {
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "duration_ms": round(elapsed * 1000, 3),
+                "route": current_route(),
+                "service": _origin(),
+                "statement": " ".join(statement.split()),
+                "params": _shape(parameters, executemany),
+                "rowcount": cursor.rowcount,
+                "dialect": conn.dialect.name,
+            }
+            mode = _explain_mode(statement, context) if self.explain else None
+            if mode is not None and self._should_explain(statement):
+                record["explain"] = mode
+                record["plan"] = _explain(conn, statement, parameters, analyze=mode == "analyze")
+            self.logger.info(json.dumps(record, default=str))
+        except Exception as e:
+            # never let logging break the statement that was being logged
+            print(f"[Slow Query Log Error]: {e}")
+
+    def _should_explain(self, statement: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(statement, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            if len(self._explained) >= SLOW_QUERY_EXPLAIN_MAX_STATEMENTS:
+                # statements with expanding IN lists are all distinct: forget the expired
+                # ones, or the oldest half if none has expired yet
+                expired = [s for s, at in self._explained.items() if now - at >= SLOW_QUERY_EXPLAIN_INTERVAL]
+                for s in expired or sorted(self._explained, key=self._explained.get)[:len(self._explained) // 2]:
+                    del self._explained[s]
+            self._explained[statement] = now
+        return True
+
+
+def _origin() -> list:
+    """Service functions on the stack, outermost first; else the nearest application function."""
+    services, nearest = [], None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_LIBRARY_PREFIXES):
+            name = f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+            if module.startswith("services."):
+                if not services or services[-1] != name:
+                    services.append(name)
+            elif nearest is None and not services:
+                nearest = name
+        frame = frame.f_back
+    services.reverse()
+    return services or ([nearest] if nearest else [])
+
+
+def _type_names(params):
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def _shape(parameters, executemany: bool):
+    if executemany:
+        return {"rows": len(parameters), "each": _type_names(parameters[0]) if parameters else None}
+    return _type_names(parameters or ())
+
+
+def _explain_mode(statement: str, context) -> Optional[str]:
+    """How to explain a slow statement: "analyze" (run it again), "plan" (plan only) or None (skip)."""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None  # writes
+    compiled = getattr(context, "compiled", None)
+    select = getattr(compiled, "statement", None)
+    # text() and other raw SQL can hide anything, a SELECT without FROM is a function
+    # call (pg_advisory_lock, setval) and FOR UPDATE would take the row locks again
+    if isinstance(select, Select) and select._for_update_arg is None and select.get_final_froms():
+        return "analyze"
+    return "plan"
+
+
+def _explain(conn, statement: str, parameters, analyze: bool):
+    postgres = conn.dialect.name == "postgresql"
+    if postgres:
+        prefix = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " if analyze else "EXPLAIN (FORMAT JSON) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    cursor = conn.connection.cursor()
+    try:
+        # This runs inside the caller's transaction. A failed statement aborts a
+        # PostgreSQL transaction, so roll a failed EXPLAIN back to a savepoint.
+        if postgres:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return {"error": str(e)}
+        if postgres:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        cursor.close()
+    if postgres:
+        plan = rows[0][0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+    return [" ".join(str(col) for col in row[1:]) for row in rows]
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_LOG) if SLOW_QUERY_LOG else None
+
+
+def attach_slow_query_log(engine):
+    """Wire the slow-query log into a (sync) engine when SLOW_QUERY_LOG is set."""
+    if slow_query_log is not None:
+        slow_query_log.attach(engine)